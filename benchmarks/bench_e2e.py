@@ -0,0 +1,244 @@
+"""
+End-to-end benchmark against the stand-in server (benchmarks/server.py).
+
+Starts the server in a child process with one port per fake proxy, then:
+  - pipeline: drives runner.run over N URLs and reports records/sec, peak RSS and event-loop lag;
+  - stages:   drives HttpClient plus the parse/normalize/export steps directly and
+              reports p50/p95/p99 latency per stage.
+
+    python benchmarks/bench_e2e.py --urls 2000 -c 32 --proxies 4 --bad-proxies 1 --p429 0.02 --drip 0.01
+    python benchmarks/bench_e2e.py --mode pipeline --capacity 6 -c 8 --autotune --max-concurrency 64
+    python benchmarks/bench_e2e.py --mode pipeline --urls 100 --graph 20000 --crawl-depth 3 --crawl-budget 5000
+"""
+import argparse
+import asyncio
+import os
+import resource
+import socket
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+import runner  # noqa
+from client.connections import CONNECTIONS, ConnectionSettings  # noqa
+from client.http import HttpClient  # noqa
+from client.retry import FetchError  # noqa
+from extractors.streaming import DEFAULT_STREAM_FIELDS  # noqa
+from extractors.linkedin_company_parser import LinkedInCompanyParser  # noqa
+from pipelines.checkpoint import CheckpointStore  # noqa
+from pipelines.exporter import Exporter  # noqa
+from pipelines.normalizer import normalize_company_record  # noqa
+from utils.metrics import BYTES_DOWNLOADED, RETRIES  # noqa
+from server import FaultProfile, start_in_process  # noqa
+
+def percentiles(samples: List[float], points=(50, 95, 99)) -> Dict[str, float]:
+    if not samples:
+        return {f"p{p}": 0.0 for p in points}
+    ordered = sorted(samples)
+    return {f"p{p}": ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for p in points}
+
+class LoopLagMonitor:
+    """Sleeps `interval` in a loop and records how late each wakeup is."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+def _free_ports(n: int) -> List[int]:
+    socks = [socket.socket() for _ in range(n)]
+    for s in socks:
+        s.bind(("127.0.0.1", 0))
+    ports = [s.getsockname()[1] for s in socks]
+    for s in socks:
+        s.close()
+    return ports
+
+def _peak_rss_mb() -> Dict[str, float]:
+    # ru_maxrss is KiB on Linux; parse workers count as children
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+
+def _connection_settings(args) -> ConnectionSettings:
+    return ConnectionSettings(keepalive_timeout=args.keepalive, force_close=args.keepalive <= 0,
+                              compression=not args.no_compression)
+
+def _connection_counts() -> Dict[str, float]:
+    counts = {"new": 0.0, "reused": 0.0}
+    for labels, value in CONNECTIONS.snapshot().items():
+        counts[labels.rsplit("source=", 1)[-1]] += value
+    return counts
+
+def _fmt(stats: Dict[str, float]) -> str:
+    return "  ".join(f"{k}={v * 1000:.1f}ms" for k, v in stats.items())
+
+async def bench_pipeline(urls: List[str], proxy_file: str, workdir: str, args) -> None:
+    out = os.path.join(workdir, "pipeline.json")
+    monitor = LoopLagMonitor()
+    monitor.start()
+    downloaded = BYTES_DOWNLOADED.total()
+    retries = RETRIES.total()
+    connections = _connection_counts()
+    start = time.perf_counter()
+    await runner.run(urls, out, args.concurrency, args.timeout, proxy_file=proxy_file,
+                     parse_workers=args.parse_workers, parse_executor=args.parse_executor,
+                     exporter_options={"stream_bundle": True},
+                     stream_fields=DEFAULT_STREAM_FIELDS if args.stream else None,
+                     byte_cap=args.byte_cap * 1024 if args.byte_cap else None,
+                     connections=_connection_settings(args), autotune=args.autotune,
+                     max_concurrency=args.max_concurrency, crawl=args.graph > 0, crawl_depth=args.crawl_depth,
+                     crawl_budget=args.crawl_budget or None)
+    elapsed = time.perf_counter() - start
+    await monitor.stop()
+    with CheckpointStore(runner.default_checkpoint_path(out)) as store:
+        counts = store.counts()
+    done = counts.get("done", 0)
+    print(f"pipeline: {done} records ({counts.get('failed', 0)} failed) in {elapsed:.2f}s "
+          f"= {done / elapsed:.1f} rec/s, {(BYTES_DOWNLOADED.total() - downloaded) / 2 ** 20:.1f} MiB downloaded, "
+          f"{RETRIES.total() - retries:.0f} retries")
+    print(f"  loop lag: {_fmt(percentiles(monitor.samples))}  max={max(monitor.samples, default=0) * 1000:.1f}ms")
+    after = _connection_counts()
+    print(f"  connections: {after['new'] - connections['new']:.0f} new, "
+          f"{after['reused'] - connections['reused']:.0f} reused")
+
+async def bench_stages(urls: List[str], proxy_file: str, workdir: str, args) -> None:
+    timings: Dict[str, List[float]] = {"fetch": [], "parse": [], "normalize": [], "export": []}
+    parser = LinkedInCompanyParser()
+    exporter = Exporter(os.path.join(workdir, "stages.json"), stream_bundle=True)
+    exporter.open()
+    queue: asyncio.Queue = asyncio.Queue()
+    for u in urls:
+        queue.put_nowait(u)
+    failures = 0
+
+    async def worker(client: HttpClient):
+        nonlocal failures
+        while True:
+            try:
+                url = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            t0 = time.perf_counter()
+            try:
+                html = await client.get_text(url)
+            except FetchError:
+                failures += 1
+                continue
+            t1 = time.perf_counter()
+            record = parser.parse(html, base_url=url)
+            t2 = time.perf_counter()
+            record = normalize_company_record(record)
+            t3 = time.perf_counter()
+            exporter.write(record)
+            t4 = time.perf_counter()
+            timings["fetch"].append(t1 - t0)
+            timings["parse"].append(t2 - t1)
+            timings["normalize"].append(t3 - t2)
+            timings["export"].append(t4 - t3)
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    start = time.perf_counter()
+    async with HttpClient(max_concurrency=args.concurrency, timeout=args.timeout, proxy_file=proxy_file,
+                          stream_fields=DEFAULT_STREAM_FIELDS if args.stream else None,
+                          byte_cap=args.byte_cap * 1024 if args.byte_cap else None,
+                     connections=_connection_settings(args)) as client:
+        await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    await monitor.stop()
+    exporter.close()
+    done = len(timings["fetch"])
+    print(f"stages: {done} records ({failures} failed) in {elapsed:.2f}s = {done / elapsed:.1f} rec/s")
+    for row in client.pool_report():
+        print(f"  pool {row['pool']}: {row['connections']} new (avg connect {row['avg_connect_ms']}ms), "
+              f"{row['reused']} reused")
+    for stage, samples in timings.items():
+        print(f"  {stage:>9}: {_fmt(percentiles(samples))}")
+    print(f"  loop lag: {_fmt(percentiles(monitor.samples))}  max={max(monitor.samples, default=0) * 1000:.1f}ms")
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--urls", type=int, default=1000)
+    ap.add_argument("--concurrency", "-c", type=int, default=32)
+    ap.add_argument("--timeout", type=int, default=30)
+    ap.add_argument("--mode", choices=["pipeline", "stages", "both"], default="both")
+    ap.add_argument("--parse-workers", type=int, default=0)
+    ap.add_argument("--parse-executor", choices=["process", "thread"], default="process")
+    ap.add_argument("--proxies", type=int, default=2, help="Number of fake proxy endpoints")
+    ap.add_argument("--bad-proxies", type=int, default=0, help="How many of them block half their requests")
+    ap.add_argument("--latency", default="lognormal:0.05:0.5")
+    ap.add_argument("--p429", type=float, default=0.0)
+    ap.add_argument("--p403", type=float, default=0.0)
+    ap.add_argument("--p5xx", type=float, default=0.0)
+    ap.add_argument("--drip", type=float, default=0.0)
+    ap.add_argument("--stream", action="store_true", help="Streaming fetch with the default stream fields")
+    ap.add_argument("--byte-cap", type=int, default=0, help="Streaming byte cap in KiB")
+    ap.add_argument("--keepalive", type=float, default=30.0, help="Keep-alive seconds (0 = new connection per request)")
+    ap.add_argument("--no-compression", action="store_true")
+    ap.add_argument("--direct", action="store_true",
+                    help="Stages only: fetch from the server directly rather than through it as a proxy. aiohttp "
+                         "never reuses plain-http proxy connections, so this is how keep-alive shows up locally")
+    ap.add_argument("--capacity", type=int, default=0,
+                    help="Requests in flight per fake proxy before it answers 429 (0 = unlimited)")
+    ap.add_argument("--autotune", action="store_true", help="Pipeline only: AIMD concurrency window")
+    ap.add_argument("--max-concurrency", type=int, default=None, help="Upper bound of the --autotune window")
+    ap.add_argument("--graph", type=int, default=0,
+                    help="Pipeline only: crawl a company graph this size, seeded with the --urls companies")
+    ap.add_argument("--crawl-depth", type=int, default=2)
+    ap.add_argument("--crawl-budget", type=int, default=0)
+    ap.add_argument("--missing", type=float, default=0.0, help="Fraction of URLs that 404")
+    args = ap.parse_args()
+    if args.direct:
+        args.mode = "stages"
+
+    ports = _free_ports(args.proxies)
+    endpoints = []
+    for i, port in enumerate(ports):
+        bad = i < args.bad_proxies
+        endpoints.append((port, FaultProfile(args.latency, args.p429, 0.5 if bad else args.p403,
+                                             args.p5xx, args.drip, capacity=args.capacity, graph=args.graph)))
+    server = start_in_process(endpoints)
+    n_missing = int(args.urls * args.missing)
+    host = f"127.0.0.1:{ports[0]}" if args.direct else "www.linkedin.com"
+    urls = [f"http://{host}/company/{'missing' if i < n_missing else 'c'}{i}" for i in range(args.urls)]
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            proxy_file = os.path.join(workdir, "proxies.txt")
+            with open(proxy_file, "w", encoding="utf-8") as f:
+                f.write("\n".join(f"http://127.0.0.1:{p}" for p in ports) + "\n")
+            if args.mode in ("pipeline", "both"):
+                asyncio.run(bench_pipeline(urls, proxy_file, workdir, args))
+            if args.mode in ("stages", "both"):
+                asyncio.run(bench_stages(urls, None if args.direct else proxy_file, workdir, args))
+    finally:
+        server.terminate()
+        server.join()
+    rss = _peak_rss_mb()
+    print(f"peak RSS: {rss['self']:.1f} MB (parse workers: {rss['children']:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
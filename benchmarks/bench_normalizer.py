@@ -0,0 +1,40 @@
+"""
+Normalizer microbenchmark: parses the corpus once, then times normalize_company_record.
+
+    python benchmarks/bench_normalizer.py --pages 200 --repeat 20
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from extractors.linkedin_company_parser import LinkedInCompanyParser  # noqa
+from pipelines.normalizer import normalize_company_record  # noqa
+from corpus import corpus_from_args  # noqa
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pages", type=int, default=100)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--fixtures", help="Directory of saved .html pages to use instead of the synthetic corpus")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    parser = LinkedInCompanyParser()
+    pages = corpus_from_args(args.pages, args.seed, args.fixtures)
+    records = [parser.parse(html, base_url=f"https://www.linkedin.com/company/c{i}") for i, html in enumerate(pages)]
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for record in records:
+            normalize_company_record(record)
+        best = min(best, time.perf_counter() - start)
+    print(f"normalize: {len(records) / best:10.0f} records/s  ({best / len(records) * 1e6:.1f} us/record, best of {args.repeat})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Parser microbenchmark: compares the single-pass scanner with the BeautifulSoup engine.
+
+    python benchmarks/bench_parser.py --pages 200
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from extractors.linkedin_company_parser import LinkedInCompanyParser  # noqa
+from corpus import corpus_from_args  # noqa
+
+def bench(engine: str, pages, repeat: int) -> float:
+    parser = LinkedInCompanyParser(engine=engine)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i, html in enumerate(pages):
+            parser.parse(html, base_url=f"https://www.linkedin.com/company/c{i}")
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pages", type=int, default=100)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--fixtures", help="Directory of saved .html pages to use instead of the synthetic corpus")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    pages = corpus_from_args(args.pages, args.seed, args.fixtures)
+    mb = sum(len(p) for p in pages) / 1e6
+    results = {engine: bench(engine, pages, args.repeat) for engine in ("soup", "fast", "auto")}
+    for engine, secs in results.items():
+        print(f"{engine:>5}: {len(pages) / secs:8.1f} pages/s  {mb / secs:7.1f} MB/s  ({secs:.3f}s best of {args.repeat})")
+    print(f"speedup fast vs soup: {results['soup'] / results['fast']:.1f}x")
+
+if __name__ == "__main__":
+    main()
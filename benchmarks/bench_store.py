@@ -0,0 +1,88 @@
+"""
+Record store benchmark: loads N synthetic records into a RecordStore and a JSON
+bundle, then times single-company lookups and an industry/country filter on each.
+
+    python benchmarks/bench_store.py --records 200000 --lookups 1000
+
+With 200k records a store lookup takes about 25 us and the filter about 35 ms;
+loading the bundle alone takes over a second.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from pipelines.store import RecordStore  # noqa
+
+INDUSTRIES = ["Software Development", "Retail", "Banking", "Hospital & Health Care", "Construction",
+              "Higher Education", "Logistics", "Marketing Services", "Telecommunications", "Biotechnology"]
+COUNTRIES = ["US", "GB", "DE", "FR", "IN", "BR", "CA", "NL", "JP", "AU"]
+SIZES = ["2-10 employees", "11-50 employees", "51-200 employees", "201-500 employees", "1,001-5,000 employees"]
+
+def synthetic_record(i: int, rng: random.Random):
+    return {
+        "name": f"Company {i}",
+        "url": f"https://www.linkedin.com/company/company-{i}/",
+        "mainAddress": {"type": "PostalAddress", "streetAddress": f"{i} Main St", "addressLocality": "Springfield",
+                        "addressCountry": rng.choice(COUNTRIES)},
+        "description": "We build things. " * 20,
+        "website": f"https://company{i}.example",
+        "industry": rng.choice(INDUSTRIES),
+        "companySize": rng.choice(SIZES),
+        "founded": rng.randint(1900, 2024),
+        "followersCount": rng.randint(0, 1_000_000),
+        "specialties": "things, more things",
+        "scrapedAt": "2024-01-01T00:00:00Z",
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--records", type=int, default=200000)
+    ap.add_argument("--lookups", type=int, default=1000)
+    ap.add_argument("--batch-size", type=int, default=200, help="Records per write transaction, as the exporter")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    records = [synthetic_record(i, rng) for i in range(args.records)]
+    with tempfile.TemporaryDirectory() as workdir:
+        bundle_path = os.path.join(workdir, "out.json")
+        with open(bundle_path, "w", encoding="utf-8") as f:
+            json.dump({"records": records, "errors": [], "stats": {}}, f, ensure_ascii=False)
+        store = RecordStore(os.path.join(workdir, "companies.db")).open()
+        start = time.perf_counter()
+        for i in range(0, len(records), args.batch_size):
+            store.write_batch(records[i:i + args.batch_size])
+        elapsed = time.perf_counter() - start
+        print(f"store write: {len(records) / elapsed:10.0f} records/s  ({elapsed:.2f}s)")
+
+        slugs = [f"company-{rng.randrange(args.records)}" for _ in range(args.lookups)]
+        start = time.perf_counter()
+        for slug in slugs:
+            store.get(slug)
+        elapsed = time.perf_counter() - start
+        print(f"store lookup: {elapsed / len(slugs) * 1e6:9.1f} us/lookup")
+        start = time.perf_counter()
+        matches = list(store.query(industry="Retail", country="DE"))
+        print(f"store filter: {(time.perf_counter() - start) * 1000:9.1f} ms for {len(matches)} matches")
+
+        start = time.perf_counter()
+        with open(bundle_path, encoding="utf-8") as f:
+            loaded = json.load(f)["records"]
+        by_url = {r["url"]: r for r in loaded}
+        bundle_matches = [r for r in loaded if r["industry"] == "Retail" and r["mainAddress"]["addressCountry"] == "DE"]
+        elapsed = time.perf_counter() - start
+        print(f"bundle load + index + filter: {elapsed * 1000:9.1f} ms for {len(by_url)} records, "
+              f"{len(bundle_matches)} matches")
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Synthetic LinkedIn-like company pages shared by the benchmarks and the stand-in server."""
+import json
+import os
+import random
+from typing import List, Optional
+
+def synthetic_company_page(i: int, body_kb: int = 150, json_ld: bool = True) -> str:
+    ld = {
+        "@context": "https://schema.org",
+        "@type": "Organization",
+        "name": f"Company {i}",
+        "url": f"https://company{i}.example",
+        "description": "We build things. " * 20,
+        "address": {
+            "@type": "PostalAddress",
+            "streetAddress": f"{i} Main St",
+            "addressLocality": "Redmond",
+            "addressRegion": "WA",
+            "postalCode": "98052",
+            "addressCountry": "US",
+        },
+    }
+    filler = []
+    size = 0
+    n = 0
+    while size < body_kb * 1024:
+        chunk = (f'<div class="feed-item" data-id="{n}"><span class="actor">Post {n}</span>'
+                 f'<p>Lorem ipsum dolor sit amet &amp; consectetur adipiscing elit {n}.</p>'
+                 f'<a href="https://www.linkedin.com/feed/update/{n}">See more</a></div>\n')
+        filler.append(chunk)
+        size += len(chunk)
+        n += 1
+    ld_tag = f'<script type="application/ld+json">{json.dumps(ld)}</script>' if json_ld else ""
+    return (
+        "<!DOCTYPE html><html><head>"
+        f'<title>Company {i} | LinkedIn</title>'
+        f'<meta property="og:title" content="Company {i} | LinkedIn" />'
+        '<meta property="og:description" content="Company overview" />'
+        f"{ld_tag}"
+        '<style>.feed-item { margin: 0 }</style>'
+        "</head><body>"
+        f"<section><h1>Company {i}</h1><div>10,001+ employees</div><div>Founded 1975</div>"
+        f"<div>{791715 + i:,} followers</div><div>Industry: Software Development</div>"
+        f'<a href="https://company{i}.example">Website</a></section>'
+        + "".join(filler)
+        + "</body></html>"
+    )
+
+def build_corpus(n: int, seed: int = 7, min_kb: int = 40, max_kb: int = 400) -> List[str]:
+    """A mix of page sizes, with about one page in five lacking JSON-LD."""
+    rng = random.Random(seed)
+    return [synthetic_company_page(i, rng.randint(min_kb, max_kb), json_ld=rng.random() > 0.2) for i in range(n)]
+
+def load_fixtures(directory: str) -> List[str]:
+    """Reads every *.html file under `directory`, e.g. pages saved from real runs."""
+    pages = []
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.endswith((".html", ".htm")):
+                with open(os.path.join(root, name), "r", encoding="utf-8", errors="ignore") as f:
+                    pages.append(f.read())
+    return pages
+
+def corpus_from_args(pages: int, seed: int, fixtures: Optional[str] = None) -> List[str]:
+    return load_fixtures(fixtures) if fixtures else build_corpus(pages, seed=seed)
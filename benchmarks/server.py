@@ -0,0 +1,190 @@
+"""
+Stand-in LinkedIn server for the benchmarks.
+
+Serves synthetic company pages for any /company/<slug> path, either directly or
+as an HTTP forward proxy (absolute-form request lines), so the scraper can be
+pointed at it through a proxy file without touching linkedin.com. Each listening
+port is one "proxy" with its own FaultProfile.
+
+    python benchmarks/server.py --ports 8765 8766 --latency lognormal:0.05:0.6 --p429 0.02
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import math
+import multiprocessing
+import random
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from corpus import build_corpus
+
+def parse_latency(spec: str):
+    """
+    Returns a zero-argument sampler (seconds) for a latency spec:
+    `const:S`, `uniform:LO:HI` or `lognormal:MEDIAN:SIGMA`.
+    """
+    kind, *args = spec.split(":")
+    vals = [float(a) for a in args]
+    if kind == "const":
+        return lambda: vals[0]
+    if kind == "uniform":
+        return lambda: random.uniform(vals[0], vals[1])
+    if kind == "lognormal":
+        mu = math.log(vals[0])
+        return lambda: random.lognormvariate(mu, vals[1])
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+def similar_pages(slug: str, graph: int, links: int) -> str:
+    """A "Similar pages" aside linking `links` companies c0..c<graph-1>, chosen by a hash of `slug`."""
+    cards = []
+    for k in range(links):
+        n = int(hashlib.md5(f"{slug}/{k}".encode()).hexdigest(), 16) % graph
+        cards.append(f'<li><a href="http://www.linkedin.com/company/c{n}?trk=similar-pages">'
+                     f"<h3>Company {n}</h3><p>Software Development</p><p>Springfield</p></a></li>")
+    return f'<section data-test-id="similar-pages"><h2>Similar pages</h2><ul>{"".join(cards)}</ul></section>'
+
+class FaultProfile:
+    """Latency distribution and injected failures for one listening port."""
+
+    def __init__(self, latency: str = "lognormal:0.05:0.5", p429: float = 0.0, p403: float = 0.0,
+                 p5xx: float = 0.0, drip: float = 0.0, drip_chunk: int = 8192, drip_delay: float = 0.01,
+                 capacity: int = 0, graph: int = 0, links: int = 6):
+        self.latency = latency
+        self.p429 = p429
+        self.p403 = p403
+        self.p5xx = p5xx
+        self.drip = drip
+        self.drip_chunk = drip_chunk
+        self.drip_delay = drip_delay
+        # like a real rate limiter: requests beyond this many in flight get a 429 right away (0 = unlimited)
+        self.capacity = capacity
+        # company graph for crawl benchmarks: each page links `links` of `graph` companies (0 = no links)
+        self.graph = graph
+        self.links = links
+
+def make_app(profile: FaultProfile, pages: List[bytes]) -> web.Application:
+    sample_latency = parse_latency(profile.latency)
+    counters = {"requests": 0, "429": 0, "403": 0, "5xx": 0, "drip": 0, "over_capacity": 0}
+    gzipped: Dict[int, bytes] = {}
+    in_flight = 0
+
+    async def handle(request: web.Request) -> web.StreamResponse:
+        nonlocal in_flight
+        counters["requests"] += 1
+        if profile.capacity and in_flight >= profile.capacity:
+            counters["over_capacity"] += 1
+            return web.Response(status=429, headers={"Retry-After": "1"}, text="Too many requests")
+        in_flight += 1
+        try:
+            return await _respond(request)
+        finally:
+            in_flight -= 1
+
+    async def _respond(request: web.Request) -> web.StreamResponse:
+        await asyncio.sleep(sample_latency())
+        slug = request.path.rstrip("/").rsplit("/", 1)[-1]
+        if slug.startswith("missing"):
+            return web.Response(status=404, text="Not found")
+        roll = random.random()
+        if roll < profile.p429:
+            counters["429"] += 1
+            return web.Response(status=429, headers={"Retry-After": "1"}, text="Too many requests")
+        roll -= profile.p429
+        if roll < profile.p403:
+            counters["403"] += 1
+            return web.Response(status=403, text="Forbidden")
+        roll -= profile.p403
+        if roll < profile.p5xx:
+            counters["5xx"] += 1
+            return web.Response(status=random.choice((500, 502, 503)), text="Server error")
+        index = int(hashlib.md5(slug.encode()).hexdigest(), 16) % len(pages)
+        body = pages[index]
+        headers = {"Content-Type": "text/html; charset=utf-8"}
+        if profile.graph:
+            body = body.replace(b"</body>", similar_pages(slug, profile.graph, profile.links).encode() + b"</body>", 1)
+            if "gzip" in request.headers.get("Accept-Encoding", ""):
+                headers["Content-Encoding"] = "gzip"
+                return web.Response(body=gzip.compress(body, 1), headers=headers)
+            return web.Response(body=body, headers=headers)
+        if random.random() >= profile.drip:
+            if "gzip" in request.headers.get("Accept-Encoding", ""):
+                # compressed once per page, so the server's own CPU does not skew the numbers
+                if index not in gzipped:
+                    gzipped[index] = gzip.compress(body, 6)
+                headers["Content-Encoding"] = "gzip"
+                return web.Response(body=gzipped[index], headers=headers)
+            return web.Response(body=body, headers=headers)
+        # slow-drip: small chunks with a pause between them
+        counters["drip"] += 1
+        resp = web.StreamResponse(headers=headers)
+        resp.content_length = len(body)
+        await resp.prepare(request)
+        for i in range(0, len(body), profile.drip_chunk):
+            await resp.write(body[i:i + profile.drip_chunk])
+            await asyncio.sleep(profile.drip_delay)
+        await resp.write_eof()
+        return resp
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response(counters)
+
+    app = web.Application()
+    app.router.add_get("/__stats", stats)
+    app.router.add_route("GET", "/{tail:.*}", handle)
+    return app
+
+async def serve(endpoints: List[Tuple[int, FaultProfile]], pages: Optional[List[bytes]] = None,
+                ready=None):
+    pages = pages or [p.encode() for p in build_corpus(32)]
+    runners = []
+    for port, profile in endpoints:
+        runner = web.AppRunner(make_app(profile, pages), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        runners.append(runner)
+    if ready is not None:
+        ready.set()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+def _serve_forever(endpoints, ready):
+    asyncio.run(serve(endpoints, ready=ready))
+
+def start_in_process(endpoints: List[Tuple[int, FaultProfile]], timeout: float = 30.0) -> multiprocessing.Process:
+    """Starts the server in a child process so it does not share the event loop (or CPU time) being measured."""
+    ready = multiprocessing.Event()
+    proc = multiprocessing.Process(target=_serve_forever, args=(endpoints, ready), daemon=True)
+    proc.start()
+    if not ready.wait(timeout):
+        proc.terminate()
+        raise RuntimeError("Stand-in server did not start")
+    return proc
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--ports", type=int, nargs="+", default=[8765])
+    ap.add_argument("--latency", default="lognormal:0.05:0.5")
+    ap.add_argument("--p429", type=float, default=0.0)
+    ap.add_argument("--p403", type=float, default=0.0)
+    ap.add_argument("--p5xx", type=float, default=0.0)
+    ap.add_argument("--drip", type=float, default=0.0, help="Fraction of responses sent as a slow drip")
+    ap.add_argument("--capacity", type=int, default=0, help="Requests in flight per port before answering 429")
+    ap.add_argument("--graph", type=int, default=0, help="Link each page to companies of a graph this size")
+    args = ap.parse_args()
+    profile = FaultProfile(args.latency, args.p429, args.p403, args.p5xx, args.drip, capacity=args.capacity,
+                           graph=args.graph)
+    print(f"Serving on {', '.join(f'http://127.0.0.1:{p}' for p in args.ports)}", file=sys.stderr)
+    try:
+        asyncio.run(serve([(p, profile) for p in args.ports]))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
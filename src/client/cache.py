@@ -0,0 +1,180 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict
+
+from utils.logging import get_logger
+from utils.validators import canonical_url
+
+log = get_logger(__name__)
+
+class CacheEntry:
+    __slots__ = ("body", "etag", "last_modified", "expires_at")
+
+    def __init__(self, body: str, etag: Optional[str], last_modified: Optional[str], expires_at: float):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class ResponseCache:
+    """
+    On-disk HTTP response cache.
+
+    Bodies are stored gzip-compressed and content-addressed (sha256) under
+    objects/, so identical pages are stored once. A SQLite index maps the
+    canonical URL to the body digest, validators (ETag/Last-Modified) and
+    expiry. When the total body size exceeds max_bytes the least recently
+    used entries are evicted. Methods are blocking; HttpClient calls them
+    from a worker thread.
+    """
+    def __init__(self, directory: str, ttl: float = 86400.0, max_bytes: int = 1 << 30):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " digest TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest)")
+        self._conn.commit()
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "objects", digest[:2], digest + ".gz")
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        key = canonical_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest, etag, last_modified, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            digest, etag, last_modified, expires_at = row
+            try:
+                with gzip.open(self._object_path(digest), "rt", encoding="utf-8") as f:
+                    body = f.read()
+            except (OSError, EOFError):
+                # object vanished or is corrupt: drop the entry and treat as a miss
+                self._delete(key, digest)
+                self._conn.commit()
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        entry = CacheEntry(body, etag, last_modified, expires_at)
+        if entry.fresh:
+            self.hits += 1
+        return entry
+
+    def put(self, url: str, body: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        key = canonical_url(url)
+        data = body.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(gzip.compress(data, compresslevel=6))
+                os.replace(tmp, path)
+            old = self._conn.execute("SELECT digest, size FROM entries WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            with self._conn:
+                if old:
+                    self._total -= old[1]
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, digest, size, etag, last_modified, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, digest, len(data), etag, last_modified, now + self.ttl, now),
+                )
+                self._total += len(data)
+                if old and old[0] != digest:
+                    self._drop_object_if_unused(old[0])
+                if self._total > self.max_bytes:
+                    self._evict()
+
+    def refresh(self, url: str):
+        """Marks a stale entry fresh again after a 304 Not Modified."""
+        self.revalidated += 1
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE entries SET expires_at = ? WHERE key = ?",
+                               (time.time() + self.ttl, canonical_url(url)))
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def _evict(self):
+        # evict down to 90% of the cap so we don't evict on every put
+        target = self.max_bytes * 0.9
+        while self._total > target:
+            rows = self._conn.execute("SELECT key, digest FROM entries ORDER BY accessed_at LIMIT 256").fetchall()
+            if not rows:
+                break
+            for key, digest in rows:
+                if self._total <= target:
+                    break
+                self._delete(key, digest)
+                self.evictions += 1
+
+    def _delete(self, key: str, digest: str):
+        row = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        if row:
+            self._total -= row[0]
+        self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self._drop_object_if_unused(digest)
+
+    def _drop_object_if_unused(self, digest: str):
+        if self._conn.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone() is None:
+            try:
+                os.remove(self._object_path(digest))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions,
+            "bytes": self._total,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,155 @@
+import asyncio
+import collections
+import time
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from utils.logging import get_logger
+from utils.metrics import REGISTRY
+
+log = get_logger(__name__)
+
+CONCURRENCY_WINDOW = REGISTRY.gauge("scraper_concurrency_window", "Requests allowed in flight at once.")
+
+class ConcurrencyLimiter:
+    """
+    A semaphore whose size (the window) can change while it is held.
+
+    In adaptive mode the window follows AIMD: every successful response adds
+    1/window (about +1 per round trip), starting with slow start (+1 per
+    response) until the first congestion signal. 403/429/999 blocks and
+    timeouts cut it by `decrease_factor`, at most once per round trip (the
+    median latency, or `decrease_interval` until one is known) so a burst of
+    in-flight failures counts as one signal. Latency is the median of
+    the last `sample_size` successful responses; the window stops growing while
+    it is more than `latency_tolerance` times the best of the recent medians,
+    and shrinks past twice that, so a saturated proxy or CPU holds the window
+    instead of queueing more work behind it.
+    """
+    decrease_interval = 1.0
+    log_interval = 10.0
+    sample_size = 32
+
+    def __init__(self, limit: int, adaptive: bool = False, min_limit: int = 1, max_limit: Optional[int] = None,
+                 decrease_factor: float = 0.7, latency_tolerance: float = 2.0):
+        self.adaptive = adaptive
+        self.max_limit = max(1, max_limit if max_limit is not None else limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.window = float(min(max(limit, self.min_limit), self.max_limit))
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.in_use = 0
+        self.decreases = 0
+        self.slow_start = adaptive
+        self.history: List[Tuple[float, int]] = []
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+        self._latency: Optional[float] = None
+        self._samples: List[float] = []
+        # medians of the last few sample windows; the best one is the uncongested baseline
+        self._medians: Deque[float] = collections.deque(maxlen=16)
+        self._baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self._last_log = 0.0
+        self._logged_limit = self.limit
+        self._started = time.monotonic()
+        self.history.append((0.0, self.limit))
+        CONCURRENCY_WINDOW.set_function(lambda: self.limit)
+
+    @property
+    def limit(self) -> int:
+        return int(self.window)
+
+    async def acquire(self):
+        if self.in_use < self.limit and not self._waiters:
+            self.in_use += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # woken with a slot just as we were cancelled: pass it on
+                self.release()
+            elif fut in self._waiters:
+                # otherwise _wake already dropped the cancelled future
+                self._waiters.remove(fut)
+            raise
+
+    def release(self):
+        self.in_use -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_use < self.limit:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self.in_use += 1
+                fut.set_result(None)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+    def feedback(self, latency: Optional[float], congested: bool):
+        """One finished request: its latency, and whether it was blocked or timed out."""
+        if not self.adaptive:
+            return
+        now = time.monotonic()
+        if congested:
+            # blocks come back fast, so their latency would only drag the baseline down
+            self._decrease(now, "blocks/timeouts")
+        else:
+            if latency is not None:
+                self._sample(latency)
+            ratio = self._latency / max(self._baseline, 1e-3) if self._baseline else 1.0
+            if ratio > 2 * self.latency_tolerance:
+                self._decrease(now, f"latency {self._latency * 1000:.0f}ms vs {self._baseline * 1000:.0f}ms")
+            elif ratio <= self.latency_tolerance:
+                self._increase()
+            else:
+                self.slow_start = False
+        if self.limit != self._logged_limit and now - self._last_log >= self.log_interval:
+            self._log(now, "")
+
+    def _sample(self, latency: float):
+        self._samples.append(latency)
+        if len(self._samples) < self.sample_size:
+            return
+        self._samples.sort()
+        self._latency = self._samples[len(self._samples) // 2]
+        self._samples.clear()
+        self._medians.append(self._latency)
+        self._baseline = min(self._medians)
+
+    def _increase(self):
+        step = 1.0 if self.slow_start else 1.0 / max(self.window, 1.0)
+        before = self.limit
+        self.window = min(float(self.max_limit), self.window + step)
+        if self.limit != before:
+            self._wake()
+
+    def _decrease(self, now: float, reason: str):
+        # one cut per round trip: responses already in flight carry the same signal
+        if now - self._last_decrease < (self._latency or self.decrease_interval):
+            return
+        self._last_decrease = now
+        self.slow_start = False
+        self.decreases += 1
+        self.window = max(float(self.min_limit), self.window * self.decrease_factor)
+        self._log(now, reason)
+
+    def _log(self, now: float, reason: str):
+        self._last_log = now
+        self._logged_limit = self.limit
+        self.history.append((now - self._started, self.limit))
+        log.info("Concurrency window: %d (in flight %d, latency %s)%s", self.limit, self.in_use,
+                 f"{self._latency * 1000:.0f}ms" if self._latency is not None else "-",
+                 f", cut after {reason}" if reason else "")
+
+    def report(self) -> Dict[str, Any]:
+        limits = [limit for _, limit in self.history] + [self.limit]
+        return {"window": self.limit, "min_seen": min(limits), "max_seen": max(limits), "decreases": self.decreases,
+                "bounds": [self.min_limit, self.max_limit]}
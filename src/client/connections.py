@@ -0,0 +1,133 @@
+import time
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from utils.metrics import REGISTRY
+
+try:
+    import brotli  # noqa: F401  (aiohttp decodes "br" bodies when it is installed)
+except ImportError:  # optional dependency
+    try:
+        import brotlicffi as brotli  # noqa: F401
+    except ImportError:
+        brotli = None
+
+CONNECTIONS = REGISTRY.counter("scraper_connections_total", "Requests by connection source (new/reused) and pool.")
+CONNECT_SECONDS = REGISTRY.histogram("scraper_connect_seconds",
+                                     "Time to open a new connection (DNS, TCP, proxy and TLS handshakes).")
+POOL_WAIT_SECONDS = REGISTRY.histogram("scraper_pool_wait_seconds",
+                                       "Time spent waiting for a free connection when the pool is at its limit.")
+DNS_LOOKUPS = REGISTRY.counter("scraper_dns_lookups_total", "Host resolutions by DNS cache result (hit/miss).")
+
+def accept_encoding() -> str:
+    """The encodings aiohttp can decode here; brotli needs the optional 'brotli' package."""
+    return "gzip, deflate, br" if brotli is not None else "gzip, deflate"
+
+class ConnectionSettings:
+    """
+    Connector settings shared by the direct session and every per-proxy session.
+    `limit` and `limit_per_host` default to the client's max_concurrency; 0 means unlimited.
+    """
+    def __init__(self, limit: Optional[int] = None, limit_per_host: Optional[int] = None,
+                 dns_ttl: float = 300.0, keepalive_timeout: float = 30.0, force_close: bool = False,
+                 compression: bool = True):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.force_close = force_close
+        self.compression = compression
+
+    def connector(self, max_concurrency: int) -> aiohttp.TCPConnector:
+        options: Dict[str, Any] = {
+            "limit": max_concurrency if self.limit is None else self.limit,
+            "limit_per_host": max_concurrency if self.limit_per_host is None else self.limit_per_host,
+            "use_dns_cache": self.dns_ttl > 0,
+            "ttl_dns_cache": self.dns_ttl if self.dns_ttl > 0 else None,
+            "force_close": self.force_close,
+        }
+        if not self.force_close:
+            options["keepalive_timeout"] = self.keepalive_timeout
+        return aiohttp.TCPConnector(**options)
+
+    def headers(self) -> Dict[str, str]:
+        return {"Accept-Encoding": accept_encoding() if self.compression else "identity"}
+
+class PoolStats:
+    """
+    Connection reuse per pool ("direct" or a proxy URL), collected through
+    aiohttp's TraceConfig hooks and mirrored into the shared metrics registry.
+    """
+    def __init__(self):
+        self._pools: Dict[str, Dict[str, float]] = {}
+
+    def _pool(self, name: str) -> Dict[str, float]:
+        pool = self._pools.get(name)
+        if pool is None:
+            pool = self._pools[name] = {"new": 0, "reused": 0, "connect_s": 0.0, "waited": 0, "wait_s": 0.0,
+                                        "dns_hits": 0, "dns_misses": 0}
+        return pool
+
+    def trace_config(self, name: str) -> aiohttp.TraceConfig:
+        pool = self._pool(name)
+        trace = aiohttp.TraceConfig()
+
+        async def queued_start(session, ctx, params):
+            ctx.queued_at = time.monotonic()
+
+        async def queued_end(session, ctx, params):
+            waited = time.monotonic() - ctx.queued_at
+            pool["waited"] += 1
+            pool["wait_s"] += waited
+            POOL_WAIT_SECONDS.observe(waited, pool=name)
+
+        async def create_start(session, ctx, params):
+            ctx.connect_at = time.monotonic()
+
+        async def create_end(session, ctx, params):
+            elapsed = time.monotonic() - ctx.connect_at
+            pool["new"] += 1
+            pool["connect_s"] += elapsed
+            CONNECTIONS.inc(pool=name, source="new")
+            CONNECT_SECONDS.observe(elapsed, pool=name)
+
+        async def reused(session, ctx, params):
+            pool["reused"] += 1
+            CONNECTIONS.inc(pool=name, source="reused")
+
+        async def dns_hit(session, ctx, params):
+            pool["dns_hits"] += 1
+            DNS_LOOKUPS.inc(result="hit")
+
+        async def dns_miss(session, ctx, params):
+            pool["dns_misses"] += 1
+            DNS_LOOKUPS.inc(result="miss")
+
+        trace.on_connection_queued_start.append(queued_start)
+        trace.on_connection_queued_end.append(queued_end)
+        trace.on_connection_create_start.append(create_start)
+        trace.on_connection_create_end.append(create_end)
+        trace.on_connection_reuseconn.append(reused)
+        trace.on_dns_cache_hit.append(dns_hit)
+        trace.on_dns_cache_miss.append(dns_miss)
+        return trace
+
+    def report(self):
+        rows = []
+        for name, p in self._pools.items():
+            total = p["new"] + p["reused"]
+            if not total:
+                continue
+            rows.append({
+                "pool": name,
+                "connections": int(p["new"]),
+                "reused": int(p["reused"]),
+                "reuse_rate": round(p["reused"] / total, 3),
+                "avg_connect_ms": round(1000 * p["connect_s"] / p["new"], 1) if p["new"] else None,
+                "pool_waits": int(p["waited"]),
+                "avg_wait_ms": round(1000 * p["wait_s"] / p["waited"], 1) if p["waited"] else None,
+                "dns_cache_hits": int(p["dns_hits"]),
+                "dns_cache_misses": int(p["dns_misses"]),
+            })
+        return rows
@@ -1,41 +1,123 @@
 import asyncio
-import random
-from typing import Optional, Dict
+import codecs
+import time
+from typing import Optional, Dict, List, Any, Sequence, Tuple
 
 import aiohttp
+from yarl import URL
 
-from .throttler import AdaptiveThrottler
+from .cache import ResponseCache
+from .concurrency import ConcurrencyLimiter
+from .connections import ConnectionSettings, PoolStats
+from .proxy_pool import ProxyPool, ProxyState, BLOCKED, ERROR, TIMEOUT
+from .retry import (
+    BLOCK_STATUSES, FetchTask, PermanentFetchError, RetryPolicy, TransientFetchError,
+    classify_status, parse_retry_after,
+)
+from .throttler import RateLimiter
+from extractors.streaming import StreamingExtractor, complete_prefix
 from utils.logging import get_logger
+from utils.metrics import (
+    BYTES_DOWNLOADED, FETCH_ERRORS, FETCH_RESPONSES, PROXY_REQUESTS, RETRIES, STAGE_SECONDS, TRUNCATED_BODIES,
+)
 
 log = get_logger(__name__)
 
+_BLOCKED_PATHS = ("/authwall", "/login", "/checkpoint/")
+
+def _is_blocked_redirect(final_url: str) -> bool:
+    return any(p in final_url for p in _BLOCKED_PATHS)
+
 class HttpClient:
     def __init__(self,
                  max_concurrency: int = 8,
                  timeout: int = 30,
                  proxy_file: Optional[str] = None,
-                 user_agent: Optional[str] = None):
-        self._semaphore = asyncio.Semaphore(max_concurrency)
+                 user_agent: Optional[str] = None,
+                 cache: Optional[ResponseCache] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 stream_fields: Optional[Sequence[str]] = None,
+                 byte_cap: Optional[int] = None,
+                 max_body_bytes: Optional[int] = 10 * 1024 * 1024,
+                 chunk_size: int = 16384,
+                 connections: Optional[ConnectionSettings] = None,
+                 archive: Optional[Any] = None,
+                 concurrency: Optional[ConcurrencyLimiter] = None):
+        # requests in flight; an adaptive limiter resizes its window between its bounds
+        self.concurrency = concurrency or ConcurrencyLimiter(max_concurrency)
+        self._max_concurrency = self.concurrency.max_limit
         self._timeout = aiohttp.ClientTimeout(total=timeout)
         self._session: Optional[aiohttp.ClientSession] = None
         self._proxies = self._load_proxies(proxy_file) if proxy_file else []
+        self.proxy_pool = ProxyPool(self._proxies)
+        # one session (and so one connection pool) per proxy
+        self._proxy_sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._headers: Dict[str, str] = {}
         self._user_agent = user_agent or "Mozilla/5.0"
-        self._throttler = AdaptiveThrottler(max_rate=max_concurrency * 4)
+        # token bucket per (host, proxy); the default keeps the old max_concurrency * 4 req/s ceiling
+        self.rate_limiter = rate_limiter or RateLimiter(rate=self._max_concurrency * 4, burst=self._max_concurrency)
+        self.cache = cache
+        self.retry_policy = retry_policy or RetryPolicy()
+        # streaming mode: stop reading once these fields were seen, or after byte_cap bytes
+        self.stream_fields = tuple(stream_fields) if stream_fields else None
+        if self.stream_fields:
+            StreamingExtractor(self.stream_fields)  # fail fast on unknown field names
+        self.byte_cap = byte_cap
+        self.max_body_bytes = max_body_bytes
+        self.chunk_size = chunk_size
+        self.connections = connections or ConnectionSettings()
+        self.pool_stats = PoolStats()
+        # ArchiveWriter (pipelines.archive) receiving every page returned, for offline replay
+        self.archive = archive
 
     async def __aenter__(self):
         headers = {
             "User-Agent": self._user_agent,
             "Accept-Language": "en-US,en;q=0.9",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "Cache-Control": "no-cache",
-            "Pragma": "no-cache",
+            **self.connections.headers(),
         }
-        self._session = aiohttp.ClientSession(timeout=self._timeout, headers=headers)
+        if self.cache is None:
+            # without a local cache, always ask intermediaries for a fresh copy
+            headers["Cache-Control"] = "no-cache"
+            headers["Pragma"] = "no-cache"
+        self._headers = headers
+        self._session = self._new_session("direct")
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
         if self._session:
             await self._session.close()
+        for session in self._proxy_sessions.values():
+            await session.close()
+        self._proxy_sessions.clear()
+
+    def _session_for(self, proxy: Optional[ProxyState]) -> aiohttp.ClientSession:
+        if proxy is None:
+            return self._session
+        session = self._proxy_sessions.get(proxy.url)
+        if session is None:
+            session = self._new_session(proxy.url)
+            self._proxy_sessions[proxy.url] = session
+        return session
+
+    def _new_session(self, pool: str) -> aiohttp.ClientSession:
+        # every session owns its connector, so each proxy keeps its own pool of keep-alive connections
+        return aiohttp.ClientSession(timeout=self._timeout, headers=self._headers,
+                                     connector=self.connections.connector(self._max_concurrency),
+                                     trace_configs=[self.pool_stats.trace_config(pool)])
+
+    @property
+    def max_concurrency(self) -> int:
+        """Upper bound of requests in flight (the adaptive window's maximum)."""
+        return self._max_concurrency
+
+    def proxy_report(self) -> List[Dict[str, Any]]:
+        return self.proxy_pool.report()
+
+    def pool_report(self) -> List[Dict[str, Any]]:
+        return self.pool_stats.report()
 
     @staticmethod
     def _load_proxies(path: str):
@@ -50,38 +132,161 @@ class HttpClient:
             log.warning("Proxy file not found: %s", path)
         return proxies
 
-    def _pick_proxy(self) -> Optional[str]:
-        if not self._proxies:
-            return None
-        return random.choice(self._proxies)
-
     async def get_text(self, url: str) -> str:
+        """Fetches a page, retrying transient failures. Backoff sleeps happen outside the slot semaphore."""
+        task = FetchTask(url)
+        while True:
+            try:
+                return await self.fetch_once(url, tried=task.tried)
+            except TransientFetchError as e:
+                if not self.retry_policy.should_retry(e, task.attempt):
+                    raise
+                delay = self.retry_policy.delay(task.attempt, e.retry_after)
+                log.warning("%s (attempt %d). Retrying in %.1fs.", e, task.attempt, delay)
+                RETRIES.inc()
+                task.attempt += 1
+                await asyncio.sleep(delay)
+
+    async def fetch_once(self, url: str, tried: Optional[List[ProxyState]] = None) -> str:
+        """
+        Single attempt. Raises TransientFetchError or PermanentFetchError, so callers
+        can schedule retries without holding a concurrency slot while they wait.
+        """
         assert self._session is not None, "HttpClient must be used within an async context manager"
-        proxy = self._pick_proxy()
-        retry_delays = [0.5, 1.5, 3.0, 5.0]
-        for attempt, delay in enumerate([0] + retry_delays, start=1):
-            await self._throttler.wait()  # adaptive backoff throttle
-            async with self._semaphore:
-                try:
-                    if delay:
-                        await asyncio.sleep(delay)
-                    async with self._session.get(url, proxy=proxy) as resp:
-                        text = await resp.text(errors="ignore")
-                        if resp.status >= 500:
-                            # transient server issue; increase throttle pressure
-                            self._throttler.feedback(success=False)
-                            raise aiohttp.ClientResponseError(
-                                resp.request_info, resp.history, status=resp.status, message="Server error"
-                            )
-                        elif resp.status in (403, 429):
-                            self._throttler.feedback(success=False)
-                            log.warning("Received %s for %s (attempt %d). Backing off.", resp.status, url, attempt)
-                            continue
+        cached = await asyncio.to_thread(self.cache.get, url) if self.cache else None
+        if cached is not None and cached.fresh:
+            FETCH_RESPONSES.inc(status="cached")
+            if self.archive is not None:
+                self.archive.write(url, 200, {}, cached.body)
+            return cached.body
+        # stale entry: revalidate with If-None-Match / If-Modified-Since
+        request_headers = cached.conditional_headers() if cached else None
+        tried = tried if tried is not None else []
+        # every attempt fails over to a proxy not yet tried for this URL, when one is available
+        proxy = self.proxy_pool.pick(exclude=tried)
+        if proxy is not None:
+            tried.append(proxy)
+        egress = proxy.url if proxy is not None else None
+        host = URL(url).host or ""
+        await self.rate_limiter.wait(host, egress)
+        async with self.concurrency:
+            started = time.monotonic()
+            try:
+                async with self._session_for(proxy).get(url, proxy=proxy.url if proxy else None,
+                                                        headers=request_headers) as resp:
+                    FETCH_RESPONSES.inc(status=resp.status)
+                    if resp.status == 304 and cached is not None:
+                        self._record(host, proxy, started)
+                        await asyncio.to_thread(self.cache.refresh, url)
+                        if self.archive is not None:
+                            self.archive.write(url, 200, resp.headers, cached.body)
+                        return cached.body
+                    error_cls = classify_status(resp.status)
+                    if error_cls is None and _is_blocked_redirect(str(resp.url)):
+                        # redirected to the login/auth wall: the proxy or IP is being blocked
+                        error_cls = TransientFetchError
+                        status = 999
+                    else:
+                        status = resp.status
+                    if error_cls is not None:
+                        if error_cls is PermanentFetchError:
+                            self._record(host, proxy, started)
                         else:
-                            self._throttler.feedback(success=True)
-                            return text
-                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-                    self._throttler.feedback(success=False)
-                    log.warning("Request error for %s: %s (attempt %d)", url, e, attempt)
-                    continue
-        raise RuntimeError(f"Failed to fetch after retries: {url}")
\ No newline at end of file
+                            self._record(host, proxy, started, BLOCKED if status in BLOCK_STATUSES else ERROR)
+                        FETCH_ERRORS.inc(error=error_cls.__name__)
+                        raise error_cls(url, f"HTTP {status}", status=status,
+                                        retry_after=parse_retry_after(resp.headers.get("Retry-After")))
+                    content_type = resp.headers.get("Content-Type", "text/html")
+                    if "html" not in content_type and "text/plain" not in content_type:
+                        self._record(host, proxy, started)
+                        FETCH_ERRORS.inc(error=PermanentFetchError.__name__)
+                        raise PermanentFetchError(url, f"Not an HTML page ({content_type})", status=resp.status)
+                    text, truncated = await self._read_body(resp, url)
+                    if text is None:
+                        self._record(host, proxy, started)
+                        FETCH_ERRORS.inc(error=PermanentFetchError.__name__)
+                        raise PermanentFetchError(url, f"Body larger than {self.max_body_bytes} bytes",
+                                                  status=resp.status)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._record(host, proxy, started, TIMEOUT if isinstance(e, asyncio.TimeoutError) else ERROR)
+                FETCH_ERRORS.inc(error=type(e).__name__)
+                raise TransientFetchError(url, f"Request error {type(e).__name__}: {e}") from e
+        self._record(host, proxy, started)
+        # a cut-short body is only complete for this run's stream fields, so it is not cached
+        if self.cache is not None and resp.status == 200 and not truncated:
+            if cached is not None:
+                self.cache.record_miss()
+            await asyncio.to_thread(self.cache.put, url, text,
+                                    resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+        if self.archive is not None and not truncated:
+            self.archive.write(url, resp.status, resp.headers, text)
+        return text
+
+    async def _read_body(self, resp: aiohttp.ClientResponse, url: str) -> Tuple[Optional[str], bool]:
+        """
+        Reads and decodes the body chunk by chunk. Returns (text, truncated), or
+        (None, False) when the body is larger than max_body_bytes. In streaming
+        mode the connection is closed as soon as the stream fields were seen or
+        byte_cap bytes were read, instead of downloading the rest of the page.
+        """
+        limit = self.max_body_bytes
+        if limit and resp.content_length is not None and resp.content_length > limit:
+            resp.close()
+            return None, False
+        try:
+            decoder = codecs.getincrementaldecoder(resp.charset or "utf-8")(errors="ignore")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        extractor = StreamingExtractor(self.stream_fields) if self.stream_fields else None
+        parts: List[str] = []
+        read = 0
+        reason = None
+        try:
+            async for chunk in resp.content.iter_chunked(self.chunk_size):
+                read += len(chunk)
+                if limit and read > limit:
+                    resp.close()
+                    return None, False
+                text = decoder.decode(chunk)
+                if extractor is not None:
+                    if extractor.feed(text):
+                        reason = "fields"
+                        break
+                else:
+                    parts.append(text)
+                if self.byte_cap and read >= self.byte_cap:
+                    reason = "cap"
+                    break
+        finally:
+            BYTES_DOWNLOADED.inc(read)
+        if reason is None:
+            tail = decoder.decode(b"", final=True)
+            if extractor is not None:
+                extractor.feed(tail)
+                return extractor.body(), False
+            parts.append(tail)
+            return "".join(parts), False
+        # the rest of the body is never read, so the connection cannot be reused
+        resp.close()
+        TRUNCATED_BODIES.inc(reason=reason)
+        log.debug("Stopped reading %s after %d bytes (%s)", url, read, reason)
+        if reason == "fields":
+            return extractor.body(), True
+        return complete_prefix(extractor.body() if extractor is not None else "".join(parts)), True
+
+    def _record(self, host: str, proxy: Optional[ProxyState], started: Optional[float],
+                failure: Optional[str] = None):
+        latency = time.monotonic() - started if started is not None else None
+        if latency is not None:
+            STAGE_SECONDS.observe(latency, stage="fetch")
+        PROXY_REQUESTS.inc(proxy=proxy.url if proxy is not None else "direct", outcome=failure or "ok")
+        # only blocks (403/429/999) say we are going too fast; errors and timeouts are left to the retry backoff
+        self.rate_limiter.feedback(host, proxy.url if proxy is not None else None, success=failure != BLOCKED)
+        # the concurrency window also backs off on timeouts: they are what an overloaded target looks like
+        self.concurrency.feedback(latency, failure in (BLOCKED, TIMEOUT))
+        if proxy is None:
+            return
+        if failure is None:
+            self.proxy_pool.record_success(proxy, latency or 0.0)
+        else:
+            self.proxy_pool.record_failure(proxy, failure, latency)
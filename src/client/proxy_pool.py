@@ -0,0 +1,105 @@
+import random
+import time
+from typing import Optional, List, Dict, Any, Sequence
+
+BLOCKED = "blocked"
+ERROR = "error"
+TIMEOUT = "timeout"
+
+class ProxyState:
+    """Health and traffic counters for one proxy. Scores are EWMAs so old results fade out."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.success_ewma = 1.0
+        self.latency_ewma: Optional[float] = None
+        self.consecutive_blocks = 0
+        self.strikes = 0
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.successes = 0
+        self.blocks = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    def quarantined(self, now: float) -> bool:
+        return now < self.cooldown_until
+
+    def score(self) -> float:
+        latency = self.latency_ewma if self.latency_ewma is not None else 1.0
+        # keep a small floor so a recovered proxy still gets probed
+        return max(0.01, self.success_ewma / (1.0 + latency))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "proxy": self.url,
+            "requests": self.requests,
+            "successes": self.successes,
+            "blocked": self.blocks,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "successRate": round(self.successes / self.requests, 3) if self.requests else None,
+            "latencyEwma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "score": round(self.score(), 3),
+        }
+
+class ProxyPool:
+    """
+    Health-weighted proxy selection.
+
+    Each result updates the proxy's success-rate and latency EWMAs. After
+    `block_threshold` consecutive 403/429 responses a proxy is quarantined for
+    `cooldown` seconds, doubling on every repeat up to `max_cooldown`.
+    """
+    def __init__(self, proxies: Sequence[str], alpha: float = 0.2, block_threshold: int = 3,
+                 cooldown: float = 30.0, max_cooldown: float = 600.0):
+        self.states = [ProxyState(p) for p in proxies]
+        self.alpha = alpha
+        self.block_threshold = block_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+
+    def __len__(self):
+        return len(self.states)
+
+    def pick(self, exclude: Sequence[ProxyState] = ()) -> Optional[ProxyState]:
+        if not self.states:
+            return None
+        now = time.monotonic()
+        candidates = [s for s in self.states if s not in exclude and not s.quarantined(now)]
+        if not candidates:
+            candidates = [s for s in self.states if not s.quarantined(now)] or self.states
+            if all(s.quarantined(now) for s in candidates):
+                # everything is cooling down: use the one that recovers first
+                return min(candidates, key=lambda s: s.cooldown_until)
+        return random.choices(candidates, weights=[s.score() for s in candidates])[0]
+
+    def record_success(self, state: ProxyState, latency: float):
+        a = self.alpha
+        state.requests += 1
+        state.successes += 1
+        state.consecutive_blocks = 0
+        state.strikes = max(0, state.strikes - 1)
+        state.success_ewma = (1 - a) * state.success_ewma + a
+        state.latency_ewma = latency if state.latency_ewma is None else (1 - a) * state.latency_ewma + a * latency
+
+    def record_failure(self, state: ProxyState, kind: str, latency: Optional[float] = None):
+        a = self.alpha
+        state.requests += 1
+        state.success_ewma = (1 - a) * state.success_ewma
+        if latency is not None:
+            state.latency_ewma = latency if state.latency_ewma is None else (1 - a) * state.latency_ewma + a * latency
+        if kind == BLOCKED:
+            state.blocks += 1
+            state.consecutive_blocks += 1
+            if state.consecutive_blocks >= self.block_threshold:
+                state.cooldown_until = time.monotonic() + min(self.max_cooldown, self.cooldown * (2 ** state.strikes))
+                state.strikes += 1
+                state.consecutive_blocks = 0
+        elif kind == TIMEOUT:
+            state.timeouts += 1
+        else:
+            state.errors += 1
+
+    def report(self) -> List[Dict[str, Any]]:
+        return [s.stats() for s in sorted(self.states, key=lambda s: -s.requests)]
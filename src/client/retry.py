@@ -0,0 +1,130 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional, List, Any, Tuple
+
+class FetchError(Exception):
+    def __init__(self, url: str, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(f"{message}: {url}")
+        self.url = url
+        self.status = status
+        self.retry_after = retry_after
+
+class TransientFetchError(FetchError):
+    """Worth retrying: timeouts, connection errors, 5xx, 403/429/999 blocks."""
+
+class PermanentFetchError(FetchError):
+    """Retrying cannot help: 404/410 and other client errors, or a response that is not a company page."""
+
+# LinkedIn answers blocked clients with 999 as well as the usual 403/429
+BLOCK_STATUSES = frozenset({403, 429, 999})
+TRANSIENT_STATUSES = frozenset({408, 425}) | BLOCK_STATUSES
+
+def classify_status(status: int) -> Optional[type]:
+    """Returns the error class for a response status, or None when the response is usable."""
+    if status >= 500 or status in TRANSIENT_STATUSES:
+        return TransientFetchError
+    if status >= 400:
+        return PermanentFetchError
+    return None
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class RetryPolicy:
+    """Exponential backoff with equal jitter, bounded by max_delay, honouring Retry-After."""
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, error: BaseException, attempt: int) -> bool:
+        if isinstance(error, PermanentFetchError):
+            return False
+        return attempt < self.max_attempts
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        cap = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        delay = random.uniform(cap / 2, cap)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay * 4))
+        return delay
+
+class FetchTask:
+    """One URL moving through the fetch stage; `tried` holds the proxies used by earlier attempts."""
+    __slots__ = ("url", "attempt", "tried")
+
+    def __init__(self, url: str, attempt: int = 1, tried: Optional[List[Any]] = None):
+        self.url = url
+        self.attempt = attempt
+        self.tried = tried if tried is not None else []
+
+class RetryScheduler:
+    """
+    Delayed retry queue. Items wait in a heap keyed by due time and are moved
+    back onto the work queue when due, so a backing-off URL never holds a
+    worker or a connection slot while it sleeps.
+    """
+    def __init__(self, queue: "asyncio.Queue"):
+        self._queue = queue
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.scheduled = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def schedule(self, item: Any, delay: float):
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), item))
+        self.scheduled += 1
+        self._wakeup.set()
+
+    def drain(self) -> List[Any]:
+        """Removes and returns every item still waiting, soonest first."""
+        items = [item for _, _, item in sorted(self._heap)]
+        self._heap.clear()
+        self._wakeup.set()
+        return items
+
+    async def _run(self):
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            due = self._heap[0][0] - time.monotonic()
+            if due > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=due)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            _, _, item = heapq.heappop(self._heap)
+            await self._queue.put(item)
@@ -1,28 +1,78 @@
 import asyncio
 import time
+from typing import Dict, Optional, Tuple
 
-class AdaptiveThrottler:
+class TokenBucket:
     """
-    Very lightweight adaptive throttler.
-    Success reduces delay slightly, failures increase it quickly.
+    Token bucket with FIFO-fair waiting.
+    Waiters queue on an asyncio.Lock (which is FIFO), so they are released one at a
+    time at the refill rate instead of waking together and bursting.
+    In adaptive mode, success raises the refill rate additively and failures cut it
+    multiplicatively (at most once per `decrease_interval`, so a burst of in-flight
+    failures counts as one signal), within [min_rate, max_rate].
     """
-    def __init__(self, max_rate: int = 32, min_delay: float = 0.01, max_delay: float = 2.0):
-        self.min_delay = min_delay
-        self.max_delay = max_delay
-        self.current_delay = min_delay
-        self.last_time = 0.0
+    decrease_interval = 1.0
 
-    async def wait(self):
+    def __init__(self, rate: float, burst: int = 1, adaptive: bool = False,
+                 min_rate: Optional[float] = None, max_rate: Optional[float] = None):
+        self.rate = float(rate)
+        self.burst = max(1, burst)
+        self.adaptive = adaptive
+        self.max_rate = float(max_rate if max_rate is not None else rate)
+        self.min_rate = float(min_rate if min_rate is not None else self.max_rate / 50)
+        self.tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
         now = time.monotonic()
-        elapsed = now - self.last_time
-        if elapsed < self.current_delay:
-            await asyncio.sleep(self.current_delay - elapsed)
-        self.last_time = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def wait(self):
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
 
     def feedback(self, success: bool):
+        if not self.adaptive:
+            return
         if success:
-            # decay delay
-            self.current_delay = max(self.min_delay, self.current_delay * 0.8)
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
         else:
-            # spike delay
-            self.current_delay = min(self.max_delay, self.current_delay * 1.7 + 0.05)
\ No newline at end of file
+            now = time.monotonic()
+            if now - self._last_decrease < self.decrease_interval:
+                return
+            self._last_decrease = now
+            self.rate = max(self.min_rate, self.rate * 0.7)
+            # drop any saved-up burst so the slowdown takes effect immediately
+            self.tokens = min(self.tokens, 0.0)
+
+class RateLimiter:
+    """One TokenBucket per (host, egress) pair, where egress is the proxy URL or "direct"."""
+
+    def __init__(self, rate: float = 4.0, burst: int = 4, adaptive: bool = True):
+        self.rate = rate
+        self.burst = burst
+        self.adaptive = adaptive
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+
+    def bucket(self, host: str, proxy: Optional[str] = None) -> TokenBucket:
+        key = (host, proxy or "direct")
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, adaptive=self.adaptive)
+        return bucket
+
+    async def wait(self, host: str, proxy: Optional[str] = None):
+        await self.bucket(host, proxy).wait()
+
+    def feedback(self, host: str, proxy: Optional[str], success: bool):
+        self.bucket(host, proxy).feedback(success)
+
+    def rates(self) -> Dict[str, float]:
+        return {f"{host} via {egress}": round(b.rate, 2) for (host, egress), b in self._buckets.items()}
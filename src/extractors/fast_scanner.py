@@ -0,0 +1,169 @@
+import html as _html
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_TAG = r"(?:\"[^\"]*\"|'[^']*'|[^'\">])*>"
+# One pass over the markup for the parts we care about: comments, raw-text elements
+# (script/style/template), meta tags and the head boundaries. The gaps in between are
+# document text interleaved with ordinary tags, which are stripped with a C-level split.
+_SPECIAL_RE = re.compile(
+    r"<!--.*?(?:-->|\Z)"
+    r"|<(?P<raw>script|style|template)\b(?P<raw_attrs>" + _TAG[:-1] + r")>(?P<body>.*?)(?:</(?P=raw)\s*>|\Z)"
+    r"|<meta\b(?P<attrs>" + _TAG[:-1] + r")>"
+    r"|<(?P<head>/?head)\b" + _TAG,
+    re.S | re.I,
+)
+_TAG_RE = re.compile(r"<[A-Za-z/!?]" + _TAG)
+_A_TAG_RE = re.compile(r"<a\b(" + _TAG[:-1] + r")>", re.I)
+_ATTR_RE = re.compile(r"""([^\s=/>"']+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>"']+)))?""")
+
+def parse_attrs(raw: str) -> Dict[str, str]:
+    attrs: Dict[str, str] = {}
+    for m in _ATTR_RE.finditer(raw):
+        name = m.group(1).lower()
+        if name in attrs:
+            continue
+        value = m.group(2) if m.group(2) is not None else m.group(3) if m.group(3) is not None else m.group(4)
+        attrs[name] = _html.unescape(value) if value else (value or "")
+    return attrs
+
+def _append_text(texts: List[str], gap: str):
+    pieces = _TAG_RE.split(gap)
+    if "&" in gap:
+        pieces = [_html.unescape(p) for p in pieces]
+    texts.extend([p for p in [p.strip() for p in pieces] if p])
+
+class ScannedPage:
+    """
+    Page parts collected by a single regex pass over the markup, without building a DOM.
+    Mirrors what LinkedInCompanyParser reads from a BeautifulSoup tree.
+    """
+    __slots__ = ("markup", "json_ld", "meta_property", "meta_name", "text", "head_html", "_text_spans")
+
+    def __init__(self, markup: str, json_ld: List[str], meta_property: Dict[str, Optional[str]],
+                 meta_name: Dict[str, Optional[str]], text: str, head_html: Optional[str],
+                 text_spans: List[Tuple[int, int]]):
+        self.markup = markup
+        self.json_ld = json_ld
+        self.meta_property = meta_property
+        self.meta_name = meta_name
+        self.text = text
+        self.head_html = head_html
+        self._text_spans = text_spans
+
+    def links(self) -> Iterator[str]:
+        # Only needed when no website was found elsewhere, so <a> tags are scanned lazily
+        for start, end in self._text_spans:
+            for m in _A_TAG_RE.finditer(self.markup, start, end):
+                href = parse_attrs(m.group(1)).get("href")
+                if href is not None:
+                    yield href
+
+def scan_page(markup: str) -> ScannedPage:
+    json_ld: List[str] = []
+    meta_property: Dict[str, Optional[str]] = {}
+    meta_name: Dict[str, Optional[str]] = {}
+    texts: List[str] = []
+    spans: List[Tuple[int, int]] = []
+    head_start: Optional[int] = None
+    head_end: Optional[int] = None
+    pos = 0
+    for m in _SPECIAL_RE.finditer(markup):
+        start = m.start()
+        if start > pos:
+            spans.append((pos, start))
+            _append_text(texts, markup[pos:start])
+        pos = m.end()
+        raw = m.group("raw")
+        if raw:
+            if raw.lower() == "script":
+                attrs = parse_attrs(m.group("raw_attrs"))
+                if attrs.get("type") == "application/ld+json":
+                    json_ld.append(m.group("body"))
+            continue
+        head = m.group("head")
+        if head:
+            if head.startswith("/"):
+                if head_start is not None and head_end is None:
+                    head_end = m.end()
+            elif head_start is None:
+                head_start = start
+            continue
+        meta_attrs = m.group("attrs")
+        if meta_attrs is not None:
+            attrs = parse_attrs(meta_attrs)
+            content = attrs.get("content")
+            if "property" in attrs:
+                meta_property.setdefault(attrs["property"], content)
+            if "name" in attrs:
+                meta_name.setdefault(attrs["name"], content)
+    if pos < len(markup):
+        spans.append((pos, len(markup)))
+        _append_text(texts, markup[pos:])
+    head_html = None
+    if head_start is not None:
+        head_html = markup[head_start:head_end] if head_end else markup[head_start:]
+    return ScannedPage(markup, json_ld, meta_property, meta_name, " ".join(texts), head_html, spans)
+
+# "Similar pages" / "Affiliated pages" / "Showcase pages" asides of the public page: one card (an <a>
+# around title, industry and location lines) per related page
+_RELATED_SECTION_RE = re.compile(
+    r"<section\b[^>]*?data-test-id=[\"']?(?P<kind>similar|affiliated|showcase)-pages\b[^>]*>(?P<body>.*?)</section\s*>",
+    re.S | re.I,
+)
+_CARD_RE = re.compile(r"<a\b(" + _TAG[:-1] + r")>(.*?)</a\s*>", re.S | re.I)
+_RELATED_FIELDS = {"similar": "similarPages", "affiliated": "affiliatedPages", "showcase": "affiliatedPages"}
+
+def scan_related_pages(markup: str) -> Dict[str, List[Dict[str, Optional[str]]]]:
+    """similarPages and affiliatedPages cards: name, industry, address and linkedinUrl (without tracking query)."""
+    related: Dict[str, List[Dict[str, Optional[str]]]] = {"similarPages": [], "affiliatedPages": []}
+    if "-pages" not in markup:
+        return related
+    for section in _RELATED_SECTION_RE.finditer(markup):
+        cards = related[_RELATED_FIELDS[section.group("kind").lower()]]
+        for card in _CARD_RE.finditer(section.group("body")):
+            href = parse_attrs(card.group(1)).get("href") or ""
+            href = href.split("?", 1)[0].split("#", 1)[0]
+            if href.startswith("/"):
+                href = "https://www.linkedin.com" + href
+            if "linkedin.com/" not in href:
+                continue
+            lines: List[str] = []
+            _append_text(lines, card.group(2))
+            lines += [None] * (3 - len(lines))
+            cards.append({"name": lines[0], "industry": lines[1], "address": lines[2], "linkedinUrl": href})
+    return related
+
+# Combined text heuristics. Each alternative sits in a lookahead so overlapping
+# matches (e.g. "Founded 1999 employees") are all seen in a single scan.
+_TEXT_FIELDS_RE = re.compile(
+    r"(?=(?P<count>(?P<num>[\d,\.]+)(?P<plus>\+?)(?P<ws>\s*)(?P<kw>followers|employees)))"
+    r"|(?=Founded\s+(?P<year>\d{4}))"
+    r"|(?=(?-i:Industry)\s*[:|-]\s*(?P<industry>[A-Za-z &/,\-]+))",
+    re.I,
+)
+
+def scan_text_fields(text: str) -> Dict[str, str]:
+    """
+    Returns the first match for each text heuristic: followers, companySize,
+    founded, industry and employees, using one combined pass over the text.
+    """
+    found: Dict[str, str] = {}
+    for m in _TEXT_FIELDS_RE.finditer(text):
+        if m.group("count") is not None:
+            num, plus, ws, kw = m.group("num", "plus", "ws", "kw")
+            if kw.lower() == "followers":
+                if "followers" not in found and not plus and ws:
+                    found["followers"] = num
+            else:
+                if "companySize" not in found and num[0].isdigit():
+                    found["companySize"] = m.group("count")
+                if "employees" not in found and not plus and ws:
+                    found["employees"] = num
+        elif m.group("year") is not None:
+            found.setdefault("founded", m.group("year"))
+        elif m.group("industry") is not None:
+            found.setdefault("industry", m.group("industry"))
+        if len(found) == 5:
+            break
+    return found
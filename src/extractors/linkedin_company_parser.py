@@ -1,7 +1,8 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Sequence
 from bs4 import BeautifulSoup
 import json
 import re
+from .fast_scanner import ScannedPage, scan_page, scan_related_pages, scan_text_fields
 from .schema import CompanyRecord
 from utils.time import now_iso_utc
 
@@ -11,11 +12,11 @@ def _text(el) -> Optional[str]:
     t = el.get_text(" ", strip=True)
     return t or None
 
-def _json_ld_blocks(soup: BeautifulSoup) -> List[dict]:
+def _json_ld_blocks(sources: List[Optional[str]]) -> List[dict]:
     blocks = []
-    for tag in soup.find_all("script", type="application/ld+json"):
+    for source in sources:
         try:
-            data = json.loads(tag.string or "{}")
+            data = json.loads(source or "{}")
             if isinstance(data, dict):
                 blocks.append(data)
             elif isinstance(data, list):
@@ -32,15 +33,92 @@ def _first_addr(obj: dict) -> Optional[dict]:
         return addr[0]
     return None
 
+_WEBSITE_RE = re.compile(r"^https?://(?!(?:www\.)?linkedin\.com)(www\.)?[A-Za-z0-9\.\-]+\.[A-Za-z]{2,}(/.*)?$")
+
+def first_website(links: Iterable[str]) -> Optional[str]:
+    """The first link that looks like the company's own website (the fallback for `website`)."""
+    for href in links:
+        if _WEBSITE_RE.match(href):
+            return href
+    return None
+
+class _SoupPage:
+    """Page parts read from a full BeautifulSoup tree (the fallback engine)."""
+
+    def __init__(self, html: str):
+        self.html = html
+        self.soup = BeautifulSoup(html, "html.parser")
+
+    def json_ld(self) -> List[Optional[str]]:
+        return [tag.string for tag in self.soup.find_all("script", type="application/ld+json")]
+
+    def meta(self, prop: str, name: str) -> Optional[str]:
+        tag = self.soup.find("meta", property=prop) or self.soup.find("meta", attrs={"name": name})
+        return tag.get("content") if tag else None
+
+    def text(self) -> str:
+        return self.soup.get_text(" ", strip=True)
+
+    def links(self) -> Iterable[str]:
+        return (a["href"] for a in self.soup.find_all("a", href=True))
+
+    def raw_head(self) -> str:
+        head = self.soup.find("head")
+        return str(head) if head else self.html[:2000]
+
+class _ScannedPage:
+    """Page parts from the single-pass scanner; no DOM is built."""
+
+    def __init__(self, html: str, page: Optional[ScannedPage] = None):
+        self.html = html
+        self.page = page or scan_page(html)
+
+    def json_ld(self) -> List[Optional[str]]:
+        return self.page.json_ld
+
+    def meta(self, prop: str, name: str) -> Optional[str]:
+        if prop in self.page.meta_property:
+            return self.page.meta_property[prop]
+        return self.page.meta_name.get(name)
+
+    def text(self) -> str:
+        return self.page.text
+
+    def links(self) -> Iterable[str]:
+        return self.page.links()
+
+    def raw_head(self) -> str:
+        return self.page.head_html or self.html[:2000]
+
 class LinkedInCompanyParser:
     """
     Heuristic parser for public LinkedIn company pages.
     Prefers JSON-LD, falls back to DOM text scraping with conservative selectors.
-    """
 
-    def parse(self, html: str, base_url: str, include_raw: bool = False) -> Dict[str, Any]:
-        soup = BeautifulSoup(html, "html.parser")
+    The default "auto" engine reads the page with a single-pass scanner and only
+    builds a BeautifulSoup tree when one of `required_fields` is still missing.
+    """
 
+    ENGINES = ("auto", "fast", "soup")
+
+    def __init__(self, engine: str = "auto", required_fields: Sequence[str] = ("name",)):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unsupported parser engine: {engine}")
+        self.engine = engine
+        self.required_fields = tuple(required_fields)
+
+    def parse(self, html: str, base_url: str, include_raw: bool = False,
+              scanned: Optional[ScannedPage] = None) -> Dict[str, Any]:
+        """`scanned` is scan_page(html) when the caller already has it."""
+        if self.engine == "soup":
+            return self._parse_page(_SoupPage(html), base_url, include_raw)
+        data = self._parse_page(_ScannedPage(html, scanned), base_url, include_raw)
+        if self.engine == "fast" or all(data.get(f) for f in self.required_fields):
+            return data
+        # required fields missing: fall back to the full DOM parse
+        return self._parse_page(_SoupPage(html), base_url, include_raw)
+
+    def _parse_page(self, page, base_url: str, include_raw: bool) -> Dict[str, Any]:
         data: Dict[str, Any] = {
             "name": None,
             "url": base_url,
@@ -75,7 +153,7 @@ class LinkedInCompanyParser:
         }
 
         # Prefer JSON-LD if available
-        for block in _json_ld_blocks(soup):
+        for block in _json_ld_blocks(page.json_ld()):
             # Organization or LocalBusiness patterns
             if block.get("@type") in {"Organization", "Corporation", "LocalBusiness"} or "name" in block:
                 data["name"] = data["name"] or block.get("name")
@@ -98,63 +176,55 @@ class LinkedInCompanyParser:
 
         # Fallback: meta tags / simple selectors
         if not data["name"]:
-            og_title = soup.find("meta", property="og:title") or soup.find("meta", attrs={"name": "title"})
-            if og_title and og_title.get("content"):
-                data["name"] = og_title["content"].split(" | ")[0].strip()
+            og_title = page.meta("og:title", "title")
+            if og_title:
+                data["name"] = og_title.split(" | ")[0].strip()
 
         if not data["description"]:
-            og_desc = soup.find("meta", property="og:description") or soup.find("meta", attrs={"name": "description"})
-            if og_desc and og_desc.get("content"):
-                data["description"] = og_desc["content"].strip()
+            og_desc = page.meta("og:description", "description")
+            if og_desc:
+                data["description"] = og_desc.strip()
 
-        # Heuristics for fields commonly present in LinkedIn DOM fragments (public)
-        text = soup.get_text(" ", strip=True)
+        # Heuristics for fields commonly present in LinkedIn DOM fragments (public).
+        # All text patterns are matched in one combined pass, see scan_text_fields.
+        found = scan_text_fields(page.text())
 
         # Followers (pattern like "791,715 followers")
-        m = re.search(r"([\d,\.]+)\s+followers", text, re.I)
-        if m:
+        if "followers" in found:
             try:
-                data["followersCount"] = int(m.group(1).replace(",", "").replace(".", ""))
+                data["followersCount"] = int(found["followers"].replace(",", "").replace(".", ""))
             except ValueError:
                 pass
 
         # Company size patterns e.g. "10,001+ employees"
-        m = re.search(r"(\d[\d,\.]*\+?\s*employees)", text, re.I)
-        if m and not data["companySize"]:
-            data["companySize"] = m.group(1)
+        if "companySize" in found and not data["companySize"]:
+            data["companySize"] = found["companySize"]
 
         # Founded year
-        m = re.search(r"Founded\s+(\d{4})", text, re.I)
-        if m:
-            data["founded"] = int(m.group(1))
+        if "founded" in found:
+            data["founded"] = int(found["founded"])
 
         # Industry hint
-        m = re.search(r"Industry\s*[:|-]\s*([A-Za-z &/,\-]+)", text)
-        if m and not data["industry"]:
-            data["industry"] = m.group(1).strip()
+        if "industry" in found and not data["industry"]:
+            data["industry"] = found["industry"].strip()
 
         # Website hint
         if not data["website"]:
-            for a in soup.find_all("a", href=True):
-                href = a["href"]
-                if re.match(r"^https?://(www\.)?(?!linkedin\.com)[A-Za-z0-9\.\-]+\.[A-Za-z]{2,}(/.*)?$", href):
-                    data["website"] = href
-                    break
+            data["website"] = first_website(page.links())
+
+        # Related company cards, the edges followed by --crawl
+        data.update(scan_related_pages(page.html))
 
         if include_raw:
             # store a small snippet to avoid massive payloads
-            head = soup.find("head")
-            snippet = str(head) if head else html[:2000]
-            data["rawHtml"] = snippet
+            data["rawHtml"] = page.raw_head()
 
         # Final tidy up to comply with schema types
         # numberOfEmployees from "1,234 employees" if available in text
-        if not data["numberOfEmployees"]:
-            m = re.search(r"([\d,\.]+)\s+employees", text, re.I)
-            if m:
-                try:
-                    data["numberOfEmployees"] = int(m.group(1).replace(",", "").replace(".", ""))
-                except ValueError:
-                    pass
+        if not data["numberOfEmployees"] and "employees" in found:
+            try:
+                data["numberOfEmployees"] = int(found["employees"].replace(",", "").replace(".", ""))
+            except ValueError:
+                pass
 
         return data
\ No newline at end of file
@@ -0,0 +1,90 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .fast_scanner import ScannedPage, scan_page, scan_text_fields
+from .linkedin_company_parser import _WEBSITE_RE, _json_ld_blocks
+
+# Record fields a streaming fetch can wait for, and fields waited for by default
+STREAM_FIELDS = ("name", "description", "website", "mainAddress", "followersCount",
+                 "companySize", "founded", "industry", "numberOfEmployees")
+DEFAULT_STREAM_FIELDS = ("name", "website", "followersCount", "companySize", "industry")
+
+# text heuristics behind each field (see scan_text_fields) and the word each one keys on
+_TEXT_FIELDS = {"followersCount": ("followers", "followers"), "companySize": ("companySize", "employees"),
+                "founded": ("founded", "founded"), "industry": ("industry", "industry"),
+                "numberOfEmployees": ("employees", "employees")}
+
+_PAGE_FIELDS: Dict[str, Callable[[List[dict], ScannedPage], bool]] = {
+    "name": lambda blocks, page: any(b.get("name") for b in blocks) or bool(
+        page.meta_property.get("og:title") or page.meta_name.get("title")),
+    "description": lambda blocks, page: any(b.get("description") for b in blocks) or bool(
+        page.meta_property.get("og:description") or page.meta_name.get("description")),
+    "website": lambda blocks, page: any(b.get("url") or b.get("sameAs") for b in blocks) or any(
+        _WEBSITE_RE.match(href) for href in page.links()),
+    "mainAddress": lambda blocks, page: any(b.get("address") for b in blocks),
+}
+
+def complete_prefix(markup: str) -> str:
+    """`markup` cut before its last tag, so no text node or attribute is left half-read."""
+    cut = markup.rfind("<")
+    return markup[:cut] if cut > 0 else markup
+
+class StreamingExtractor:
+    """
+    Fed the body chunk by chunk while it downloads; reports when everything the
+    parser needs for `fields` has been seen, so the rest of the page can be skipped.
+    A cheap keyword check runs on every chunk; the prefix is only scanned for real
+    once every keyword has shown up, and at most once per `check_every` characters.
+    Values come from the prefix, so a JSON-LD block after the cut point is not seen.
+    """
+    def __init__(self, fields: Iterable[str] = DEFAULT_STREAM_FIELDS, check_every: int = 32768):
+        self.fields = tuple(fields)
+        unknown = [f for f in self.fields if f not in STREAM_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown stream field(s): {', '.join(unknown)}")
+        self.check_every = check_every
+        self._parts: List[str] = []
+        self._size = 0
+        self._tail = ""
+        self._keywords = {_TEXT_FIELDS[f][1] for f in self.fields if f in _TEXT_FIELDS}
+        self._next_check = 0
+        self._body: Optional[str] = None
+        self.checks = 0
+
+    @property
+    def done(self) -> bool:
+        return self._body is not None
+
+    def feed(self, chunk: str) -> bool:
+        """Adds a decoded chunk; returns True once all fields are available."""
+        if self._body is not None:
+            return True
+        self._parts.append(chunk)
+        self._size += len(chunk)
+        if self._keywords:
+            # keywords split across chunks are caught by searching the previous chunk's tail too
+            window = (self._tail + chunk).lower()
+            self._keywords = {kw for kw in self._keywords if kw not in window}
+            self._tail = chunk[-16:]
+        if self._keywords or self._size < self._next_check:
+            return False
+        self._next_check = self._size + self.check_every
+        prefix = complete_prefix("".join(self._parts))
+        if self._missing(prefix):
+            return False
+        self._body = prefix
+        return True
+
+    def _missing(self, prefix: str) -> Tuple[str, ...]:
+        self.checks += 1
+        page = scan_page(prefix)
+        blocks = _json_ld_blocks(page.json_ld)
+        found = {}
+        if any(f in _TEXT_FIELDS for f in self.fields):
+            # a match running into the end of the prefix (e.g. an industry name) may continue past the cut
+            found = {k: v for k, v in scan_text_fields(page.text).items() if not page.text.endswith(v)}
+        return tuple(f for f in self.fields
+                     if (_TEXT_FIELDS[f][0] not in found if f in _TEXT_FIELDS else not _PAGE_FIELDS[f](blocks, page)))
+
+    def body(self) -> str:
+        """The markup to parse: the verified prefix once done, otherwise everything fed so far."""
+        return self._body if self._body is not None else "".join(self._parts)
@@ -0,0 +1,282 @@
+import glob
+import gzip
+import mmap
+import os
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from http import HTTPStatus
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from pipelines.exporter import Exporter
+from pipelines.parse_stage import parse_page
+from utils.logging import get_logger
+from utils.time import now_iso_utc
+from utils.validators import company_key
+
+try:
+    import zstandard as _zstd
+except ImportError:  # optional dependency
+    _zstd = None
+
+log = get_logger(__name__)
+
+ARCHIVE_SUFFIXES = {"gzip": ".warc.gz", "zstd": ".warc.zst"}
+# the stored body is already decoded, so these no longer describe it
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+def _warc_record(url: str, status: int, headers: Mapping[str, str], body: bytes, date: str) -> bytes:
+    try:
+        reason = HTTPStatus(status).phrase
+    except ValueError:
+        reason = ""
+    http = [f"HTTP/1.1 {status} {reason}"]
+    http += [f"{k}: {v}" for k, v in headers.items() if k.lower() not in _DROPPED_HEADERS]
+    http.append(f"Content-Length: {len(body)}")
+    block = ("\r\n".join(http) + "\r\n\r\n").encode("utf-8") + body
+    warc = (
+        "WARC/1.1\r\n"
+        "WARC-Type: response\r\n"
+        f"WARC-Target-URI: {url}\r\n"
+        f"WARC-Date: {date}\r\n"
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+        "Content-Type: application/http;msgtype=response\r\n"
+        f"Content-Length: {len(block)}\r\n\r\n"
+    )
+    return warc.encode("utf-8") + block + b"\r\n\r\n"
+
+def _parse_record(data: bytes) -> Tuple[str, int, Dict[str, str], str]:
+    warc_end = data.index(b"\r\n\r\n")
+    warc_headers = _header_dict(data[:warc_end].decode("utf-8").split("\r\n")[1:])
+    http_start = warc_end + 4
+    http_end = data.index(b"\r\n\r\n", http_start)
+    lines = data[http_start:http_end].decode("utf-8", "replace").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    headers = _header_dict(lines[1:])
+    length = int(headers.get("Content-Length", len(data) - http_end - 8))
+    body = data[http_end + 4:http_end + 4 + length].decode("utf-8", "replace")
+    return warc_headers.get("WARC-Target-URI", ""), status, headers, body
+
+def _header_dict(lines: List[str]) -> Dict[str, str]:
+    headers = {}
+    for line in lines:
+        name, _, value = line.partition(":")
+        headers[name.strip()] = value.strip()
+    return headers
+
+def _compression_for(path: str) -> str:
+    return "zstd" if path.endswith(".zst") else "gzip"
+
+class ArchiveWriter:
+    """
+    Captures full responses as WARC/1.1 response records in append-only
+    segments, `<directory>/capture-<time>-<pid>-NNNNN.warc.gz`. Every record is
+    its own gzip member (or zstd frame), so it can be read on its own from its
+    offset; each segment has an `.idx` file with one
+    `offset<TAB>length<TAB>status<TAB>date<TAB>url` line per record.
+    Compression and writes happen on a single writer thread.
+    """
+    max_pending_writes = 64
+
+    def __init__(self, directory: str, segment_bytes: int = 256 * 1024 * 1024, compression: str = "gzip"):
+        if compression not in ARCHIVE_SUFFIXES:
+            raise ValueError(f"Unsupported archive compression: {compression}")
+        if compression == "zstd" and _zstd is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.compression = compression
+        # several runs (or shards) can capture into one directory without touching each other's segments
+        self._prefix = os.path.join(directory, f"capture-{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}")
+        self._segment = 0
+        self._fh = None
+        self._fh_index = None
+        self._offset = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: List[Future] = []
+        self.records_written = 0
+        self.bytes_written = 0
+
+    def open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="archive")
+        return self
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, url: str, status: int, headers: Mapping[str, str], body: str):
+        self._pending = [f for f in self._pending if not f.done()]
+        if len(self._pending) >= self.max_pending_writes:
+            # writer thread is behind; wait instead of holding unbounded page bodies in memory
+            self._pending.pop(0).result()
+        self._pending.append(self._executor.submit(self._write, url, status, dict(headers), body, now_iso_utc()))
+
+    # --- writer thread ---
+
+    def _roll(self):
+        self._close_segment()
+        self._segment += 1
+        path = f"{self._prefix}-{self._segment:05d}{ARCHIVE_SUFFIXES[self.compression]}"
+        self._fh = open(path, "ab")
+        self._fh_index = open(path + ".idx", "a", encoding="utf-8")
+        self._offset = 0
+
+    def _write(self, url: str, status: int, headers: Dict[str, str], body: str, date: str):
+        if self._fh is None or self._offset >= self.segment_bytes:
+            self._roll()
+        record = _warc_record(url, status, headers, body.encode("utf-8"), date)
+        if self.compression == "gzip":
+            data = gzip.compress(record, compresslevel=6)
+        else:
+            data = _zstd.ZstdCompressor(level=3).compress(record)
+        self._fh.write(data)
+        # the index line goes after the record, so a crash never indexes a partial record
+        self._fh_index.write(f"{self._offset}\t{len(data)}\t{status}\t{date}\t{url}\n")
+        self._offset += len(data)
+        self.records_written += 1
+        self.bytes_written += len(data)
+
+    def _close_segment(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh_index.close()
+            self._fh = self._fh_index = None
+
+    # ---
+
+    def close(self):
+        if self._executor is None:
+            return
+        for f in self._pending:
+            f.result()
+        self._pending = []
+        self._executor.submit(self._close_segment).result()
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        log.info("Archive: %d responses (%.1f MB) in %s", self.records_written, self.bytes_written / 1e6,
+                 self.directory)
+
+class ArchiveEntry:
+    __slots__ = ("segment", "offset", "length", "status", "date", "url")
+
+    def __init__(self, segment: str, offset: int, length: int, status: int, date: str, url: str):
+        self.segment = segment
+        self.offset = offset
+        self.length = length
+        self.status = status
+        self.date = date
+        self.url = url
+
+def archive_segments(directory: str) -> List[str]:
+    paths = []
+    for suffix in ARCHIVE_SUFFIXES.values():
+        paths += glob.glob(os.path.join(glob.escape(directory), f"*{suffix}"))
+    return sorted(paths)
+
+def iter_archive_index(directory: str) -> Iterator[ArchiveEntry]:
+    """Index entries of every segment, oldest segment first."""
+    for segment in archive_segments(directory):
+        index = segment + ".idx"
+        if not os.path.exists(index):
+            log.warning("Archive segment without index, skipped: %s", segment)
+            continue
+        with open(index, "r", encoding="utf-8") as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t", 4)
+                if len(fields) != 5:
+                    continue  # torn last line after a crash
+                offset, length, status, date, url = fields
+                yield ArchiveEntry(segment, int(offset), int(length), int(status), date, url)
+
+def read_record(mapped, offset: int, length: int, compression: str) -> Tuple[str, int, Dict[str, str], str]:
+    """(url, status, headers, body) of the record at `offset` in a segment (bytes or an mmap)."""
+    data = mapped[offset:offset + length]
+    if compression == "gzip":
+        data = gzip.decompress(data)
+    else:
+        if _zstd is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        data = _zstd.ZstdDecompressor().decompress(data)
+    return _parse_record(data)
+
+# one mmap per segment and worker process, kept open across batches
+_maps: Dict[str, mmap.mmap] = {}
+
+def _segment_map(path: str) -> mmap.mmap:
+    mapped = _maps.get(path)
+    if mapped is None:
+        with open(path, "rb") as f:
+            mapped = _maps[path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mapped
+
+def _replay_batch(segment: str, items: List[Tuple[int, int, str]], include_raw: bool,
+                  engine: str) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str]]]:
+    """Runs in pool workers: parse + normalize a batch of (offset, length, capture date) records from one segment."""
+    mapped = _segment_map(segment)
+    compression = _compression_for(segment)
+    records = []
+    errors = []
+    for offset, length, date in items:
+        url = f"{segment}@{offset}"
+        try:
+            url, _, _, body = read_record(mapped, offset, length, compression)
+            # scraped when captured, so an old archive never looks newer than a live scrape
+            records.append(parse_page(body, url, include_raw, engine, scraped_at=date))
+        except Exception as e:
+            errors.append((url, f"Replay failed: {type(e).__name__}: {e}"))
+    return records, errors
+
+def replay(directory: str, exporter: Exporter, workers: Optional[int] = None, include_raw: bool = False,
+           engine: str = "auto", latest_only: bool = True, batch_size: int = 200) -> Dict[str, int]:
+    """
+    Re-parses archived pages into `exporter` on a process pool, without any
+    network. By default only the latest capture of each company is replayed.
+    """
+    entries: Dict[Any, ArchiveEntry] = {}
+    total = 0
+    for i, entry in enumerate(iter_archive_index(directory)):
+        total += 1
+        if entry.status != 200:
+            continue
+        entries[company_key(entry.url) if latest_only else i] = entry
+    by_segment: Dict[str, List[Tuple[int, int, str]]] = {}
+    for entry in entries.values():
+        by_segment.setdefault(entry.segment, []).append((entry.offset, entry.length, entry.date))
+    batches = []
+    for segment, items in by_segment.items():
+        # in file order, so every worker reads its slice of the segment sequentially
+        items.sort()
+        batches += [(segment, items[i:i + batch_size]) for i in range(0, len(items), batch_size)]
+    workers = workers or os.cpu_count() or 1
+    log.info("Replay: %d of %d archived responses in %d batches on %d workers", len(entries), total,
+             len(batches), workers)
+    stats = {"archived": total, "replayed": 0, "failed": 0}
+    started = time.monotonic()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        queue = iter(batches)
+        while True:
+            # a bounded window of batches in flight keeps parsed records from piling up in memory
+            for segment, items in queue:
+                pending.add(pool.submit(_replay_batch, segment, items, include_raw, engine))
+                if len(pending) >= workers * 2:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                records, errors = future.result()
+                for record in records:
+                    exporter.write(record)
+                for url, error in errors:
+                    exporter.write_error(url, error)
+                stats["replayed"] += len(records)
+                stats["failed"] += len(errors)
+    elapsed = time.monotonic() - started
+    log.info("Replay: %d records (%d failed) in %.1fs = %.0f pages/s", stats["replayed"], stats["failed"],
+             elapsed, stats["replayed"] / max(elapsed, 1e-6))
+    return stats
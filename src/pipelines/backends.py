@@ -0,0 +1,212 @@
+import csv
+import json
+import os
+import typing
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from extractors.schema import CompanyRecord
+from pipelines.exporter import COMPRESSION_SUFFIXES, open_text
+from utils.logging import get_logger
+
+try:
+    import pyarrow as _pa
+    import pyarrow.parquet as _pq
+    import pyarrow.ipc as _ipc
+except ImportError:  # optional dependency
+    _pa = None
+
+log = get_logger(__name__)
+
+# --format names and the output extensions that select them
+FORMAT_EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+_EXTENSION_FORMATS = {".csv": "csv", ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+
+def _is_typed_dict(tp) -> bool:
+    return isinstance(tp, type) and issubclass(tp, dict) and hasattr(tp, "__annotations__")
+
+def _unwrap_optional(tp):
+    args = typing.get_args(tp)
+    if typing.get_origin(tp) is typing.Union and type(None) in args:
+        return next(a for a in args if a is not type(None))
+    return tp
+
+def _record_fields(record_type=CompanyRecord) -> Dict[str, Any]:
+    return {name: _unwrap_optional(tp) for name, tp in typing.get_type_hints(record_type).items()}
+
+def csv_columns(record_type=CompanyRecord) -> List[str]:
+    """Top-level fields in schema order, nested objects expanded to `parent.child` columns."""
+    columns = []
+    for name, tp in _record_fields(record_type).items():
+        if _is_typed_dict(tp):
+            columns += [f"{name}.{sub}" for sub in _record_fields(tp)]
+        else:
+            columns.append(name)
+    return columns
+
+def csv_struct_fields(record_type=CompanyRecord) -> FrozenSet[str]:
+    """Top-level fields that csv_columns() expands into `parent.child` columns."""
+    return frozenset(name for name, tp in _record_fields(record_type).items() if _is_typed_dict(tp))
+
+_STRUCT_FIELDS = csv_struct_fields()
+
+def flatten_record(record: Dict[str, Any], struct_fields: FrozenSet[str] = _STRUCT_FIELDS) -> Dict[str, Any]:
+    """
+    One CSV row: the schema's nested objects become dotted columns; lists and
+    any other dict (e.g. a JSON-LD logo ImageObject) are JSON-encoded.
+    """
+    row: Dict[str, Any] = {}
+    for key, value in record.items():
+        if key in struct_fields and isinstance(value, dict):
+            for sub, v in value.items():
+                row[f"{key}.{sub}"] = json.dumps(v, ensure_ascii=False) if isinstance(v, (list, dict)) else v
+        elif isinstance(value, (list, dict)):
+            row[key] = json.dumps(value, ensure_ascii=False)
+        else:
+            row[key] = value
+    return row
+
+class CsvBackend:
+    """Flattened CSV with a fixed header derived from CompanyRecord; unknown keys are dropped."""
+    format = "csv"
+
+    def __init__(self, path: str, compression: Optional[str] = None, append: bool = False):
+        suffix = COMPRESSION_SUFFIXES[compression]
+        self.path = path + suffix if suffix and not path.endswith(suffix) else path
+        self.compression = compression
+        self.append = append
+        self.columns = csv_columns()
+        self._fh = None
+        self._writer: Optional[csv.DictWriter] = None
+
+    def open(self):
+        resumed = self.append and os.path.exists(self.path)
+        self._fh = open_text(self.path, "a" if resumed else "w", self.compression)
+        self._writer = csv.DictWriter(self._fh, fieldnames=self.columns, extrasaction="ignore")
+        if not resumed:
+            self._writer.writeheader()
+
+    def write_batch(self, records: List[Dict[str, Any]]):
+        self._writer.writerows(flatten_record(r) for r in records)
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+def arrow_schema(record_type=CompanyRecord):
+    """Arrow schema mirroring CompanyRecord: nested TypedDicts become structs, lists become list columns."""
+    if _pa is None:
+        raise RuntimeError("Parquet/Arrow output requires the 'pyarrow' package")
+
+    def arrow_type(tp):
+        tp = _unwrap_optional(tp)
+        if _is_typed_dict(tp):
+            return _pa.struct([(name, arrow_type(sub)) for name, sub in _record_fields(tp).items()])
+        if typing.get_origin(tp) in (list, List):
+            return _pa.list_(arrow_type(typing.get_args(tp)[0]))
+        if tp is int:
+            return _pa.int64()
+        if tp is float:
+            return _pa.float64()
+        return _pa.string()
+
+    return _pa.schema([(name, arrow_type(tp)) for name, tp in _record_fields(record_type).items()])
+
+def _coerce(value: Any, arrow_type):
+    """Fits scraped values to the column type; anything that does not fit becomes null."""
+    if value is None:
+        return None
+    if _pa.types.is_struct(arrow_type):
+        if not isinstance(value, dict):
+            return None
+        return {f.name: _coerce(value.get(f.name), f.type) for f in arrow_type}
+    if _pa.types.is_list(arrow_type):
+        if not isinstance(value, list):
+            return None
+        return [_coerce(v, arrow_type.value_type) for v in value]
+    if _pa.types.is_integer(arrow_type):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    if _pa.types.is_floating(arrow_type):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+
+class ArrowBackend:
+    """
+    Buffers records into row groups of `row_group_size` and writes them as
+    Parquet (default) or an Arrow IPC file. Neither format can be appended to,
+    so append mode (--resume) writes the next numbered part instead.
+    """
+    def __init__(self, path: str, format: str = "parquet", row_group_size: int = 10000,
+                 compression: Optional[str] = None, append: bool = False):
+        if _pa is None:
+            raise RuntimeError("Parquet/Arrow output requires the 'pyarrow' package")
+        self.format = format
+        self.row_group_size = max(1, row_group_size)
+        # parquet compresses internally; gzip/zstd select its codec
+        self.codec = {"gzip": "gzip", "zstd": "zstd"}.get(compression, "snappy")
+        self.path = self._next_part(path) if append else path
+        self.schema = arrow_schema()
+        self._rows: List[Dict[str, Any]] = []
+        self._writer = None
+
+    @staticmethod
+    def _next_part(path: str) -> str:
+        if not os.path.exists(path):
+            return path
+        base, ext = os.path.splitext(path)
+        n = 1
+        while os.path.exists(f"{base}.{n:05d}{ext}"):
+            n += 1
+        return f"{base}.{n:05d}{ext}"
+
+    def open(self):
+        if self.format == "parquet":
+            self._writer = _pq.ParquetWriter(self.path, self.schema, compression=self.codec)
+        else:
+            self._writer = _ipc.new_file(self.path, self.schema)
+
+    def write_batch(self, records: List[Dict[str, Any]]):
+        fields = list(self.schema)
+        self._rows.extend({f.name: _coerce(r.get(f.name), f.type) for f in fields} for r in records)
+        while len(self._rows) >= self.row_group_size:
+            self._flush_rows(self._rows[:self.row_group_size])
+            self._rows = self._rows[self.row_group_size:]
+
+    def _flush_rows(self, rows: List[Dict[str, Any]]):
+        table = _pa.Table.from_pylist(rows, schema=self.schema)
+        if self.format == "parquet":
+            self._writer.write_table(table, row_group_size=len(rows))
+        else:
+            self._writer.write_table(table, max_chunksize=len(rows))
+
+    def close(self):
+        if self._writer is None:
+            return
+        if self._rows:
+            self._flush_rows(self._rows)
+            self._rows = []
+        self._writer.close()
+        self._writer = None
+
+def format_for_path(path: str) -> Optional[str]:
+    base = path
+    for suffix in (".gz", ".zst"):
+        if base.endswith(suffix):
+            base = base[:-len(suffix)]
+    return _EXTENSION_FORMATS.get(os.path.splitext(base)[1].lower())
+
+def create_backend(format: str, base_path: str, compression: Optional[str] = None,
+                   row_group_size: int = 10000, append: bool = False):
+    """A backend writing `<base_path><ext>` for one --format name."""
+    if format not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Unsupported output format: {format}")
+    path = base_path + FORMAT_EXTENSIONS[format]
+    if format == "csv":
+        return CsvBackend(path, compression=compression, append=append)
+    return ArrowBackend(path, format=format, row_group_size=row_group_size, compression=compression, append=append)
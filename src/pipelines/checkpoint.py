@@ -0,0 +1,118 @@
+import os
+import sqlite3
+import time
+from typing import Iterator, Optional, List, Tuple
+from utils.commits import CommitAfter, DeferredCommits
+from utils.logging import get_logger
+from utils.time import now_iso_utc
+
+log = get_logger(__name__)
+
+DONE = "done"
+FAILED = "failed"
+
+def default_checkpoint_path(output_path: str) -> str:
+    return f"{os.path.splitext(output_path)[0]}.checkpoint.db"
+
+class CheckpointStore:
+    """
+    Durable per-URL job state in SQLite (WAL mode).
+
+    Status updates are buffered and written in one transaction per batch, so
+    checkpointing stays cheap at high concurrency. Batches are committed
+    through `commit_after` (see DeferredCommits); the runner passes
+    Exporter.after_writes, so a URL is only ever recorded as done once its
+    record is written out. A crash loses at most the uncommitted batches,
+    which are simply re-fetched on --resume. `attempts` adds up the fetch
+    attempts of every run.
+    """
+    def __init__(self, path: str, reset: bool = False, batch_size: int = 500, flush_interval: float = 2.0,
+                 commit_after: Optional[CommitAfter] = None):
+        self.path = path
+        self._commits = DeferredCommits(commit_after)
+        self.reset = reset
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pending: List[Tuple[str, str, int, Optional[str], str]] = []
+        self._last_flush = time.monotonic()
+
+    def open(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS urls ("
+            " url TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " last_error TEXT,"
+            " updated_at TEXT NOT NULL)"
+        )
+        if self.reset:
+            self._conn.execute("DELETE FROM urls")
+        self._conn.commit()
+        return self
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def status(self, url: str) -> Optional[str]:
+        with self._commits.lock:
+            row = self._conn.execute("SELECT status FROM urls WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def is_done(self, url: str) -> bool:
+        return self.status(url) == DONE
+
+    def counts(self) -> dict:
+        self.flush()
+        self._commits.wait()
+        with self._commits.lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM urls GROUP BY status").fetchall())
+
+    def failures(self) -> Iterator[Tuple[str, str]]:
+        """(url, last_error) for every URL whose latest attempt failed."""
+        self.flush()
+        self._commits.wait()
+        with self._commits.lock:
+            rows = self._conn.execute("SELECT url, last_error FROM urls WHERE status = ?", (FAILED,)).fetchall()
+        yield from rows
+
+    def mark_done(self, url: str, attempts: int = 1):
+        self._add(url, DONE, attempts, None)
+
+    def mark_failed(self, url: str, error: str, attempts: int = 1):
+        self._add(url, FAILED, attempts, error)
+
+    def _add(self, url: str, status: str, attempts: int, error: Optional[str]):
+        self._pending.append((url, status, attempts, error, now_iso_utc()))
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._pending or self._conn is None:
+            return
+        batch, self._pending = self._pending, []
+        self._commits.submit(lambda: self._commit(batch))
+
+    def _commit(self, batch: List[Tuple[str, str, int, Optional[str], str]]):
+        with self._commits.lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO urls (url, status, attempts, last_error, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET status = excluded.status, "
+                "attempts = urls.attempts + excluded.attempts, "
+                "last_error = excluded.last_error, updated_at = excluded.updated_at",
+                batch,
+            )
+
+    def close(self):
+        if self._conn is not None:
+            self.flush()
+            self._commits.wait()
+            self._conn.close()
+            self._conn = None
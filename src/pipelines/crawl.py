@@ -0,0 +1,222 @@
+import asyncio
+import contextlib
+import os
+import sqlite3
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+from client.http import HttpClient
+from pipelines.parse_stage import ParseStage
+from pipelines.stream import ScrapeError, StreamStats, scrape_stream
+from utils.commits import CommitAfter, DeferredCommits
+from utils.logging import get_logger
+from utils.time import now_iso_utc
+from utils.validators import canonical_company_url, company_key
+
+log = get_logger(__name__)
+
+QUEUED = "queued"
+TAKEN = "taken"
+DONE = "done"
+FAILED = "failed"
+
+# record fields whose company links are followed
+LINK_FIELDS = ("similarPages", "affiliatedPages")
+
+def default_frontier_path(output_path: str) -> str:
+    return f"{os.path.splitext(output_path)[0]}.frontier.db"
+
+class Frontier:
+    """
+    Crawl frontier in SQLite (WAL mode): one row per company ever admitted,
+    which doubles as the dedupe index, so a company is fetched at most once
+    per crawl even across restarts. A fresh crawl uses `reset`, like the
+    checkpoint without --resume.
+
+    take() hands out queued companies by priority: lowest depth first, then
+    most in-links (companies that many fetched pages point to are central to
+    the market map), then admission order. Companies beyond `max_depth`, or
+    after `budget` companies were admitted, are not added. Outcomes are
+    buffered and written in batches like the checkpoint, `commit_after`
+    included; on open, companies taken but never finished, or failed, go back
+    to the queue.
+    """
+    def __init__(self, path: str, max_depth: int = 1, budget: Optional[int] = None, reset: bool = False,
+                 batch_size: int = 500, commit_after: Optional[CommitAfter] = None):
+        self.path = path
+        self._commits = DeferredCommits(commit_after)
+        self.max_depth = max_depth
+        self.budget = budget
+        self.reset = reset
+        self.batch_size = max(1, batch_size)
+        self.size = 0
+        self.dropped = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._depths: Dict[str, int] = {}
+        self._outcomes: List[Tuple[str, str]] = []
+
+    def open(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS frontier ("
+            " seq INTEGER PRIMARY KEY,"
+            " key TEXT NOT NULL UNIQUE,"
+            " url TEXT NOT NULL,"
+            " depth INTEGER NOT NULL,"
+            " inlinks INTEGER NOT NULL DEFAULT 0,"
+            " state TEXT NOT NULL,"
+            " added_at TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS frontier_queue ON frontier (state, depth, inlinks DESC, seq);"
+        )
+        if self.reset:
+            self._conn.execute("DELETE FROM frontier")
+        # like --resume with the checkpoint: unfinished and failed companies are tried again
+        self._conn.execute("UPDATE frontier SET state = ? WHERE state IN (?, ?)", (QUEUED, TAKEN, FAILED))
+        self._conn.commit()
+        self.size = self._conn.execute("SELECT COUNT(*) FROM frontier").fetchone()[0]
+        return self
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def add(self, urls: Iterable[str], depth: int = 0) -> int:
+        """Admits company URLs at `depth` in one transaction; returns how many were new."""
+        if depth > self.max_depth:
+            return 0
+        added = 0
+        with self._commits.lock, self._conn:
+            for url in urls:
+                key = company_key(url)
+                if key is None:
+                    continue
+                # already queued: one more in-link, and a shorter path if this is one
+                if self._conn.execute(
+                        "UPDATE frontier SET inlinks = inlinks + 1, depth = MIN(depth, ?) WHERE key = ? AND state = ?",
+                        (depth, key, QUEUED)).rowcount:
+                    continue
+                if self.budget is not None and self.size + added >= self.budget:
+                    if self._conn.execute("SELECT 1 FROM frontier WHERE key = ?", (key,)).fetchone() is None:
+                        self.dropped += 1
+                    continue
+                added += self._conn.execute(
+                    "INSERT OR IGNORE INTO frontier (key, url, depth, state, added_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, canonical_company_url(url), depth, QUEUED, now_iso_utc())).rowcount
+        self.size += added
+        return added
+
+    def take(self, n: int) -> List[str]:
+        """Up to `n` queued URLs in priority order, marked as taken."""
+        with self._commits.lock:
+            rows = self._conn.execute(
+                "SELECT seq, key, url, depth FROM frontier WHERE state = ? ORDER BY depth, inlinks DESC, seq LIMIT ?",
+                (QUEUED, n)).fetchall()
+            if rows:
+                with self._conn:
+                    self._conn.executemany("UPDATE frontier SET state = ? WHERE seq = ?",
+                                           [(TAKEN, r[0]) for r in rows])
+        for _, key, _, depth in rows:
+            self._depths[key] = depth
+        return [r[2] for r in rows]
+
+    @property
+    def in_flight(self) -> int:
+        """URLs handed out by take() and not finished yet."""
+        return len(self._depths)
+
+    def depth(self, url: str) -> Optional[int]:
+        """Depth of a URL handed out by take() and not finished yet."""
+        return self._depths.get(company_key(url))
+
+    def finish(self, url: str, failed: bool = False):
+        key = company_key(url)
+        self._depths.pop(key, None)
+        self._outcomes.append((FAILED if failed else DONE, key))
+        if len(self._outcomes) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._outcomes or self._conn is None:
+            return
+        batch, self._outcomes = self._outcomes, []
+        self._commits.submit(lambda: self._commit(batch))
+
+    def _commit(self, batch: List[Tuple[str, str]]):
+        with self._commits.lock, self._conn:
+            self._conn.executemany("UPDATE frontier SET state = ? WHERE key = ?", batch)
+
+    def counts(self) -> Dict[str, int]:
+        self.flush()
+        self._commits.wait()
+        with self._commits.lock:
+            return dict(self._conn.execute("SELECT state, COUNT(*) FROM frontier GROUP BY state").fetchall())
+
+    def close(self):
+        if self._conn is not None:
+            self.flush()
+            self._commits.wait()
+            self._conn.close()
+            self._conn = None
+
+def related_urls(record: Dict[str, Any]) -> List[str]:
+    """Company page URLs among a record's similar and affiliated pages (showcase pages are not companies)."""
+    urls = []
+    for field in LINK_FIELDS:
+        for page in record.get(field) or ():
+            url = page.get("linkedinUrl") if isinstance(page, dict) else None
+            if url and company_key(url) is not None:
+                urls.append(url)
+    return urls
+
+async def crawl_stream(seeds: Iterable[str], frontier: Frontier, client: Optional[HttpClient] = None,
+                       stage: Optional[ParseStage] = None, *, stats: Optional[StreamStats] = None,
+                       take: int = 64, **options) -> AsyncIterator[Union[Dict[str, Any], ScrapeError]]:
+    """
+    scrape_stream over a growing URL set: `seeds` enter the frontier at depth
+    0, and the company links of every record yielded are added one level
+    deeper, until the frontier is empty or its budget is used up. Takes the
+    same options as scrape_stream, except an incremental tracker.
+    """
+    if options.get("tracker") is not None:
+        # unchanged pages are not parsed, so their links would never be followed
+        raise ValueError("crawl_stream does not support an incremental tracker")
+    stats = stats if stats is not None else StreamStats()
+    frontier.add(seeds, 0)
+    progress = asyncio.Event()
+
+    def skipped() -> int:
+        return stats.invalid + stats.duplicates + stats.already_seen + stats.resumed
+
+    async def urls():
+        while True:
+            progress.clear()
+            batch = frontier.take(take)
+            for url in batch:
+                before = skipped()
+                yield url
+                # resumed once scrape_stream has sorted this URL: skipped ones (already scraped) end here
+                if skipped() != before:
+                    frontier.finish(url)
+            if batch:
+                continue
+            # nothing queued: done once every handed-out URL has finished and had its links added
+            if not frontier.in_flight:
+                return
+            await progress.wait()
+
+    # closing this generator stops the inner stream's work now, not at garbage collection
+    async with contextlib.aclosing(scrape_stream(urls(), client, stage, stats=stats, **options)) as items:
+        async for item in items:
+            failed = isinstance(item, ScrapeError)
+            url = item.url if failed else item.get("url") or ""
+            if not failed:
+                depth = frontier.depth(url)
+                if depth is not None and depth < frontier.max_depth:
+                    frontier.add(related_urls(item), depth + 1)
+            yield item
+            # finished only once the consumer has taken it: a record lost before then is fetched again on --resume
+            frontier.finish(url, failed=failed)
+            progress.set()
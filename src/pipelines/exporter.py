@@ -1,45 +1,309 @@
+import glob
+import gzip
+import io
 import json
 import os
-from typing import Optional, Dict, Any, List
+import tempfile
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterator, Optional, Dict, Any, List, IO, Tuple
 from utils.logging import get_logger
+from utils.serialization import dumps
+
+try:
+    import zstandard as _zstd
+except ImportError:  # optional dependency
+    _zstd = None
 
 log = get_logger(__name__)
 
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+def open_text(path: str, mode: str, compression: Optional[str] = None) -> IO[str]:
+    """Opens a text handle, transparently (de)compressing gzip/zstd streams."""
+    if compression is None:
+        if path.endswith(".gz"):
+            compression = "gzip"
+        elif path.endswith(".zst"):
+            compression = "zstd"
+    if compression == "gzip":
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=6)
+    if compression == "zstd":
+        if _zstd is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        raw = open(path, mode + "b")
+        if "r" in mode:
+            stream = _zstd.ZstdDecompressor().stream_reader(raw, closefd=True)
+        else:
+            stream = _zstd.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+def find_jsonl_parts(out_path: str) -> List[str]:
+    """JSONL files an Exporter wrote for `out_path`: the single .jsonl or the numbered parts, any compression."""
+    for suffix in (".gz", ".zst"):
+        if out_path.endswith(suffix):
+            out_path = out_path[:-len(suffix)]
+    base = glob.escape(os.path.splitext(out_path)[0])
+    parts = []
+    for suffix in COMPRESSION_SUFFIXES.values():
+        parts += glob.glob(f"{base}.jsonl{suffix}")
+        parts += sorted(glob.glob(f"{base}.[0-9][0-9][0-9][0-9][0-9].jsonl{suffix}"))
+    return parts
+
 class Exporter:
-    def __init__(self, out_path: str):
-        self.out_path = out_path
+    """
+    Writes records to a .jsonl file and a { records, errors, stats } JSON bundle.
+
+    Records are buffered and handed to a single writer thread in batches, so
+    serialization and disk I/O happen off the event loop. Each record is
+    serialized once (utils.serialization) and the same line goes to the JSONL
+    and the bundle. The bundle is pretty-printed (indent=2) at close(); with
+    stream_bundle it is written incrementally instead, one record per line,
+    rather than its lines being held in memory until close().
+    With append the JSONL output is extended (e.g. on --resume) and the bundle is
+    rebuilt from all JSONL content at close(). Extra `backends` (CSV, Parquet, ...)
+    receive the same batches on the writer thread, so every format comes from one pass.
+    """
+    max_pending_batches = 4
+
+    def __init__(self, out_path: str, stream_bundle: bool = False, batch_size: int = 200,
+                 flush_interval: float = 2.0, compression: Optional[str] = None, rotate_every: int = 0,
+                 append: bool = False, backends: Optional[List[Any]] = None):
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unsupported compression: {compression}")
+        if compression == "zstd" and _zstd is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        self.compression = compression
+        self.append = append
+        # in append mode the bundle is rebuilt from the JSONL parts at close()
+        self.stream_bundle = stream_bundle and not append
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.rotate_every = max(0, rotate_every)
+        suffix = COMPRESSION_SUFFIXES[compression]
+        self.out_path = out_path + suffix if suffix and not out_path.endswith(suffix) else out_path
         base, ext = os.path.splitext(out_path)
-        self.jsonl_path = f"{base}.jsonl"
-        self._fh_jsonl = None
-        self._records: List[Dict[str, Any]] = []
+        self._jsonl_base = base
+        self._suffix = suffix
+        self.jsonl_path = self._jsonl_part_path(0)
+        self._fh_jsonl: Optional[IO[str]] = None
+        self._fh_bundle: Optional[IO[str]] = None
+        self._fh_errors: Optional[IO[str]] = None
+        # serialized records for the bundle written at close()
+        self._bundle_lines: List[str] = []
+        self._buffer: List[Dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+        self._pending: List[Future] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._part = 0
+        self._part_count = 0
+        self._bundle_count = 0
         self.records_written = 0
         self.errors: List[Dict[str, str]] = []
+        self.errors_written = 0
+        self.backends = list(backends or [])
+
+    def _jsonl_part_path(self, part: int) -> str:
+        if self.rotate_every:
+            return f"{self._jsonl_base}.{part + 1:05d}.jsonl{self._suffix}"
+        return f"{self._jsonl_base}.jsonl{self._suffix}"
+
+    def _existing_parts(self) -> List[str]:
+        if not self.rotate_every:
+            return [self.jsonl_path] if os.path.exists(self.jsonl_path) else []
+        pattern = f"{glob.escape(self._jsonl_base)}.[0-9][0-9][0-9][0-9][0-9].jsonl{self._suffix}"
+        return sorted(glob.glob(pattern))
 
     def open(self):
-        self._fh_jsonl = open(self.jsonl_path, "w", encoding="utf-8")
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="exporter")
+        if self.append and self.rotate_every:
+            # continue with a fresh part after the ones written by previous runs
+            self._part = len(self._existing_parts())
+            self.jsonl_path = self._jsonl_part_path(self._part)
+        self._fh_jsonl = open_text(self.jsonl_path, "a" if self.append else "w", self.compression)
+        if self.stream_bundle:
+            self._fh_bundle = open_text(self.out_path, "w", self.compression)
+            self._fh_bundle.write('{\n  "records": [')
+            # errors are spooled to disk and spliced into the bundle at close()
+            self._fh_errors = tempfile.TemporaryFile("w+", encoding="utf-8")
+        for backend in self.backends:
+            backend.open()
 
     def write(self, record: Dict[str, Any]):
         assert self._fh_jsonl is not None, "Exporter not opened"
-        self._records.append(record)
-        self._fh_jsonl.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._buffer.append(record)
         self.records_written += 1
+        if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
 
     def write_error(self, url: str, error: str):
-        self.errors.append({"url": url, "error": error})
+        err = {"url": url, "error": error}
+        self.errors_written += 1
+        if self._fh_errors is not None:
+            self._submit(self._write_error_line, err)
+        else:
+            self.errors.append(err)
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        self._submit(self._write_batch, batch)
+
+    def after_writes(self, fn: Callable[[], None]) -> Optional[Future]:
+        """
+        Runs `fn` on the writer thread once every record passed to write() so far
+        is written and the JSONL (and streamed bundle) handles are flushed to the
+        OS, without waiting for it. A closed exporter has written everything, so
+        `fn` then runs right away and None is returned.
+        """
+        if self._executor is None:
+            fn()
+            return None
+        self.flush()
+        return self._submit(self._flush_files_then, fn)
+
+    def _submit(self, fn, arg) -> Future:
+        self._pending = [f for f in self._pending if not f.done()]
+        if len(self._pending) >= self.max_pending_batches:
+            # writer thread is behind; apply backpressure instead of queueing unbounded batches
+            self._pending.pop(0).result()
+        future = self._executor.submit(fn, arg)
+        self._pending.append(future)
+        return future
+
+    # --- writer thread ---
+
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        lines = [dumps(r) for r in batch]
+        start = 0
+        while start < len(lines):
+            take = len(lines) - start
+            if self.rotate_every:
+                if self._part_count >= self.rotate_every:
+                    self._rotate()
+                take = min(take, self.rotate_every - self._part_count)
+            self._fh_jsonl.write("\n".join(lines[start:start + take]) + "\n")
+            self._part_count += take
+            start += take
+        if self._fh_bundle is not None:
+            sep = ",\n    " if self._bundle_count else "\n    "
+            self._fh_bundle.write(sep + ",\n    ".join(lines))
+            self._bundle_count += len(lines)
+        elif not self.append:
+            self._bundle_lines.extend(lines)
+        for backend in self.backends:
+            backend.write_batch(batch)
+
+    def _flush_files_then(self, fn: Callable[[], None]):
+        # the writer thread runs tasks in order, so every earlier batch is written by now
+        for fh in (self._fh_jsonl, self._fh_bundle, self._fh_errors):
+            if fh is not None:
+                fh.flush()
+        fn()
+
+    def _rotate(self):
+        self._fh_jsonl.close()
+        self._part += 1
+        self._part_count = 0
+        self.jsonl_path = self._jsonl_part_path(self._part)
+        self._fh_jsonl = open_text(self.jsonl_path, "w", self.compression)
+
+    def _write_error_line(self, err: Dict[str, str]):
+        self._fh_errors.write(dumps(err) + "\n")
+
+    def _finish_bundle(self):
+        fh = self._fh_bundle
+        fh.write('\n  ],\n  "errors": [')
+        self._fh_errors.seek(0)
+        for i, line in enumerate(self._fh_errors):
+            fh.write((",\n    " if i else "\n    ") + line.rstrip("\n"))
+        stats = {"records": self.records_written, "errors": self.errors_written}
+        fh.write('\n  ],\n  "stats": ' + json.dumps(stats) + "\n}\n")
+        fh.close()
+        self._fh_errors.close()
+
+    def _rebuild_bundle(self):
+        # Streams every JSONL part into the bundle. A URL re-fetched after a crash or a failure is
+        # kept once, as its last record; errors of earlier runs carry over unless the URL has a record now.
+        parts = self._existing_parts()
+        last: Dict[Any, Tuple[int, int]] = {}
+        for p, i, url, _ in self._jsonl_records(parts):
+            last[url] = (p, i)
+        errors = {e["url"]: e for e in self._previous_errors() + self.errors if e["url"] not in last}
+        count = 0
+        with open_text(self.out_path, "w", self.compression) as fh:
+            fh.write('{\n  "records": [')
+            for p, i, url, line in self._jsonl_records(parts):
+                if last[url] == (p, i):
+                    fh.write((",\n    " if count else "\n    ") + line)
+                    count += 1
+            self._write_bundle_tail(fh, count, list(errors.values()))
+
+    def _jsonl_records(self, parts: List[str]) -> Iterator[Tuple[int, int, Any, str]]:
+        for p, part in enumerate(parts):
+            with open_text(part, "r", self.compression) as src:
+                for i, line in enumerate(src):
+                    line = line.strip()
+                    if line:
+                        yield p, i, json.loads(line).get("url"), line
+
+    def _previous_errors(self) -> List[Dict[str, str]]:
+        """The errors of the bundle an earlier run wrote, read before it is rebuilt."""
+        if not os.path.exists(self.out_path):
+            return []
+        try:
+            with open_text(self.out_path, "r", self.compression) as fh:
+                for line in fh:
+                    # top-level key; record fields are indented deeper or on one line
+                    if line.startswith('  "errors": '):
+                        rest = line[len('  "errors": '):] + fh.read()
+                        return json.JSONDecoder().raw_decode(rest)[0]
+        except (OSError, ValueError) as e:
+            log.warning("Could not read the errors of %s, they are not carried over: %s", self.out_path, e)
+        return []
+
+    def _write_bundle_tail(self, fh: IO[str], count: int, errors: List[Dict[str, str]]):
+        fh.write('\n  ],\n  "errors": [')
+        fh.write(",".join("\n    " + dumps(e) for e in errors))
+        stats = {"records": count, "errors": len(errors)}
+        fh.write('\n  ],\n  "stats": ' + json.dumps(stats) + "\n}\n")
+
+    # ---
 
     def close(self):
+        if self._executor is not None:
+            self.flush()
+            for f in self._pending:
+                f.result()
+            self._pending = []
+            if self._fh_bundle is not None:
+                self._executor.submit(self._finish_bundle).result()
+                self._fh_bundle = None
+                self._fh_errors = None
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for backend in self.backends:
+            backend.close()
         if self._fh_jsonl:
             self._fh_jsonl.close()
             self._fh_jsonl = None
-        # Pretty JSON output summary
-        bundle = {
-            "records": self._records,
-            "errors": self.errors,
-            "stats": {
-                "records": len(self._records),
-                "errors": len(self.errors),
-            },
-        }
-        with open(self.out_path, "w", encoding="utf-8") as f:
-            json.dump(bundle, f, ensure_ascii=False, indent=2)
-        log.info("Export complete: %s and %s", self.out_path, self.jsonl_path)
\ No newline at end of file
+        if self.append:
+            self._rebuild_bundle()
+        elif not self.stream_bundle:
+            # Pretty JSON output summary, decoded back from the lines serialized for the JSONL
+            records = [json.loads(line) for line in self._bundle_lines]
+            self._bundle_lines = []
+            bundle = {
+                "records": records,
+                "errors": self.errors,
+                "stats": {
+                    "records": len(records),
+                    "errors": len(self.errors),
+                },
+            }
+            with open_text(self.out_path, "w", self.compression) as f:
+                json.dump(bundle, f, ensure_ascii=False, indent=2)
+        log.info("Export complete: %s", ", ".join([self.out_path, self.jsonl_path] + [b.path for b in self.backends]))
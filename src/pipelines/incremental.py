@@ -0,0 +1,233 @@
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from extractors.fast_scanner import ScannedPage, scan_page, scan_related_pages, scan_text_fields
+from extractors.linkedin_company_parser import first_website
+from pipelines.exporter import open_text
+from utils.commits import CommitAfter, DeferredCommits
+from utils.logging import get_logger
+from utils.time import now_iso_utc
+from utils.validators import company_key
+
+log = get_logger(__name__)
+
+# the meta tags the parser falls back to for name and description, as (property, name)
+_META_FIELDS = (("og:title", "title"), ("og:description", "description"))
+
+# fields that change on every scrape without the company changing
+_VOLATILE_FIELDS = ("scrapedAt", "rawHtml")
+
+def page_fingerprint(html: str, page: Optional[ScannedPage] = None) -> str:
+    """
+    Hash of what the parser reads from a page: the JSON-LD blocks, the title
+    and description meta tags, the values its text heuristics find, the
+    website link it would pick and the similar/affiliated page cards.
+    Everything else (feed items, tracking ids, CSRF tokens, nonces) changes on
+    every request and must not affect the fingerprint. Pass `page`
+    (scan_page(html)) to reuse a scan the parser will read too.
+    """
+    page = page or scan_page(html)
+    parts = list(page.json_ld)
+    for prop, name in _META_FIELDS:
+        parts.append(page.meta_property[prop] if prop in page.meta_property else page.meta_name.get(name))
+    # the values, not the text around them: a value in a sibling element counts like any other
+    parts += [f"{k}={v}" for k, v in sorted(scan_text_fields(page.text).items())]
+    parts.append(first_website(page.links()))
+    # cards without their tracking query strings, as the parser keeps them
+    for field, cards in scan_related_pages(html).items():
+        parts += [field] + [f"{c['name']}|{c['industry']}|{c['address']}|{c['linkedinUrl']}" for c in cards]
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update((part or "").encode("utf-8", "ignore"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+def _stable(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in record.items() if k not in _VOLATILE_FIELDS}
+
+def record_fingerprint(record: Dict[str, Any]) -> str:
+    payload = json.dumps(_stable(record), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+def _flatten(value: Any, prefix: str, out: Dict[str, Any]):
+    if isinstance(value, dict) and value:
+        for k, v in value.items():
+            _flatten(v, f"{prefix}.{k}" if prefix else k, out)
+    else:
+        out[prefix] = value
+
+def diff_records(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Field-level diff; nested objects are compared per leaf, e.g. `mainAddress.addressCountry`."""
+    before: Dict[str, Any] = {}
+    after: Dict[str, Any] = {}
+    _flatten(_stable(old), "", before)
+    _flatten(_stable(new), "", after)
+    return {k: {"old": before.get(k), "new": after.get(k)}
+            for k in sorted(set(before) | set(after)) if before.get(k) != after.get(k)}
+
+class Fingerprint:
+    __slots__ = ("page_hash", "record_hash", "_record_json")
+
+    def __init__(self, page_hash: str, record_hash: str, record_json: str):
+        self.page_hash = page_hash
+        self.record_hash = record_hash
+        self._record_json = record_json
+
+    @property
+    def record(self) -> Dict[str, Any]:
+        # only decoded when a diff is needed; most lookups just compare hashes
+        return json.loads(self._record_json)
+
+class FingerprintStore:
+    """
+    Per-company page and record fingerprints from earlier runs, keyed by slug.
+    Kept across runs (unlike the checkpoint); writes are batched like
+    CheckpointStore, including its `commit_after`.
+    """
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 2.0,
+                 commit_after: Optional[CommitAfter] = None):
+        self.path = path
+        self._commits = DeferredCommits(commit_after)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pending: Dict[str, Tuple[str, str, str, str, str]] = {}
+        # handed to a commit that has not run yet
+        self._committing: Dict[str, Tuple[str, str, str, str, str]] = {}
+        self._last_flush = time.monotonic()
+
+    def open(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            " key TEXT PRIMARY KEY, url TEXT, page_hash TEXT, record_hash TEXT, record TEXT, updated_at TEXT)"
+        )
+        self._conn.commit()
+        return self
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def get(self, url: str) -> Optional[Fingerprint]:
+        key = company_key(url)
+        row = self._pending.get(key)
+        if row is None:
+            with self._commits.lock:
+                row = self._committing.get(key) or self._conn.execute(
+                    "SELECT key, url, page_hash, record_hash, record FROM fingerprints WHERE key = ?", (key,)
+                ).fetchone()
+        if row is None:
+            return None
+        return Fingerprint(row[2], row[3], row[4])
+
+    def put(self, url: str, page_hash: str, record_hash: str, record: Dict[str, Any]):
+        key = company_key(url)
+        self._pending[key] = (key, url, page_hash, record_hash,
+                              json.dumps(record, ensure_ascii=False, default=str))
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._pending or self._conn is None:
+            return
+        batch, self._pending = self._pending, {}
+        with self._commits.lock:
+            self._committing.update(batch)
+        self._commits.submit(lambda: self._commit(list(batch.values())))
+
+    def _commit(self, rows: List[Tuple[str, str, str, str, str]]):
+        now = now_iso_utc()
+        with self._commits.lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO fingerprints (key, url, page_hash, record_hash, record, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [row + (now,) for row in rows],
+            )
+            self._conn.commit()
+            for row in rows:
+                # unless a newer put is waiting for its own commit
+                if self._committing.get(row[0]) is row:
+                    del self._committing[row[0]]
+
+    def close(self):
+        if self._conn is not None:
+            self.flush()
+            self._commits.wait()
+            self._conn.close()
+            self._conn = None
+
+class PendingChange:
+    """A new or changed record, stored and logged by IncrementalTracker.commit once it is exported."""
+    __slots__ = ("url", "page_hash", "record_hash", "record", "entry")
+
+    def __init__(self, url: str, page_hash: str, record_hash: str, record: Dict[str, Any], entry: Dict[str, Any]):
+        self.url = url
+        self.page_hash = page_hash
+        self.record_hash = record_hash
+        self.record = record
+        self.entry = entry
+
+class IncrementalTracker:
+    """
+    Decides per fetched page whether anything changed since the last run and
+    appends new/changed records, with a field-level diff, to the changes stream.
+    A new or changed record's fingerprints are only stored by commit(), so one
+    that never reaches the output is treated as changed again on the next run.
+    """
+    NEW = "new"
+    CHANGED = "changed"
+
+    def __init__(self, store: FingerprintStore, changes_path: str):
+        self.store = store
+        self.changes_path = changes_path
+        self._fh = None
+        self.counts = {self.NEW: 0, self.CHANGED: 0, "unchanged": 0}
+
+    def open(self):
+        self.store.open()
+        self._fh = open_text(self.changes_path, "a")
+        return self
+
+    def previous(self, url: str) -> Optional[Fingerprint]:
+        return self.store.get(url)
+
+    def unchanged(self, url: str):
+        self.counts["unchanged"] += 1
+
+    def compare(self, url: str, page_hash: str, record: Dict[str, Any],
+                previous: Optional[Fingerprint]) -> Optional[PendingChange]:
+        """
+        The change to commit once the record is exported, or None when the record
+        is unchanged (its new page fingerprint is stored right away).
+        """
+        record_hash = record_fingerprint(record)
+        if previous is not None and previous.record_hash == record_hash:
+            self.store.put(url, page_hash, record_hash, record)
+            self.counts["unchanged"] += 1
+            return None
+        entry = {"url": url, "change": self.NEW if previous is None else self.CHANGED,
+                 "scrapedAt": record.get("scrapedAt")}
+        if previous is not None:
+            entry["diff"] = diff_records(previous.record, record)
+        return PendingChange(url, page_hash, record_hash, record, entry)
+
+    def commit(self, change: PendingChange):
+        """Stores the fingerprints of an exported record and appends its change entry."""
+        self.store.put(change.url, change.page_hash, change.record_hash, change.record)
+        self.counts[change.entry["change"]] += 1
+        self._fh.write(json.dumps(change.entry, ensure_ascii=False, default=str) + "\n")
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        self.store.close()
@@ -1,58 +1,69 @@
 from typing import Dict, Any
 import re
 
+_TEXT_FIELDS = ("name", "description", "website", "industry", "companySize", "headquarters", "type", "specialties", "logo")
+_ADDRESS_FIELDS = ("streetAddress", "addressLocality", "addressRegion", "postalCode", "addressCountry")
+_LIST_FIELDS = ("addresses", "affiliatedPages", "similarPages")
+_SCHEME_RE = re.compile(r"^https?://")
+
 def _clean_whitespace(s: str) -> str:
-    return re.sub(r"\s+", " ", s).strip()
+    # same result as collapsing \s+ and stripping, without the regex
+    return " ".join(s.split())
+
+def _int_or_none(value: Any):
+    try:
+        return int(value)
+    except Exception:
+        return None
 
 def normalize_company_record(record: Dict[str, Any]) -> Dict[str, Any]:
-    out = dict(record)  # shallow copy
+    """Normalizes a parsed record in place (nested dicts included) and returns it."""
+    out = record
     # Normalize strings
-    for key in ("name", "description", "website", "industry", "companySize", "headquarters", "type", "specialties", "logo"):
-        if out.get(key) and isinstance(out[key], str):
-            out[key] = _clean_whitespace(out[key])
+    for key in _TEXT_FIELDS:
+        value = out.get(key)
+        if value and isinstance(value, str):
+            out[key] = _clean_whitespace(value)
 
     # Normalize website
-    if out.get("website"):
-        site = out["website"].strip()
+    site = out.get("website")
+    if site and isinstance(site, str):
         if site.startswith("//"):
             site = "https:" + site
-        if not re.match(r"^https?://", site):
+        if not _SCHEME_RE.match(site):
             site = "https://" + site
         out["website"] = site
 
     # Clamp employee count
     if out.get("numberOfEmployees") is not None:
-        try:
-            out["numberOfEmployees"] = int(out["numberOfEmployees"])
-        except Exception:
-            out["numberOfEmployees"] = None
+        out["numberOfEmployees"] = _int_or_none(out["numberOfEmployees"])
 
     # Normalize address object shape
-    if "mainAddress" in out and isinstance(out["mainAddress"], dict):
-        addr = out["mainAddress"]
-        addr.setdefault("type", "PostalAddress")
-        for k in ("streetAddress", "addressLocality", "addressRegion", "postalCode", "addressCountry"):
-            if addr.get(k) == "":
-                addr[k] = None
+    addr = out.get("mainAddress")
+    if isinstance(addr, dict):
+        if "type" not in addr:
+            addr["type"] = "PostalAddress"
+        for k in _ADDRESS_FIELDS:
+            value = addr.get(k)
+            if isinstance(value, str):
+                addr[k] = _clean_whitespace(value) or None
 
     # Stock sub-object
-    if "stock" in out and isinstance(out["stock"], dict):
-        out["stock"].setdefault("symbol", None)
-        out["stock"].setdefault("price", None)
-        out["stock"].setdefault("change", None)
+    stock = out.get("stock")
+    if isinstance(stock, dict):
+        stock.setdefault("symbol", None)
+        stock.setdefault("price", None)
+        stock.setdefault("change", None)
     else:
         out["stock"] = {"symbol": None, "price": None, "change": None}
 
     # Arrays
-    for a in ("addresses", "affiliatedPages", "similarPages"):
-        if a not in out or not isinstance(out[a], list):
+    for a in _LIST_FIELDS:
+        if not isinstance(out.get(a), list):
             out[a] = []
 
     # Followers count integer
     if out.get("followersCount") is not None:
-        try:
-            out["followersCount"] = int(out["followersCount"])
-        except Exception:
-            out["followersCount"] = None
+        out["followersCount"] = _int_or_none(out["followersCount"])
 
-    return out
\ No newline at end of file
+    return out
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+
+from extractors.fast_scanner import ScannedPage, scan_page
+from extractors.linkedin_company_parser import LinkedInCompanyParser
+from pipelines.incremental import page_fingerprint
+from pipelines.normalizer import normalize_company_record
+from utils.metrics import STAGE_SECONDS
+from utils.time import now_iso_utc
+
+_parsers: Dict[str, LinkedInCompanyParser] = {}
+
+def _timed_parse_page(html: str, url: str, include_raw: bool = False, engine: str = "auto",
+                     scanned: Optional[ScannedPage] = None,
+                     scraped_at: Optional[str] = None) -> Tuple[Dict[str, Any], float, float]:
+    """parse_page plus the parse and normalize durations, so pool workers can report them to the parent."""
+    parser = _parsers.get(engine)
+    if parser is None:
+        parser = _parsers[engine] = LinkedInCompanyParser(engine=engine)
+    t0 = time.perf_counter()
+    parsed = parser.parse(html, base_url=url, include_raw=include_raw, scanned=scanned)
+    t1 = time.perf_counter()
+    normalized = normalize_company_record(parsed)
+    t2 = time.perf_counter()
+    normalized["url"] = url if not normalized.get("url") else normalized["url"]
+    normalized["scrapedAt"] = scraped_at or normalized.get("scrapedAt") or now_iso_utc()
+    return normalized, t1 - t0, t2 - t1
+
+def _parse_if_changed(html: str, url: str, include_raw: bool, engine: str,
+                      previous_hash: Optional[str]) -> Tuple[Optional[Dict[str, Any]], str, float, float]:
+    # the fingerprint covers what the parser reads, so the parser reuses its scan
+    scanned = scan_page(html) if engine != "soup" else None
+    page_hash = page_fingerprint(html, scanned)
+    if page_hash == previous_hash:
+        return None, page_hash, 0.0, 0.0
+    record, parse_s, normalize_s = _timed_parse_page(html, url, include_raw, engine, scanned)
+    return record, page_hash, parse_s, normalize_s
+
+def parse_page(html: str, url: str, include_raw: bool = False, engine: str = "auto",
+               scraped_at: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Parses and normalizes one fetched page. Runs inside pool workers, so it must stay picklable.
+    `scraped_at` is when the page was fetched, if not now (e.g. an archived capture).
+    """
+    return _timed_parse_page(html, url, include_raw, engine, scraped_at=scraped_at)[0]
+
+def default_parse_workers() -> int:
+    return os.cpu_count() or 1
+
+class ParseStage:
+    """
+    Runs parse_page off the event loop on a process (default) or thread pool.
+    With workers=0 pages are parsed inline on the loop, as before.
+    """
+    def __init__(self, workers: int = 0, executor: str = "process", engine: str = "auto"):
+        if executor not in ("process", "thread"):
+            raise ValueError(f"Unsupported parse executor: {executor}")
+        if engine not in LinkedInCompanyParser.ENGINES:
+            raise ValueError(f"Unsupported parser engine: {engine}")
+        self.engine = engine
+        self.workers = max(0, workers)
+        self.executor_kind = executor
+        self._executor: Optional[Executor] = None
+
+    def __enter__(self):
+        if self.workers:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="parse")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def concurrency(self) -> int:
+        # keep every pool worker busy while the next page is being handed off
+        return max(1, self.workers * 2)
+
+    async def parse(self, html: str, url: str, include_raw: bool = False) -> Dict[str, Any]:
+        if self._executor is None:
+            record, parse_s, normalize_s = _timed_parse_page(html, url, include_raw, self.engine)
+        else:
+            loop = asyncio.get_running_loop()
+            record, parse_s, normalize_s = await loop.run_in_executor(
+                self._executor, _timed_parse_page, html, url, include_raw, self.engine)
+        STAGE_SECONDS.observe(parse_s, stage="parse")
+        STAGE_SECONDS.observe(normalize_s, stage="normalize")
+        return record
+
+    async def parse_if_changed(self, html: str, url: str, include_raw: bool = False,
+                               previous_hash: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Fingerprints the page in the worker and skips parse/normalize when it matches
+        `previous_hash`. Returns (record or None, page fingerprint).
+        """
+        args = (html, url, include_raw, self.engine, previous_hash)
+        if self._executor is None:
+            record, page_hash, parse_s, normalize_s = _parse_if_changed(*args)
+        else:
+            loop = asyncio.get_running_loop()
+            record, page_hash, parse_s, normalize_s = await loop.run_in_executor(self._executor, _parse_if_changed, *args)
+        if record is not None:
+            STAGE_SECONDS.observe(parse_s, stage="parse")
+            STAGE_SECONDS.observe(normalize_s, stage="normalize")
+        return record, page_hash
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
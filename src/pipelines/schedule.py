@@ -0,0 +1,130 @@
+import asyncio
+import collections
+import json
+import os
+import time
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from utils.logging import get_logger
+from utils.validators import company_key
+
+log = get_logger(__name__)
+
+def default_continuation_path(output_path: str) -> str:
+    return f"{os.path.splitext(output_path)[0]}.continuation.jsonl"
+
+def by_priority(entries: Iterable[Tuple[str, float]]) -> List[Tuple[str, float]]:
+    """(url, priority) entries highest priority first, in input order among equals. Reads the whole input."""
+    return sorted(entries, key=lambda e: -e[1])
+
+def write_continuation(path: str, urls: Iterable[str], priorities: Optional[Dict[str, float]] = None) -> int:
+    """
+    Writes unfinished URLs as NDJSON {"url", "priority"} lines, highest
+    priority first, so the file is the --inputs of the next window.
+    """
+    priorities = priorities or {}
+    entries = by_priority((u, priorities.get(company_key(u), 0.0)) for u in urls)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for url, priority in entries:
+            f.write(json.dumps({"url": url, "priority": priority}) + "\n")
+    os.replace(tmp, path)
+    return len(entries)
+
+class TimeBudget:
+    """
+    Wall-clock budget for one scrape_stream run.
+
+    The budget closes, and no new fetch starts, once the time left no longer
+    covers draining the work in flight plus `margin`. The drain estimate is
+    the longer of the 90th-percentile time a URL took from first fetch to
+    finish (recent `sample_size` URLs), and the URLs in flight divided by the
+    observed throughput. Before the first URL finishes it is
+    `initial_estimate`. URLs that would have started after that point,
+    including retries still backing off, are deferred.
+    """
+    poll_interval = 0.25
+    sample_size = 64
+
+    def __init__(self, seconds: float, margin: Optional[float] = None, initial_estimate: float = 30.0):
+        self.seconds = seconds
+        self.margin = margin if margin is not None else max(1.0, seconds * 0.02)
+        self.initial_estimate = initial_estimate
+        self.closed = False
+        self.closed_at: Optional[float] = None
+        self.finished = 0
+        self.deferred: List[str] = []
+        self._started_at: Dict[str, float] = {}
+        self._durations: Deque[float] = collections.deque(maxlen=self.sample_size)
+        self._slowest: Optional[float] = None
+        self._start = time.monotonic()
+
+    def start(self):
+        """Starts the clock; the budget otherwise counts from construction."""
+        self._start = time.monotonic()
+        return self
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._start
+
+    @property
+    def remaining(self) -> float:
+        return self.seconds - self.elapsed
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._started_at)
+
+    @property
+    def throughput(self) -> float:
+        """URLs finished per second so far."""
+        return self.finished / max(self.elapsed, 1e-6)
+
+    def task_started(self, url: str):
+        # a retry keeps its first start: backoff is part of what the URL costs
+        self._started_at.setdefault(url, time.monotonic())
+
+    def task_finished(self, url: str):
+        started = self._started_at.pop(url, None)
+        if started is None:
+            return
+        self.finished += 1
+        self._durations.append(time.monotonic() - started)
+        ordered = sorted(self._durations)
+        self._slowest = ordered[int(len(ordered) * 0.9)]
+
+    def defer(self, url: str):
+        self._started_at.pop(url, None)
+        self.deferred.append(url)
+
+    def drain_estimate(self) -> float:
+        """Seconds the URLs in flight are expected to need to finish."""
+        slowest = self._slowest if self._slowest is not None else self.initial_estimate
+        rate = self.throughput
+        backlog = self.in_flight / rate if rate > 0 else 0.0
+        return max(slowest, backlog)
+
+    def check(self) -> bool:
+        """Closes the budget once the time left only covers the drain; returns whether it is closed."""
+        if self.closed:
+            return True
+        remaining = self.remaining
+        drain = self.drain_estimate()
+        if remaining > drain + self.margin:
+            return False
+        self.closed = True
+        self.closed_at = self.elapsed
+        log.info("Time budget: no new fetches with %.1fs left; draining %d in flight (estimated %.1fs at %.1f/s).",
+                 max(0.0, remaining), self.in_flight, drain, self.throughput)
+        return True
+
+    async def watch(self):
+        """Returns once the budget has closed."""
+        while not self.check():
+            await asyncio.sleep(self.poll_interval)
+
+    def report(self) -> Dict[str, Any]:
+        return {"budget": round(self.seconds, 1), "elapsed": round(self.elapsed, 1),
+                "closed_at": round(self.closed_at, 1) if self.closed_at is not None else None,
+                "finished": self.finished, "deferred": len(self.deferred)}
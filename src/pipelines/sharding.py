@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from pipelines.backends import create_backend
+from pipelines.checkpoint import CheckpointStore, default_checkpoint_path
+from pipelines.exporter import Exporter, find_jsonl_parts, open_text
+from utils.logging import get_logger
+from utils.validators import company_key
+
+log = get_logger(__name__)
+
+def parse_shard_spec(spec: str) -> Tuple[int, int]:
+    """'i/N' with 0 <= i < N."""
+    try:
+        index, count = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard spec {spec!r}, expected i/N") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard spec {spec!r}, need 0 <= i < N")
+    return index, count
+
+def shard_of(url: str, count: int) -> int:
+    # blake2b rather than hash(): str hashes are salted per process, shards must agree across runs and machines
+    # URLs without a company key all land in one shard, which drops them as invalid
+    digest = hashlib.blake2b((company_key(url) or "").encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
+
+def filter_shard(urls: Iterable[str], index: int, count: int) -> Iterator[str]:
+    for u in urls:
+        if shard_of((u or "").strip(), count) == index:
+            yield u
+
+def shard_output_path(output_path: str, index: int, count: int) -> str:
+    base, ext = os.path.splitext(output_path)
+    return f"{base}.shard-{index:03d}-of-{count:03d}{ext}"
+
+def shard_paths(output_path: str, count: int) -> List[str]:
+    return [shard_output_path(output_path, i, count) for i in range(count)]
+
+def _shard_records(path: str) -> Iterator[Dict[str, Any]]:
+    parts = find_jsonl_parts(path)
+    if not parts:
+        log.warning("No JSONL output found for shard %s", path)
+    for part in parts:
+        with open_text(part, "r") as fh:
+            for line in fh:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+def merge_shards(shard_outputs: List[str], output_path: str, checkpoint_paths: Optional[List[str]] = None,
+                 compression: Optional[str] = None, formats: Sequence[str] = (),
+                 row_group_size: int = 10000) -> Dict[str, Any]:
+    """
+    Combines shard outputs into one deduplicated bundle (+ JSONL). Records are
+    streamed from each shard's JSONL parts; errors come from the shard
+    checkpoints, skipping URLs that later succeeded.
+    """
+    checkpoint_paths = checkpoint_paths or [default_checkpoint_path(p) for p in shard_outputs]
+    backends = [create_backend(fmt, os.path.splitext(output_path)[0], compression, row_group_size=row_group_size)
+                for fmt in formats]
+    exporter = Exporter(output_path, stream_bundle=True, compression=compression, backends=backends)
+    exporter.open()
+    seen = set()
+    per_shard = []
+    try:
+        for path, cp_path in zip(shard_outputs, checkpoint_paths):
+            records = duplicates = errors = 0
+            for record in _shard_records(path):
+                key = company_key(record.get("url") or "")
+                if key is not None and key in seen:
+                    duplicates += 1
+                    continue
+                seen.add(key)
+                exporter.write(record)
+                records += 1
+            if os.path.exists(cp_path):
+                with CheckpointStore(cp_path) as checkpoint:
+                    for url, error in checkpoint.failures():
+                        if company_key(url) not in seen:
+                            exporter.write_error(url, error or "")
+                            errors += 1
+            else:
+                log.warning("No checkpoint for shard %s; its errors are not merged.", path)
+            per_shard.append({"shard": path, "records": records, "duplicates": duplicates, "errors": errors})
+    finally:
+        exporter.close()
+    stats = {"records": exporter.records_written, "errors": exporter.errors_written, "shards": per_shard}
+    log.info("Merged %d shards into %s: %d records, %d errors", len(shard_outputs), exporter.out_path,
+             stats["records"], stats["errors"])
+    return stats
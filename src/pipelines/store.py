@@ -0,0 +1,158 @@
+import json
+import os
+import sqlite3
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.serialization import dumps
+from utils.validators import canonical_company_url, company_key
+
+# filterable columns: query() keyword -> (column, SQL comparison)
+_FILTERS = {
+    "industry": ("industry", "="),
+    "country": ("country", "="),
+    "company_size": ("company_size", "="),
+    "founded_from": ("founded", ">="),
+    "founded_to": ("founded", "<="),
+}
+
+def _int_or_none(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def _row(record: Dict[str, Any]) -> Optional[Tuple]:
+    url = record.get("url") or ""
+    key = company_key(url)
+    if key is None:
+        return None
+    address = record.get("mainAddress") if isinstance(record.get("mainAddress"), dict) else {}
+    return (key, canonical_company_url(url), record.get("name"), record.get("industry"), address.get("addressCountry"),
+            record.get("companySize"), _int_or_none(record.get("founded")),
+            _int_or_none(record.get("followersCount")), record.get("scrapedAt") or "",
+            dumps(record))
+
+class RecordStore:
+    """
+    Latest record per company in SQLite (WAL mode), keyed by company slug, so
+    outputs of every run and shard land in one indexed place.
+
+    Doubles as an Exporter backend: batches are upserted in one transaction
+    on the exporter's writer thread. A re-scrape replaces the stored record
+    unless it is older (by scrapedAt) than what is already there; every
+    scrapedAt is kept in the history table either way. Industry, country,
+    company size and founded year are indexed columns for query().
+    """
+    format = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self.records_written = 0
+
+    def open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # opened by the caller, written on the exporter's writer thread; never both at once.
+        # --shards children share one store, so wait for each other's write transactions
+        self._conn = sqlite3.connect(self.path, timeout=60.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS companies ("
+            " key TEXT PRIMARY KEY,"
+            " url TEXT NOT NULL,"
+            " name TEXT,"
+            " industry TEXT COLLATE NOCASE,"
+            " country TEXT COLLATE NOCASE,"
+            " company_size TEXT COLLATE NOCASE,"
+            " founded INTEGER,"
+            " followers INTEGER,"
+            " scraped_at TEXT NOT NULL,"
+            " record TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS companies_industry ON companies (industry);"
+            "CREATE INDEX IF NOT EXISTS companies_country ON companies (country);"
+            "CREATE INDEX IF NOT EXISTS companies_company_size ON companies (company_size);"
+            "CREATE INDEX IF NOT EXISTS companies_founded ON companies (founded);"
+            "CREATE TABLE IF NOT EXISTS history ("
+            " key TEXT NOT NULL,"
+            " scraped_at TEXT NOT NULL,"
+            " PRIMARY KEY (key, scraped_at)) WITHOUT ROWID;"
+        )
+        self._conn.commit()
+        return self
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write_batch(self, records: List[Dict[str, Any]]):
+        rows = [row for row in map(_row, records) if row is not None]
+        if not rows:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO companies (key, url, name, industry, country, company_size, founded, followers, "
+                "scraped_at, record) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET url = excluded.url, name = excluded.name, "
+                "industry = excluded.industry, country = excluded.country, company_size = excluded.company_size, "
+                "founded = excluded.founded, followers = excluded.followers, scraped_at = excluded.scraped_at, "
+                "record = excluded.record "
+                # shards and re-runs may arrive out of order: an older scrape never replaces a newer one
+                "WHERE excluded.scraped_at >= companies.scraped_at",
+                rows,
+            )
+            self._conn.executemany("INSERT OR IGNORE INTO history (key, scraped_at) VALUES (?, ?)",
+                                   [(row[0], row[8]) for row in rows])
+        self.records_written += len(rows)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """The stored record for any spelling of a company URL (or a bare slug)."""
+        key = company_key(url) or company_key(f"linkedin.com/company/{url}")
+        row = self._conn.execute("SELECT record FROM companies WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def history(self, url: str) -> List[str]:
+        """Every scrapedAt stored for a company, oldest first."""
+        key = company_key(url) or company_key(f"linkedin.com/company/{url}")
+        return [r[0] for r in self._conn.execute(
+            "SELECT scraped_at FROM history WHERE key = ? ORDER BY scraped_at", (key,))]
+
+    def _where(self, filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        clauses = []
+        params: List[Any] = []
+        for name, value in filters.items():
+            if name not in _FILTERS:
+                raise TypeError(f"Unknown filter: {name}")
+            if value is None:
+                continue
+            column, op = _FILTERS[name]
+            clauses.append(f"{column} {op} ?")
+            params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, limit: Optional[int] = None, **filters) -> Iterator[Dict[str, Any]]:
+        """
+        Records matching every given filter (industry, country, company_size:
+        case-insensitive equality; founded_from/founded_to: inclusive years).
+        """
+        where, params = self._where(filters)
+        # no ORDER BY: it would make SQLite walk the primary key instead of the filter's index
+        sql = f"SELECT record FROM companies{where}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        for (record,) in self._conn.execute(sql, params):
+            yield json.loads(record)
+
+    def count(self, **filters) -> int:
+        where, params = self._where(filters)
+        return self._conn.execute(f"SELECT COUNT(*) FROM companies{where}", params).fetchone()[0]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,337 @@
+import asyncio
+import contextlib
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Optional, Union
+
+from client.http import HttpClient
+from client.retry import FetchTask, PermanentFetchError, RetryScheduler, TransientFetchError
+from pipelines.checkpoint import CheckpointStore
+from pipelines.incremental import IncrementalTracker, PendingChange
+from pipelines.parse_stage import ParseStage
+from pipelines.schedule import TimeBudget
+from utils.logging import get_logger
+from utils.metrics import QUEUE_DEPTH, RECORDS, RETRIES, ProgressReporter
+from utils.seen import SeenSet
+from utils.validators import canonical_company_url, company_key
+
+log = get_logger(__name__)
+
+# scrape_stream(**config) keys that configure the parse stage; everything else goes to HttpClient
+_STAGE_OPTIONS = {"parse_workers": "workers", "parse_executor": "executor", "parser_engine": "engine"}
+
+class ScrapeError:
+    """A URL that could not be scraped, yielded by scrape_stream in place of its record."""
+    __slots__ = ("url", "error", "status", "attempts", "permanent")
+
+    def __init__(self, url: str, error: str, status: Optional[int] = None, attempts: int = 1,
+                 permanent: bool = False):
+        self.url = url
+        self.error = error
+        self.status = status
+        self.attempts = attempts
+        self.permanent = permanent
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"url": self.url, "error": self.error, "status": self.status,
+                "attempts": self.attempts, "permanent": self.permanent}
+
+    def __repr__(self):
+        return f"ScrapeError({self.url!r}, {self.error!r})"
+
+class StreamStats:
+    """What happened to the input URLs of one scrape_stream call."""
+    __slots__ = ("queued", "invalid", "duplicates", "already_seen", "resumed", "done", "unchanged", "failed",
+                 "retries", "deferred")
+
+    def __init__(self):
+        self.queued = self.invalid = self.duplicates = self.already_seen = self.resumed = 0
+        self.done = self.unchanged = self.failed = self.retries = self.deferred = 0
+
+    @property
+    def accepted(self) -> int:
+        """Valid, distinct URLs: queued ones plus those skipped as already scraped."""
+        return self.queued + self.already_seen + self.resumed
+
+class _InFlight:
+    """Counts URLs between enqueue and their final fetch outcome; retries waiting in the scheduler stay counted."""
+
+    def __init__(self):
+        self.count = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def add(self):
+        self.count += 1
+        self._idle.clear()
+
+    def done(self):
+        self.count -= 1
+        if self.count <= 0:
+            self._idle.set()
+
+    async def wait_idle(self):
+        await self._idle.wait()
+
+async def _iterate(urls: Union[AsyncIterable[str], Iterable[str]]) -> AsyncIterator[str]:
+    if hasattr(urls, "__aiter__"):
+        async for u in urls:
+            yield u
+    else:
+        for u in urls:
+            yield u
+
+async def _produce(urls: Union[AsyncIterable[str], Iterable[str]], queue: "asyncio.Queue[Optional[FetchTask]]",
+                   inflight: _InFlight, stats: StreamStats, checkpoint: Optional[CheckpointStore] = None,
+                   progress: Optional[ProgressReporter] = None, seen_set: Optional[SeenSet] = None,
+                   budget: Optional[TimeBudget] = None):
+    # Validate, canonicalize and dedupe lazily so the first fetch starts before the input is fully read
+    seen = set()
+    async for u in _iterate(urls):
+        key = company_key(u)
+        if key is None:
+            stats.invalid += 1
+            continue
+        if key in seen:
+            stats.duplicates += 1
+            continue
+        seen.add(key)
+        if seen_set is not None and key in seen_set:
+            stats.already_seen += 1
+            continue
+        u = canonical_company_url(u)
+        if checkpoint is not None and checkpoint.is_done(u):
+            stats.resumed += 1
+            continue
+        if budget is not None and budget.check():
+            # out of time: the rest of the input is left unread for the caller
+            budget.defer(u)
+            stats.deferred += 1
+            break
+        inflight.add()
+        await queue.put(FetchTask(u))
+        stats.queued += 1
+        if progress is not None:
+            progress.queued = stats.queued
+    if progress is not None:
+        progress.input_done = True
+    if stats.invalid or stats.duplicates:
+        log.info("Input: dropped %d invalid and %d duplicate company URLs.", stats.invalid, stats.duplicates)
+    if stats.already_seen:
+        log.info("Seen-set: skipped %d companies completed in earlier runs.", stats.already_seen)
+    if stats.resumed:
+        log.info("Resume: skipped %d URLs already completed in the checkpoint.", stats.resumed)
+
+_DONE = object()
+
+async def scrape_stream(urls: Union[AsyncIterable[str], Iterable[str]], client: Optional[HttpClient] = None,
+                        stage: Optional[ParseStage] = None, *, include_raw: bool = False,
+                        checkpoint: Optional[CheckpointStore] = None, resume: bool = False,
+                        seen_set: Optional[SeenSet] = None, tracker: Optional[IncrementalTracker] = None,
+                        progress: Optional[ProgressReporter] = None, stats: Optional[StreamStats] = None,
+                        buffer: Optional[int] = None, budget: Optional[TimeBudget] = None,
+                        **config) -> AsyncIterator[Union[Dict[str, Any], ScrapeError]]:
+    """
+    Scrapes company URLs and yields each normalized record, or a ScrapeError,
+    as soon as it is finished (not in input order).
+
+    Pass an open `client` (and `stage`) to reuse its connections and pools
+    across calls; otherwise both are built from `config`, which takes
+    HttpClient's keyword arguments plus parse_workers/parse_executor/parser_engine,
+    and closed when the stream ends. At most `buffer` finished items wait for
+    the consumer (default 2 x concurrency); when it falls behind, parsing,
+    fetching and reading `urls` pause in turn. Breaking out of the loop or
+    cancelling the consuming task stops all work; use contextlib.aclosing to
+    make that happen immediately rather than at garbage collection.
+
+    `checkpoint` and `seen_set` are marked once the consumer has taken an item;
+    with `resume`, URLs already done in the checkpoint are skipped. With an
+    incremental `tracker`, only new or changed records are yielded.
+
+    With a time `budget`, no fetch starts once it has closed: the stream
+    drains what is in flight and ends. URLs it did not start are in
+    budget.deferred, and the unread rest of `urls` is left in the iterator.
+    """
+    stage_options = {_STAGE_OPTIONS[k]: config.pop(k) for k in list(config) if k in _STAGE_OPTIONS}
+    stats = stats if stats is not None else StreamStats()
+    async with contextlib.AsyncExitStack() as stack:
+        if client is None:
+            client = await stack.enter_async_context(HttpClient(**config))
+        elif config:
+            raise TypeError(f"HttpClient options given together with a client: {', '.join(config)}")
+        if stage is None:
+            stage = stack.enter_context(ParseStage(**stage_options))
+        concurrency = client.max_concurrency
+        queue: "asyncio.Queue[Optional[FetchTask]]" = asyncio.Queue(maxsize=concurrency * 2)
+        # bounded hand-off between fetch and parse: fetchers block when parsing falls behind
+        parse_queue: "asyncio.Queue[Optional[tuple]]" = asyncio.Queue(maxsize=stage.concurrency * 2)
+        # and between parse and the consumer: parsers block when the consumer falls behind
+        results: asyncio.Queue = asyncio.Queue(maxsize=buffer or concurrency * 2)
+        # backing-off URLs wait here instead of holding a worker or a connection slot
+        retries = RetryScheduler(queue)
+        inflight = _InFlight()
+        # new/changed records waiting for the consumer, before their fingerprints are stored
+        changes: Dict[str, PendingChange] = {}
+        policy = client.retry_policy
+        QUEUE_DEPTH.clear()
+        QUEUE_DEPTH.set_function(queue.qsize, queue="fetch")
+        QUEUE_DEPTH.set_function(parse_queue.qsize, queue="parse")
+        QUEUE_DEPTH.set_function(results.qsize, queue="results")
+        QUEUE_DEPTH.set_function(lambda: len(retries), queue="retry")
+        QUEUE_DEPTH.set_function(lambda: inflight.count, queue="in_flight")
+
+        async def fail(task: FetchTask, e: Exception):
+            await results.put((task, ScrapeError(task.url, str(e), status=getattr(e, "status", None),
+                                                     attempts=task.attempt,
+                                                     permanent=isinstance(e, PermanentFetchError))))
+
+        def defer(task: FetchTask):
+            budget.defer(task.url)
+            stats.deferred += 1
+            inflight.done()
+
+        async def fetch_worker():
+            while True:
+                task = await queue.get()
+                if task is None:
+                    return
+                u = task.url
+                if budget is not None:
+                    if budget.check():
+                        defer(task)
+                        continue
+                    budget.task_started(u)
+                try:
+                    html = await client.fetch_once(u, tried=task.tried)
+                except TransientFetchError as e:
+                    if budget is not None and budget.closed and policy.should_retry(e, task.attempt):
+                        # a retry would start after the cut-off
+                        defer(task)
+                        continue
+                    if policy.should_retry(e, task.attempt):
+                        delay = policy.delay(task.attempt, e.retry_after)
+                        log.warning("%s (attempt %d). Retrying in %.1fs.", e, task.attempt, delay)
+                        RETRIES.inc()
+                        stats.retries += 1
+                        task.attempt += 1
+                        retries.schedule(task, delay)
+                        continue
+                    log.error("Failed to process %s after %d attempts: %s", u, task.attempt, e)
+                    await fail(task, e)
+                    inflight.done()
+                    continue
+                except Exception as e:
+                    # permanent failures (404, not a company page, ...) don't use up the retry budget
+                    log.error("Failed to process %s: %s", u, e)
+                    await fail(task, e)
+                    inflight.done()
+                    continue
+                await parse_queue.put((task, html))
+                inflight.done()
+
+        async def parse_worker():
+            while True:
+                item = await parse_queue.get()
+                if item is None:
+                    return
+                task, html = item
+                u = task.url
+                try:
+                    if tracker is not None:
+                        previous = tracker.previous(u)
+                        record, page_hash = await stage.parse_if_changed(
+                            html, u, include_raw, previous.page_hash if previous else None)
+                        if record is None:
+                            tracker.unchanged(u)
+                        else:
+                            change = tracker.compare(u, page_hash, record, previous)
+                            if change is None:
+                                record = None
+                            else:
+                                # committed by _finish, once the consumer has taken the record
+                                changes[u] = change
+                    else:
+                        record = await stage.parse(html, u, include_raw)
+                except Exception as e:
+                    log.exception("Failed to process %s: %s", u, e)
+                    await fail(task, e)
+                    continue
+                if record is None:
+                    # unchanged since the last run: finished, but nothing to hand to the consumer
+                    _finish(task, None)
+                    continue
+                await results.put((task, record))
+
+        def _finish(task: FetchTask, item):
+            u = task.url
+            if budget is not None:
+                budget.task_finished(u)
+            if isinstance(item, ScrapeError):
+                stats.failed += 1
+                RECORDS.inc(result="failed")
+                if checkpoint is not None:
+                    checkpoint.mark_failed(u, item.error, item.attempts)
+                return
+            if u in changes:
+                tracker.commit(changes.pop(u))
+            if checkpoint is not None:
+                checkpoint.mark_done(u, task.attempt)
+            if seen_set is not None:
+                seen_set.add(company_key(u))
+            if item is None:
+                stats.unchanged += 1
+                RECORDS.inc(result="unchanged")
+            else:
+                stats.done += 1
+                RECORDS.inc(result="done")
+            log.debug("Processed: %s", u)
+
+        async def cut_off():
+            await budget.watch()
+            # backing-off URLs would only start after the cut-off: hand them back now
+            for task in retries.drain():
+                defer(task)
+
+        async def supervise():
+            fetchers = [asyncio.create_task(fetch_worker()) for _ in range(concurrency)]
+            parsers = [asyncio.create_task(parse_worker()) for _ in range(stage.concurrency)]
+            watcher = asyncio.create_task(cut_off()) if budget is not None else None
+            try:
+                await _produce(urls, queue, inflight, stats, checkpoint if resume else None, progress, seen_set,
+                               budget)
+                await inflight.wait_idle()
+                for _ in fetchers:
+                    await queue.put(None)
+                await asyncio.gather(*fetchers)
+                for _ in parsers:
+                    await parse_queue.put(None)
+                await asyncio.gather(*parsers)
+            except BaseException as e:
+                for t in fetchers + parsers:
+                    t.cancel()
+                await asyncio.gather(*fetchers, *parsers, return_exceptions=True)
+                if not isinstance(e, asyncio.CancelledError):
+                    await results.put((None, e))
+                raise
+            finally:
+                if watcher is not None:
+                    watcher.cancel()
+            await results.put((None, _DONE))
+
+        retries.start()
+        supervisor = asyncio.create_task(supervise())
+        try:
+            while True:
+                task, item = await results.get()
+                if task is None:
+                    if item is _DONE:
+                        break
+                    raise item
+                yield item
+                # the consumer has taken the item, so it counts as finished
+                _finish(task, item)
+        finally:
+            supervisor.cancel()
+            await asyncio.gather(supervisor, return_exceptions=True)
+            await retries.stop()
+            if retries.scheduled:
+                log.info("Retries scheduled: %d", retries.scheduled)
+            QUEUE_DEPTH.clear()
@@ -2,108 +2,598 @@ import argparse
 import asyncio
 import json
 import os
+import subprocess
 import sys
-from typing import List, Dict, Any
+import time
+from typing import Iterable, List, Dict, Any, Optional, Sequence, Tuple
 
 # Ensure local imports work when running from repo root
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 if CURRENT_DIR not in sys.path:
     sys.path.insert(0, CURRENT_DIR)
 
+from client.cache import ResponseCache
+from client.concurrency import ConcurrencyLimiter
+from client.connections import ConnectionSettings
 from client.http import HttpClient
-from extractors.linkedin_company_parser import LinkedInCompanyParser
-from pipelines.normalizer import normalize_company_record
+from client.throttler import RateLimiter
+from extractors.streaming import DEFAULT_STREAM_FIELDS, STREAM_FIELDS
+from pipelines.checkpoint import CheckpointStore, default_checkpoint_path
+from pipelines.crawl import Frontier, crawl_stream, default_frontier_path
+from pipelines.archive import ArchiveWriter, replay
+from pipelines.backends import FORMAT_EXTENSIONS, create_backend, format_for_path
 from pipelines.exporter import Exporter
+from pipelines.incremental import FingerprintStore, IncrementalTracker
+from pipelines.sharding import filter_shard, merge_shards, parse_shard_spec, shard_of, shard_output_path, shard_paths
+from pipelines.parse_stage import ParseStage, default_parse_workers
+from pipelines.schedule import TimeBudget, by_priority, default_continuation_path, write_continuation
+from pipelines.store import RecordStore
+from pipelines.stream import ScrapeError, StreamStats, scrape_stream
 from utils.logging import get_logger
-from utils.validators import is_valid_linkedin_company_url, dedupe_urls
-from utils.time import now_iso_utc
+from utils.profiling import LoopLagWatchdog, SamplingProfiler
+from utils.metrics import MetricsServer, ProgressReporter, STAGE_SECONDS
+from utils.seen import SeenSet
+from utils.serialization import dumps
+from utils.inputs import InputError, iter_input_urls, iter_prioritized_urls
+from utils.time import parse_duration
+from utils.validators import company_key
 
 log = get_logger(__name__)
 
-async def process_url(client: HttpClient, url: str, include_raw: bool) -> Dict[str, Any]:
-    parser = LinkedInCompanyParser()
-    html = await client.get_text(url)
-    parsed = parser.parse(html, base_url=url, include_raw=include_raw)
-    normalized = normalize_company_record(parsed)
-    normalized["url"] = url if not normalized.get("url") else normalized["url"]
-    normalized["scrapedAt"] = normalized.get("scrapedAt") or now_iso_utc()
-    return normalized
-
-async def run(urls: List[str], output_path: str, concurrent: int, timeout: int, proxy_file: str = None,
-              user_agent: str = None, include_raw: bool = False) -> None:
-    urls = [u.strip() for u in urls if u and is_valid_linkedin_company_url(u)]
-    urls = dedupe_urls(urls)
-    if not urls:
-        log.error("No valid LinkedIn company URLs provided.")
-        return
-
-    exporter = Exporter(output_path)
+async def run(urls: Iterable[str], output_path: str, concurrent: int, timeout: int, proxy_file: str = None,
+              user_agent: str = None, include_raw: bool = False,
+              exporter_options: Optional[Dict[str, Any]] = None,
+              parse_workers: int = 0, parse_executor: str = "process", parser_engine: str = "auto",
+              resume: bool = False, checkpoint_path: Optional[str] = None,
+              cache_dir: Optional[str] = None, cache_ttl: float = 86400.0, cache_max_mb: int = 1024,
+              rate: Optional[float] = None, burst: Optional[int] = None, adaptive_rate: bool = True,
+              metrics_port: Optional[int] = None, stats_interval: float = 0.0,
+              progress_interval: float = 10.0, profile: bool = False, lag_threshold: float = 0.25,
+              incremental: bool = False, fingerprints_path: Optional[str] = None,
+              formats: Sequence[str] = (), row_group_size: int = 10000,
+              seen_db: Optional[str] = None, stream_fields: Optional[Sequence[str]] = None,
+              byte_cap: Optional[int] = None, max_body_bytes: Optional[int] = 10 * 1024 * 1024,
+              connections: Optional[ConnectionSettings] = None,
+              archive_dir: Optional[str] = None, archive_segment_bytes: int = 256 * 1024 * 1024,
+              archive_compression: str = "gzip", autotune: bool = False, min_concurrency: int = 1,
+              max_concurrency: Optional[int] = None, store_path: Optional[str] = None,
+              crawl: bool = False, crawl_depth: int = 1, crawl_budget: Optional[int] = None,
+              frontier_path: Optional[str] = None, time_budget: Optional[float] = None,
+              continuation_path: Optional[str] = None, priorities: Optional[Dict[str, float]] = None) -> None:
+    exporter_options = exporter_options or {}
+    backends = [create_backend(fmt, os.path.splitext(output_path)[0], exporter_options.get("compression"),
+                               row_group_size=row_group_size, append=resume) for fmt in formats]
+    if store_path:
+        backends.append(RecordStore(store_path))
+    exporter = Exporter(output_path, append=resume, backends=backends, **exporter_options)
     exporter.open()
+    # a fresh run starts a fresh checkpoint; --resume keeps it and skips completed URLs
+    # done only once the record is in the JSONL: --resume must never skip a URL whose record a crash lost
+    checkpoint = CheckpointStore(checkpoint_path or default_checkpoint_path(output_path), reset=not resume,
+                                 commit_after=exporter.after_writes)
+    checkpoint.open()
+    seen_set = SeenSet(seen_db, commit_after=exporter.after_writes).open() if seen_db else None
+    tracker = None
+    if incremental:
+        base = os.path.splitext(output_path)[0]
+        # fingerprints outlive the run: they are what the next run compares against
+        tracker = IncrementalTracker(FingerprintStore(fingerprints_path or f"{base}.fingerprints.db",
+                                                      commit_after=exporter.after_writes),
+                                     f"{base}.changes.jsonl").open()
+    cache = ResponseCache(cache_dir, ttl=cache_ttl, max_bytes=cache_max_mb * 1024 * 1024) if cache_dir else None
+    archive = ArchiveWriter(archive_dir, archive_segment_bytes, archive_compression).open() if archive_dir else None
+    frontier = None
+    if crawl:
+        # the input URLs are seeds; like the checkpoint, the frontier starts over unless resuming
+        frontier = Frontier(frontier_path or default_frontier_path(output_path), max_depth=crawl_depth,
+                            budget=crawl_budget, reset=not resume, commit_after=exporter.after_writes).open()
+    # with autotune, `concurrent` is only the starting window; pools and rate default to the upper bound
+    limiter = ConcurrencyLimiter(concurrent, adaptive=autotune, min_limit=min_concurrency,
+                                 max_limit=(max_concurrency or concurrent * 4) if autotune else concurrent)
+    ceiling = limiter.max_limit
+    budget = None
+    if time_budget:
+        # without a finished URL to go by, assume a fetch can take up to its timeout
+        budget = TimeBudget(time_budget, initial_estimate=min(timeout, time_budget / 4)).start()
+        # whatever the stream does not read stays here for the continuation file
+        urls = iter(urls)
 
     async with HttpClient(
-        max_concurrency=concurrent,
+        max_concurrency=ceiling,
         timeout=timeout,
         proxy_file=proxy_file,
         user_agent=user_agent,
+        cache=cache,
+        rate_limiter=RateLimiter(rate=rate or ceiling * 4, burst=burst or ceiling, adaptive=adaptive_rate),
+        stream_fields=stream_fields,
+        byte_cap=byte_cap,
+        max_body_bytes=max_body_bytes,
+        connections=connections,
+        archive=archive,
+        concurrency=limiter,
     ) as client:
 
-        sem = asyncio.Semaphore(concurrent)
-
-        async def worker(u: str):
-            async with sem:
-                try:
-                    record = await process_url(client, u, include_raw)
-                    exporter.write(record)
-                    log.info("Processed: %s", u)
-                except Exception as e:
-                    log.exception("Failed to process %s: %s", u, e)
-                    exporter.write_error(u, str(e))
-
-        tasks = [asyncio.create_task(worker(u)) for u in urls]
-        await asyncio.gather(*tasks)
-
-    exporter.close()
-    log.info("Done. Wrote %d records to %s", exporter.records_written, output_path)
-
-def read_input_urls(path: str) -> List[str]:
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    if isinstance(data, dict) and "urls" in data and isinstance(data["urls"], list):
-        return data["urls"]
-    if isinstance(data, list):
-        return data
-    raise ValueError("Unsupported input file format. Expecting { 'urls': [...] } or a list of URLs.")
+        with ParseStage(workers=parse_workers, executor=parse_executor, engine=parser_engine) as stage:
+            progress = ProgressReporter(interval=progress_interval, stats_interval=stats_interval,
+                                        expected=len(urls) if hasattr(urls, "__len__") and not crawl else None)
+            metrics_server = MetricsServer(metrics_port) if metrics_port else None
+            stats = StreamStats()
+            progress.start()
+            watchdog = LoopLagWatchdog(threshold=lag_threshold) if profile else None
+            profiler = SamplingProfiler() if profile else None
+            if profile:
+                watchdog.start()
+                profiler.start()
+            try:
+                if metrics_server is not None:
+                    await metrics_server.start()
+                # the CLI is one consumer of the stream: records and errors go to the output files
+                options = dict(include_raw=include_raw, checkpoint=checkpoint, resume=resume, seen_set=seen_set,
+                               tracker=tracker, progress=progress, stats=stats, budget=budget)
+                if frontier is not None:
+                    items = crawl_stream(urls, frontier, client, stage, **options)
+                else:
+                    items = scrape_stream(urls, client, stage, **options)
+                async for item in items:
+                    if isinstance(item, ScrapeError):
+                        exporter.write_error(item.url, item.error)
+                        continue
+                    started = time.perf_counter()
+                    exporter.write(item)
+                    STAGE_SECONDS.observe(time.perf_counter() - started, stage="export")
+            finally:
+                if profile:
+                    watchdog.stop()
+                    profiler.stop()
+                    flat_path, collapsed_path = profiler.write(os.path.splitext(output_path)[0])
+                    log.info("Profile: %s, %s (max loop lag %.0fms, %d stalls over %.0fms)", flat_path,
+                             collapsed_path, watchdog.max_lag * 1000, watchdog.stalls, lag_threshold * 1000)
+                await progress.stop()
+                if metrics_server is not None:
+                    await metrics_server.stop()
+                exporter.close()
+                checkpoint.close()
+                if seen_set is not None:
+                    seen_set.close()
+                if tracker is not None:
+                    tracker.close()
+                    log.info("Incremental: %s (changes in %s)", tracker.counts, tracker.changes_path)
+                if archive is not None:
+                    archive.close()
+                if frontier is not None:
+                    log.info("Crawl frontier: %s, %d links over the budget (%s)", frontier.counts(), frontier.dropped,
+                             frontier.path)
+                    frontier.close()
+                if cache is not None:
+                    log.info("Cache: %s", cache.stats())
+                    cache.close()
+                log.info("Rate limits (req/s): %s", client.rate_limiter.rates())
+                if autotune:
+                    log.info("Concurrency window: %s", limiter.report())
+                if budget is not None:
+                    path = continuation_path or default_continuation_path(output_path)
+                    left = write_continuation(path, budget.deferred + list(urls), priorities)
+                    log.info("Time budget: %s; %d URLs left for the next run in %s", budget.report(), left, path)
+                for row in client.proxy_report():
+                    log.info("Proxy stats: %s", row)
+                for row in client.pool_report():
+                    log.info("Connection pool: %s", row)
+                log.info("Stage latency: %s", STAGE_SECONDS.snapshot())
+
+    if not stats.accepted:
+        log.error("No valid LinkedIn company URLs provided.")
+        return
+    log.info("Done. Wrote %d records to %s", exporter.records_written, exporter.out_path)
+
+def _strip_option(argv: List[str], name: str) -> List[str]:
+    out = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg == name:
+            skip = True
+        elif not arg.startswith(name + "="):
+            out.append(arg)
+    return out
+
+def _resolve_formats(output: str, format_args: Optional[List[str]]) -> Tuple[str, List[str]]:
+    """
+    Extra output formats from --format and the output extension. JSON/JSONL is
+    always written (resume and merge read it); for `-o out.parquet` it goes to out.json.
+    """
+    formats = []
+    for arg in format_args or []:
+        formats += [f.strip() for f in arg.split(",") if f.strip()]
+    by_extension = format_for_path(output)
+    if by_extension:
+        formats.append(by_extension)
+        for suffix in (".gz", ".zst"):
+            if output.endswith(suffix):
+                output = output[:-len(suffix)]
+        output = os.path.splitext(output)[0] + ".json"
+    unknown = [f for f in formats if f != "json" and f not in FORMAT_EXTENSIONS]
+    if unknown:
+        raise ValueError(f"Unsupported output format(s): {', '.join(unknown)}")
+    return output, list(dict.fromkeys(f for f in formats if f != "json"))
+
+def _run_shards(args, argv: List[str]) -> int:
+    """--shards N: runs N copies of this runner with --shard i/N as child processes, then merges their outputs."""
+    count = args.shards
+    child_argv = _strip_option(argv, "--shards")
+    if "--parse-workers" not in child_argv and not any(a.startswith("--parse-workers=") for a in child_argv):
+        # split the cores between the shards instead of giving each shard a full pool
+        child_argv += ["--parse-workers", str((os.cpu_count() or 1) // count)]
+    procs = []
+    for i in range(count):
+        shard_argv = child_argv + ["--shard", f"{i}/{count}"]
+        if args.metrics_port:
+            shard_argv = _strip_option(shard_argv, "--metrics-port") + ["--metrics-port", str(args.metrics_port + i)]
+        procs.append(subprocess.Popen([sys.executable, os.path.abspath(__file__)] + shard_argv))
+    failed = [i for i, p in enumerate(procs) if p.wait() != 0]
+    if failed:
+        log.error("Shards %s exited with errors; merging what they wrote.", failed)
+    output, formats = _resolve_formats(args.output, args.format)
+    merge_shards(shard_paths(output, count), output, compression=args.compress, formats=formats,
+                 row_group_size=args.row_group_size)
+    return 1 if failed else 0
+
+def merge_main(argv: List[str]):
+    ap = argparse.ArgumentParser(prog="runner.py merge",
+                                 description="Merge shard outputs into one deduplicated bundle and JSONL.")
+    ap.add_argument("--output", "-o", required=True, help="Merged output path (the -o given to the shards).")
+    ap.add_argument("--shards", type=int, default=None,
+                    help="Number of shards; their outputs are found next to --output.")
+    ap.add_argument("--compress", choices=["gzip", "zstd"], default=None, help="Compress the merged outputs.")
+    ap.add_argument("--format", "-f", action="append", default=None,
+                    help="Extra output formats, comma-separated or repeated: csv (flattened), parquet, arrow. "
+                         "An output path ending in .csv/.parquet/.arrow selects its format too. "
+                         "Parquet/Arrow require the 'pyarrow' package.")
+    ap.add_argument("--row-group-size", type=int, default=10000, help="Records per Parquet row group / Arrow batch.")
+    ap.add_argument("inputs", nargs="*", help="Shard output paths, instead of --shards.")
+    args = ap.parse_args(argv)
+    if not args.inputs and not args.shards:
+        ap.error("give shard output paths or --shards N")
+    try:
+        output, formats = _resolve_formats(args.output, args.format)
+    except ValueError as e:
+        ap.error(str(e))
+    paths = args.inputs or shard_paths(output, args.shards)
+    stats = merge_shards(paths, output, compression=args.compress, formats=formats,
+                         row_group_size=max(1, args.row_group_size))
+    print(json.dumps(stats, indent=2))
+
+def replay_main(argv: List[str]):
+    ap = argparse.ArgumentParser(prog="runner.py replay",
+                                 description="Re-parse pages captured with --archive, on all cores, without fetching.")
+    ap.add_argument("archive", help="Archive directory written by --archive.")
+    ap.add_argument("--output", "-o", required=True, help="Output path, as for a normal run.")
+    ap.add_argument("--workers", "-w", type=int, default=default_parse_workers(), help="Parse processes.")
+    ap.add_argument("--parser-engine", choices=["auto", "fast", "soup"], default="auto",
+                    help="Page parser; see the main command.")
+    ap.add_argument("--include-raw", action="store_true", help="Include rawHtml snippet in the output records.")
+    ap.add_argument("--all-captures", action="store_true",
+                    help="Replay every capture instead of only the latest one per company.")
+    ap.add_argument("--batch-size", type=int, default=200, help="Pages per worker task.")
+    ap.add_argument("--compress", choices=["gzip", "zstd"], default=None, help="Compress the outputs.")
+    ap.add_argument("--format", "-f", action="append", default=None,
+                    help="Extra output formats, comma-separated or repeated: csv (flattened), parquet, arrow.")
+    ap.add_argument("--row-group-size", type=int, default=10000, help="Records per Parquet row group / Arrow batch.")
+    ap.add_argument("--store", default=None, help="Also upsert the records into this SQLite record store.")
+    args = ap.parse_args(argv)
+    if not os.path.isdir(args.archive):
+        ap.error(f"archive directory not found: {args.archive}")
+    try:
+        output, formats = _resolve_formats(args.output, args.format)
+    except ValueError as e:
+        ap.error(str(e))
+    backends = [create_backend(fmt, os.path.splitext(output)[0], args.compress,
+                               row_group_size=max(1, args.row_group_size)) for fmt in formats]
+    if args.store:
+        backends.append(RecordStore(args.store))
+    exporter = Exporter(output, stream_bundle=True, compression=args.compress, backends=backends)
+    exporter.open()
+    try:
+        stats = replay(args.archive, exporter, workers=max(1, args.workers), include_raw=args.include_raw,
+                       engine=args.parser_engine, latest_only=not args.all_captures,
+                       batch_size=max(1, args.batch_size))
+    finally:
+        exporter.close()
+    print(json.dumps(stats, indent=2))
+
+def query_main(argv: List[str]):
+    ap = argparse.ArgumentParser(prog="runner.py query",
+                                 description="Look up or filter companies in a --store database, as JSONL.")
+    ap.add_argument("store", help="Record store written with --store.")
+    ap.add_argument("urls", nargs="*", help="Company URLs or slugs to look up (filters are ignored then).")
+    ap.add_argument("--industry", default=None, help="Exact industry, case-insensitive.")
+    ap.add_argument("--country", default=None, help="mainAddress.addressCountry, case-insensitive.")
+    ap.add_argument("--company-size", default=None, help='Exact companySize, e.g. "51-200 employees".')
+    ap.add_argument("--founded-from", type=int, default=None, help="Founded in or after this year.")
+    ap.add_argument("--founded-to", type=int, default=None, help="Founded in or before this year.")
+    ap.add_argument("--limit", type=int, default=None, help="At most N records.")
+    ap.add_argument("--count", action="store_true", help="Print the number of matches instead of the records.")
+    ap.add_argument("--history", action="store_true", help="With URLs: print every scrapedAt instead of the record.")
+    ap.add_argument("--output", "-o", default=None, help="Write the JSONL here instead of stdout.")
+    args = ap.parse_args(argv)
+    if not os.path.exists(args.store):
+        ap.error(f"store not found: {args.store}")
+    filters = {"industry": args.industry, "country": args.country, "company_size": args.company_size,
+               "founded_from": args.founded_from, "founded_to": args.founded_to}
+    with RecordStore(args.store) as store:
+        if args.count:
+            print(store.count(**filters))
+            return
+        out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        try:
+            if args.urls:
+                for url in args.urls:
+                    item = {"url": url, "scrapedAt": store.history(url)} if args.history else store.get(url)
+                    if item is None:
+                        log.warning("Not in the store: %s", url)
+                        continue
+                    out.write(dumps(item) + "\n")
+            else:
+                for record in store.query(limit=args.limit, **filters):
+                    out.write(dumps(record) + "\n")
+        finally:
+            if out is not sys.stdout:
+                out.close()
 
 def main():
-    ap = argparse.ArgumentParser(description="Bulk LinkedIn Company Scraper runner")
+    if len(sys.argv) > 1 and sys.argv[1] == "merge":
+        return merge_main(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "replay":
+        return replay_main(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "query":
+        return query_main(sys.argv[2:])
+    ap = argparse.ArgumentParser(description="Bulk LinkedIn Company Scraper runner. "
+                                             "Use 'runner.py merge -h' to combine shard outputs, "
+                                             "'runner.py replay -h' to re-parse an --archive and "
+                                             "'runner.py query -h' to search a --store.")
     ap.add_argument("--inputs", "-i", default=os.path.join(os.path.dirname(CURRENT_DIR), "data", "inputs.sample.json"),
-                    help="Path to a JSON file containing { 'urls': [...] } or a JSON array of URLs.")
+                    help="Path to a JSON file containing { 'urls': [...] } or a JSON array of URLs, "
+                         "an NDJSON file, or a text file with one URL per line. Read lazily.")
     ap.add_argument("--output", "-o", default=os.path.join(os.path.dirname(CURRENT_DIR), "data", "out.json"),
-                    help="Path to the output JSON file (pretty-printed). Also writes a .jsonl alongside.")
-    ap.add_argument("--concurrency", "-c", type=int, default=8, help="Max concurrent requests.")
+                    help="Path to the output JSON file (one record per line). Also writes a .jsonl alongside.")
+    ap.add_argument("--concurrency", "-c", type=int, default=8,
+                    help="Max concurrent requests (with --autotune, the starting window).")
+    ap.add_argument("--autotune", action="store_true",
+                    help="Resize the concurrency window during the run (AIMD): grow while responses stay fast, "
+                         "cut it on 403/429 blocks, timeouts or rising latency.")
+    ap.add_argument("--min-concurrency", type=int, default=1, help="Lower bound of the --autotune window.")
+    ap.add_argument("--max-concurrency", type=int, default=None,
+                    help="Upper bound of the --autotune window (defaults to 4 x --concurrency).")
     ap.add_argument("--timeout", "-t", type=int, default=30, help="Per-request timeout (seconds).")
     ap.add_argument("--proxies", "-p", default=os.path.join(CURRENT_DIR, "config", "proxies.example.txt"),
                     help="Path to a proxies file (optional).")
     ap.add_argument("--user-agent", "-ua", default="Mozilla/5.0 (compatible; BitbashLinkedInScraper/1.0)",
                     help="Override User-Agent header.")
     ap.add_argument("--include-raw", action="store_true", help="Include rawHtml snippet in the output records.")
+    ap.add_argument("--stream-bundle", action="store_true",
+                    help="Stream the JSON bundle to disk as records arrive instead of holding it in memory.")
+    ap.add_argument("--compress", choices=["gzip", "zstd"], default=None,
+                    help="Compress the JSON/JSONL outputs (zstd requires the 'zstandard' package).")
+    ap.add_argument("--rotate-every", type=int, default=0,
+                    help="Start a new numbered .jsonl part every N records (0 disables rotation).")
+    ap.add_argument("--flush-batch", type=int, default=200, help="Records buffered per output write batch.")
+    ap.add_argument("--parse-workers", type=int, default=default_parse_workers(),
+                    help="Pool workers used to parse pages off the event loop (0 parses inline). Defaults to CPU count.")
+    ap.add_argument("--parse-executor", choices=["process", "thread"], default="process",
+                    help="Pool type for the parse stage.")
+    ap.add_argument("--parser-engine", choices=["auto", "fast", "soup"], default="auto",
+                    help="'fast' scans the markup without a DOM, 'soup' always builds a BeautifulSoup tree, "
+                         "'auto' scans first and falls back to soup when required fields are missing.")
+    ap.add_argument("--format", "-f", action="append", default=None,
+                    help="Extra output formats, comma-separated or repeated: csv (flattened), parquet, arrow. "
+                         "An output path ending in .csv/.parquet/.arrow selects its format too. "
+                         "Parquet/Arrow require the 'pyarrow' package.")
+    ap.add_argument("--row-group-size", type=int, default=10000, help="Records per Parquet row group / Arrow batch.")
+    ap.add_argument("--store", default=None,
+                    help="Also upsert every record into this SQLite record store, shared across runs and shards "
+                         "and searchable with 'runner.py query'.")
+    ap.add_argument("--resume", action="store_true",
+                    help="Skip URLs completed in the checkpoint, retry failed ones and append to existing outputs.")
+    ap.add_argument("--checkpoint", default=None,
+                    help="Path to the checkpoint database (defaults to <output>.checkpoint.db).")
+    ap.add_argument("--cache-dir", default=None,
+                    help="Directory for the on-disk HTTP response cache (disabled when omitted).")
+    ap.add_argument("--cache-ttl", type=float, default=86400.0,
+                    help="Seconds a cached page is served without revalidation.")
+    ap.add_argument("--cache-max-mb", type=int, default=1024, help="Size cap for cached bodies; LRU eviction above it.")
+    ap.add_argument("--rate", type=float, default=None,
+                    help="Requests per second per host and proxy "
+                         "(defaults to 4 x concurrency, or 4 x --max-concurrency with --autotune).")
+    ap.add_argument("--burst", type=int, default=None, help="Token bucket burst size (defaults to concurrency).")
+    ap.add_argument("--no-adaptive-rate", action="store_true",
+                    help="Keep --rate fixed instead of adjusting it from 403/429/error feedback.")
+    ap.add_argument("--metrics-port", type=int, default=None,
+                    help="Serve Prometheus metrics at http://127.0.0.1:PORT/metrics during the run.")
+    ap.add_argument("--stats-interval", type=float, default=0.0,
+                    help="Log a JSON line with all metrics every N seconds (0 disables).")
+    ap.add_argument("--progress-interval", type=float, default=10.0,
+                    help="Seconds between progress lines with records/sec and ETA (0 disables).")
+    ap.add_argument("--profile", action="store_true",
+                    help="Sample stacks during the run and write <output>.profile.txt and .profile.collapsed; "
+                         "also logs the blocking stack whenever the event loop stalls.")
+    ap.add_argument("--lag-threshold", type=float, default=0.25,
+                    help="Event-loop stall (seconds) that triggers a stack dump in --profile mode.")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Compare each page with the previous run's fingerprint: skip parsing unchanged pages, "
+                         "export only new/changed records and append field-level diffs to <output>.changes.jsonl.")
+    ap.add_argument("--fingerprints", default=None,
+                    help="Fingerprint database for --incremental (defaults to <output>.fingerprints.db).")
+    ap.add_argument("--seen-db", default=None,
+                    help="Persistent set of companies already scraped (SQLite plus a Bloom filter); "
+                         "companies in it are skipped and every success is added, across runs.")
+    ap.add_argument("--stream", action="store_true",
+                    help="Read bodies in chunks and close the connection once the --stream-fields were found.")
+    ap.add_argument("--stream-fields", default=",".join(DEFAULT_STREAM_FIELDS),
+                    help=f"Comma-separated record fields --stream waits for (any of: {', '.join(STREAM_FIELDS)}).")
+    ap.add_argument("--byte-cap", type=int, default=0,
+                    help="Stop reading a body after N KiB and parse what arrived (0 = no cap).")
+    ap.add_argument("--max-body-mb", type=float, default=10.0,
+                    help="Fail pages whose body exceeds this size instead of buffering it (0 = unlimited).")
+    ap.add_argument("--conn-limit", type=int, default=None,
+                    help="Open connections per pool, i.e. per proxy (defaults to concurrency; 0 = unlimited).")
+    ap.add_argument("--conn-limit-per-host", type=int, default=None,
+                    help="Open connections per host within a pool (defaults to concurrency; 0 = unlimited).")
+    ap.add_argument("--dns-ttl", type=float, default=300.0, help="Seconds DNS answers are cached (0 disables).")
+    ap.add_argument("--keepalive", type=float, default=30.0,
+                    help="Seconds an idle connection is kept for reuse (0 closes it after every response).")
+    ap.add_argument("--no-compression", action="store_true",
+                    help="Ask for uncompressed bodies instead of gzip/deflate (and br with the 'brotli' package).")
+    ap.add_argument("--archive", default=None,
+                    help="Directory to capture every fetched response into (compressed WARC segments with an "
+                         "offset index), for 'runner.py replay'.")
+    ap.add_argument("--archive-segment-mb", type=int, default=256, help="Size at which archive segments roll over.")
+    ap.add_argument("--archive-compression", choices=["gzip", "zstd"], default="gzip",
+                    help="Per-record compression of archive segments.")
+    ap.add_argument("--crawl", action="store_true",
+                    help="Treat the inputs as seeds and also scrape the companies their similar/affiliated pages "
+                         "link to, breadth-first with the most-linked companies first.")
+    ap.add_argument("--crawl-depth", type=int, default=1, help="Link hops from the seeds followed by --crawl.")
+    ap.add_argument("--crawl-budget", type=int, default=0,
+                    help="Stop admitting companies to the crawl after N, seeds included (0 = no limit).")
+    ap.add_argument("--frontier", default=None,
+                    help="Crawl frontier database (defaults to <output>.frontier.db); kept with --resume.")
+    ap.add_argument("--time-budget", type=parse_duration, default=None,
+                    help="Finish within this wall-clock time (e.g. 5400, 90m, 2h): URLs are taken highest priority "
+                         "first, no fetch starts once the time left only covers draining the ones in flight, and "
+                         "the unfinished rest is written to --continuation.")
+    ap.add_argument("--by-priority", action="store_true",
+                    help="Scrape input URLs highest \"priority\" first (input objects may carry one; default 0). "
+                         "Reads the whole input before starting; implied by --time-budget.")
+    ap.add_argument("--continuation", default=None,
+                    help="Where --time-budget writes the URLs it did not get to, as NDJSON inputs for the next run "
+                         "(defaults to <output>.continuation.jsonl).")
+    ap.add_argument("--shard", default=None,
+                    help="Run only shard i of N (i/N, 0-based), partitioned by a stable hash of the company slug. "
+                         "Output and checkpoint go to <output>.shard-iii-of-NNN.*")
+    ap.add_argument("--shards", type=int, default=0,
+                    help="Run N shards as local child processes, then merge them into --output.")
     args = ap.parse_args()
 
+    if not os.path.exists(args.inputs):
+        print(f"Failed to read inputs from {args.inputs}: file not found", file=sys.stderr)
+        sys.exit(1)
+    if args.crawl and (args.incremental or args.shard or args.shards > 1):
+        ap.error("--crawl cannot be combined with --incremental, --shard or --shards")
+    if args.crawl and (args.time_budget or args.by_priority):
+        # the frontier has its own order, and a stopped crawl continues with --resume
+        ap.error("--crawl cannot be combined with --time-budget or --by-priority")
+    if args.shards > 1:
+        if args.shard:
+            ap.error("--shard and --shards are mutually exclusive")
+        sys.exit(_run_shards(args, sys.argv[1:]))
     try:
-        urls = read_input_urls(args.inputs)
-    except Exception as e:
+        args.output, formats = _resolve_formats(args.output, args.format)
+    except ValueError as e:
+        ap.error(str(e))
+    stream_fields = [f.strip() for f in args.stream_fields.split(",") if f.strip()] if args.stream else None
+    unknown = [f for f in stream_fields or () if f not in STREAM_FIELDS]
+    if unknown:
+        ap.error(f"unknown --stream-fields: {', '.join(unknown)}")
+    if args.archive and (args.stream or args.byte_cap):
+        ap.error("--archive captures whole pages and cannot be combined with --stream or --byte-cap")
+    started = time.monotonic()
+    urls = iter_input_urls(args.inputs)
+    if args.shard:
+        try:
+            index, count = parse_shard_spec(args.shard)
+        except ValueError as e:
+            ap.error(str(e))
+        urls = filter_shard(urls, index, count)
+        args.output = shard_output_path(args.output, index, count)
+        if args.checkpoint:
+            args.checkpoint = shard_output_path(args.checkpoint, index, count)
+        if args.continuation:
+            args.continuation = shard_output_path(args.continuation, index, count)
+    priorities = None
+    if args.time_budget or args.by_priority:
+        entries = iter_prioritized_urls(args.inputs)
+        if args.shard:
+            entries = (e for e in entries if shard_of(e[0].strip(), count) == index)
+        try:
+            entries = by_priority(entries)
+        except InputError as e:
+            print(f"Failed to read inputs from {args.inputs}: {e}", file=sys.stderr)
+            sys.exit(1)
+        urls = [u for u, _ in entries]
+        # only what the continuation file needs: non-default priorities by company
+        priorities = {company_key(u): p for u, p in entries if p}
+        priorities.pop(None, None)
+    time_budget = None
+    if args.time_budget:
+        # reading and ordering the input is part of the window
+        time_budget = max(1.0, args.time_budget - (time.monotonic() - started))
+
+    try:
+        asyncio.run(run(
+            urls=urls,
+            output_path=args.output,
+            concurrent=max(1, args.concurrency),
+            timeout=max(5, args.timeout),
+            proxy_file=args.proxies if os.path.exists(args.proxies) else None,
+            user_agent=args.user_agent,
+            include_raw=args.include_raw,
+            exporter_options={
+                "stream_bundle": args.stream_bundle,
+                "compression": args.compress,
+                "rotate_every": max(0, args.rotate_every),
+                "batch_size": max(1, args.flush_batch),
+            },
+            parse_workers=max(0, args.parse_workers),
+            parse_executor=args.parse_executor,
+            parser_engine=args.parser_engine,
+            resume=args.resume,
+            checkpoint_path=args.checkpoint,
+            cache_dir=args.cache_dir,
+            cache_ttl=max(0.0, args.cache_ttl),
+            cache_max_mb=max(1, args.cache_max_mb),
+            rate=args.rate if args.rate and args.rate > 0 else None,
+            burst=max(1, args.burst) if args.burst else None,
+            adaptive_rate=not args.no_adaptive_rate,
+            metrics_port=args.metrics_port,
+            stats_interval=max(0.0, args.stats_interval),
+            progress_interval=max(0.0, args.progress_interval),
+            profile=args.profile,
+            lag_threshold=max(0.01, args.lag_threshold),
+            incremental=args.incremental,
+            fingerprints_path=args.fingerprints,
+            formats=formats,
+            row_group_size=max(1, args.row_group_size),
+            seen_db=args.seen_db,
+            stream_fields=stream_fields,
+            byte_cap=args.byte_cap * 1024 if args.byte_cap > 0 else None,
+            max_body_bytes=int(args.max_body_mb * 1024 * 1024) if args.max_body_mb > 0 else None,
+            connections=ConnectionSettings(
+                limit=max(0, args.conn_limit) if args.conn_limit is not None else None,
+                limit_per_host=max(0, args.conn_limit_per_host) if args.conn_limit_per_host is not None else None,
+                dns_ttl=max(0.0, args.dns_ttl),
+                keepalive_timeout=max(0.0, args.keepalive),
+                force_close=args.keepalive <= 0,
+                compression=not args.no_compression,
+            ),
+            archive_dir=args.archive,
+            archive_segment_bytes=max(1, args.archive_segment_mb) * 1024 * 1024,
+            archive_compression=args.archive_compression,
+            autotune=args.autotune,
+            min_concurrency=max(1, args.min_concurrency),
+            max_concurrency=max(1, args.max_concurrency) if args.max_concurrency else None,
+            store_path=args.store,
+            crawl=args.crawl,
+            crawl_depth=max(0, args.crawl_depth),
+            crawl_budget=args.crawl_budget if args.crawl_budget > 0 else None,
+            frontier_path=args.frontier,
+            time_budget=time_budget,
+            continuation_path=args.continuation,
+            priorities=priorities,
+        ))
+    except InputError as e:
+        # the input is read lazily, as the stream goes; anything else propagates as it is
         print(f"Failed to read inputs from {args.inputs}: {e}", file=sys.stderr)
         sys.exit(1)
 
-    asyncio.run(run(
-        urls=urls,
-        output_path=args.output,
-        concurrent=max(1, args.concurrency),
-        timeout=max(5, args.timeout),
-        proxy_file=args.proxies if os.path.exists(args.proxies) else None,
-        user_agent=args.user_agent,
-        include_raw=args.include_raw
-    ))
-
 if __name__ == "__main__":
     main()
\ No newline at end of file
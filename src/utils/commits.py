@@ -0,0 +1,34 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, Optional
+
+# takes a commit and runs it later, e.g. Exporter.after_writes; returns a Future, or None if it already ran
+CommitAfter = Callable[[Callable[[], None]], Optional[Future]]
+
+class DeferredCommits:
+    """
+    Batch commits of a SQLite store, run through `commit_after` when given or
+    inline otherwise. The runner passes Exporter.after_writes, so a batch is
+    committed on the exporter's writer thread once the records before it are
+    written, and neither wait happens on the event loop. The store's
+    connection is then shared with that thread: every use of it holds `lock`.
+    """
+    def __init__(self, commit_after: Optional[CommitAfter] = None):
+        self.commit_after = commit_after
+        self.lock = threading.Lock()
+        self._futures: List[Future] = []
+
+    def submit(self, commit: Callable[[], None]):
+        if self.commit_after is None:
+            commit()
+            return
+        future = self.commit_after(commit)
+        if future is not None:
+            self._futures = [f for f in self._futures if not f.done()]
+            self._futures.append(future)
+
+    def wait(self):
+        """Blocks until every submitted commit has run, re-raising its error."""
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
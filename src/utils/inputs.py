@@ -0,0 +1,150 @@
+import itertools
+import json
+import math
+import re
+from typing import Iterator, IO, Any, Optional, Tuple
+
+_CHUNK_SIZE = 64 * 1024
+_URLS_KEY_RE = re.compile(r'"urls"\s*:\s*\[')
+_decoder = json.JSONDecoder()
+
+class InputError(ValueError):
+    """The input file is not a readable list of URLs. Raised lazily, when the bad entry is read."""
+
+def _entry_url(entry: Any) -> Optional[str]:
+    if isinstance(entry, str):
+        return entry
+    if isinstance(entry, dict) and isinstance(entry.get("url"), str):
+        return entry["url"]
+    return None
+
+def _iter_json_array(fh: IO[str], buf: str) -> Iterator[Any]:
+    """
+    Incrementally decodes the elements of a JSON array whose opening '[' has
+    already been consumed from `buf`. Only one chunk is held in memory at a time.
+    """
+    eof = False
+    pos = 0
+    while True:
+        # skip whitespace and separators
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(buf):
+            if eof:
+                raise ValueError("Unexpected end of input inside JSON array.")
+            buf = fh.read(_CHUNK_SIZE)
+            eof = not buf
+            pos = 0
+            continue
+        if buf[pos] == "]":
+            return
+        try:
+            value, end = _decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            more = fh.read(_CHUNK_SIZE)
+            eof = not more
+            buf = buf[pos:] + more
+            pos = 0
+            continue
+        if end == len(buf) and not eof:
+            # a bare number/literal might continue in the next chunk
+            more = fh.read(_CHUNK_SIZE)
+            if more:
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+            eof = True
+        yield value
+        pos = end
+        if pos > _CHUNK_SIZE:
+            buf = buf[pos:]
+            pos = 0
+
+def _iter_lines(lines: Iterator[str]) -> Iterator[Any]:
+    for raw in lines:
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line[0] in '{"':
+            yield json.loads(line)
+        else:
+            yield line
+
+def iter_input_entries(fh: IO[str]) -> Iterator[Any]:
+    """
+    Lazily yields raw input entries from a JSON array, a { "urls": [...] } object,
+    NDJSON (strings or objects with "url") or plain text with one URL per line.
+    """
+    head = fh.read(_CHUNK_SIZE)
+    stripped = head.lstrip()
+    if stripped.startswith("["):
+        yield from _iter_json_array(fh, stripped[1:])
+        return
+    if stripped.startswith("{"):
+        first_line = stripped.partition("\n")[0]
+        try:
+            json.loads(first_line)
+            is_ndjson = True
+        except json.JSONDecodeError:
+            is_ndjson = False
+        if not is_ndjson:
+            buf = stripped
+            m = _URLS_KEY_RE.search(buf)
+            while not m:
+                more = fh.read(_CHUNK_SIZE)
+                if not more:
+                    raise ValueError("Unsupported input file format. Expecting { 'urls': [...] } or a list of URLs.")
+                buf += more
+                m = _URLS_KEY_RE.search(buf)
+            yield from _iter_json_array(fh, buf[m.end():])
+            return
+    # NDJSON or plain text: finish the partial last line of the first chunk
+    if head and not head.endswith("\n"):
+        head += fh.readline()
+    yield from _iter_lines(itertools.chain(head.splitlines(), fh))
+
+def _entry_priority(entry: Any) -> float:
+    priority = entry.get("priority") if isinstance(entry, dict) else None
+    if priority is None:
+        return 0.0
+    try:
+        value = float(priority)
+    except (TypeError, ValueError):
+        value = math.nan
+    # nan/inf would break the ordering
+    if not math.isfinite(value):
+        raise InputError(f"Invalid priority {priority!r} for {entry.get('url')}")
+    return value
+
+def _iter_url_entries(path: str) -> Iterator[Tuple[str, Any]]:
+    """(url, entry) for every input URL, lazily."""
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            for entry in iter_input_entries(f):
+                if isinstance(entry, dict) and isinstance(entry.get("urls"), list):
+                    # a compact { "urls": [...] } document on a single line
+                    nested = entry["urls"]
+                else:
+                    nested = [entry]
+                for item in nested:
+                    url = _entry_url(item)
+                    if url:
+                        yield url, item
+        except ValueError as e:
+            # malformed JSON and undecodable bytes alike
+            raise InputError(str(e)) from e
+
+def iter_prioritized_urls(path: str) -> Iterator[Tuple[str, float]]:
+    """
+    Lazily yields (url, priority) for every input URL. Objects may carry a
+    finite numeric "priority" (higher is more valuable); everything else is 0.
+    """
+    for url, entry in _iter_url_entries(path):
+        yield url, _entry_priority(entry)
+
+def iter_input_urls(path: str) -> Iterator[str]:
+    """Lazily yields every input URL; priorities are not read."""
+    for url, _ in _iter_url_entries(path):
+        yield url
@@ -0,0 +1,283 @@
+import asyncio
+import bisect
+import json
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.logging import get_logger
+
+log = get_logger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _fmt_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_key(labels), 0.0)
+
+    def total(self) -> float:
+        return sum(self._values.values())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_fmt_labels(k)} {v:g}" for k, v in sorted(self._values.items())]
+        return lines
+
+    def snapshot(self):
+        return {",".join(f"{k}={v}" for k, v in key) or "total": value for key, value in self._values.items()}
+
+class Gauge:
+    """Reads its value from a callback when rendered, e.g. a queue's qsize."""
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._sources: Dict[LabelKey, Callable[[], float]] = {}
+
+    def set_function(self, fn: Callable[[], float], **labels):
+        self._sources[_key(labels)] = fn
+
+    def clear(self):
+        self._sources.clear()
+
+    def _read(self) -> Dict[LabelKey, float]:
+        out = {}
+        for key, fn in list(self._sources.items()):
+            try:
+                out[key] = float(fn())
+            except Exception:
+                continue
+        return out
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        lines += [f"{self.name}{_fmt_labels(k)} {v:g}" for k, v in sorted(self._read().items())]
+        return lines
+
+    def snapshot(self):
+        return {",".join(f"{k}={v}" for k, v in key) or "value": value for key, value in self._read().items()}
+
+class _HistogramSeries:
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self, n: int):
+        self.counts = [0] * (n + 1)
+        self.count = 0
+        self.sum = 0.0
+
+class Histogram:
+    """Fixed-bucket histogram; quantiles are estimated as the upper bound of the bucket they fall in."""
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelKey, _HistogramSeries] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets))
+            series.counts[bisect.bisect_left(self.buckets, value)] += 1
+            series.count += 1
+            series.sum += value
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        series = self._series.get(_key(labels))
+        if series is None or not series.count:
+            return None
+        target = q * series.count
+        seen = 0
+        for i, c in enumerate(series.counts):
+            seen += c
+            if seen >= target:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), series.counts):
+                cumulative += c
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_fmt_labels(key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_fmt_labels(key)} {series.sum:g}")
+            lines.append(f"{self.name}_count{_fmt_labels(key)} {series.count}")
+        return lines
+
+    def snapshot(self):
+        out = {}
+        for key, series in self._series.items():
+            labels = dict(key)
+            out[",".join(f"{k}={v}" for k, v in key) or "all"] = {
+                "count": series.count,
+                "avg": round(series.sum / series.count, 4) if series.count else None,
+                "p50": self.quantile(0.5, **labels),
+                "p95": self.quantile(0.95, **labels),
+                "p99": self.quantile(0.99, **labels),
+            }
+        return out
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def _get(self, cls, name: str, help: str, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, help, **kwargs)
+        return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get(Counter, name, help)
+
+    def gauge(self, name: str, help: str = "") -> Gauge:
+        return self._get(Gauge, name, help)
+
+    def histogram(self, name: str, help: str = "", buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, object]:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+REGISTRY = MetricsRegistry()
+
+# the scraper's own metrics, shared by the client, parse stage and runner
+FETCH_RESPONSES = REGISTRY.counter("scraper_fetch_responses_total", "HTTP responses by status code.")
+FETCH_ERRORS = REGISTRY.counter("scraper_fetch_errors_total", "Failed fetch attempts by error class.")
+PROXY_REQUESTS = REGISTRY.counter("scraper_proxy_requests_total", "Fetch attempts by proxy and outcome.")
+RETRIES = REGISTRY.counter("scraper_retries_total", "Fetch attempts scheduled for retry.")
+BYTES_DOWNLOADED = REGISTRY.counter("scraper_bytes_downloaded_total", "Response body bytes received.")
+TRUNCATED_BODIES = REGISTRY.counter("scraper_truncated_bodies_total",
+                                    "Bodies cut short in streaming mode, by reason (fields/cap).")
+RECORDS = REGISTRY.counter("scraper_records_total", "Finished URLs by result (done/unchanged/failed).")
+STAGE_SECONDS = REGISTRY.histogram("scraper_stage_seconds", "Latency per pipeline stage.")
+QUEUE_DEPTH = REGISTRY.gauge("scraper_queue_depth", "Items waiting in each pipeline queue.")
+
+class MetricsServer:
+    """Serves REGISTRY in the Prometheus text format at http://<host>:<port>/metrics."""
+
+    def __init__(self, port: int, host: str = "127.0.0.1", registry: MetricsRegistry = REGISTRY):
+        self.port = port
+        self.host = host
+        self.registry = registry
+        self._runner = None
+
+    async def start(self):
+        from aiohttp import web
+
+        async def metrics(request):
+            return web.Response(text=self.registry.render_prometheus(),
+                                content_type="text/plain", charset="utf-8")
+
+        app = web.Application()
+        app.router.add_get("/metrics", metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        log.info("Metrics at http://%s:%d/metrics", self.host, self.port)
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+def _fmt_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}h{m:02d}m{s:02d}s" if h else f"{m}m{s:02d}s"
+
+class ProgressReporter:
+    """
+    Logs a progress line (records/sec, ETA) every `interval` seconds and, when
+    `stats_interval` is set, a one-line JSON dump of the registry.
+    The ETA needs the number of URLs: `expected` when the input size is known up
+    front, otherwise it appears once the producer has finished reading the input.
+    """
+    def __init__(self, interval: float = 10.0, stats_interval: float = 0.0, expected: Optional[int] = None,
+                 registry: MetricsRegistry = REGISTRY):
+        self.interval = interval
+        self.expected = expected
+        self.stats_interval = stats_interval
+        self.registry = registry
+        self.queued = 0
+        self.input_done = False
+        self._started = time.monotonic()
+        self._base_done = self._done()
+        self._base_failed = RECORDS.value(result="failed")
+        self._tasks: List[asyncio.Task] = []
+
+    @staticmethod
+    def _done() -> float:
+        # pages skipped by --incremental are finished too
+        return RECORDS.value(result="done") + RECORDS.value(result="unchanged")
+
+    def finished(self) -> Tuple[float, float]:
+        return (self._done() - self._base_done,
+                RECORDS.value(result="failed") - self._base_failed)
+
+    def progress_line(self) -> str:
+        done, failed = self.finished()
+        elapsed = max(1e-6, time.monotonic() - self._started)
+        rate = (done + failed) / elapsed
+        line = f"Progress: {int(done)} done, {int(failed)} failed"
+        total = self.queued if self.input_done else self.expected
+        if total is not None:
+            remaining = max(0, total - done - failed)
+            eta = _fmt_duration(remaining / rate) if rate > 0 else "?"
+            line += f" of {total} | {rate:.1f} rec/s | ETA {eta}"
+        else:
+            line += f" of {self.queued}+ (still reading input) | {rate:.1f} rec/s"
+        return line
+
+    async def _every(self, interval: float, fn):
+        while True:
+            await asyncio.sleep(interval)
+            fn()
+
+    def start(self):
+        self._started = time.monotonic()
+        if self.interval > 0:
+            self._tasks.append(asyncio.create_task(self._every(self.interval, lambda: log.info(self.progress_line()))))
+        if self.stats_interval > 0:
+            self._tasks.append(asyncio.create_task(self._every(
+                self.stats_interval, lambda: log.info("Stats: %s", json.dumps(self.registry.snapshot(), default=str)))))
+
+    async def stop(self):
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
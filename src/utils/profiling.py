@@ -0,0 +1,150 @@
+import asyncio
+import collections
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional, Tuple
+
+from utils.logging import get_logger
+from utils.metrics import REGISTRY
+
+log = get_logger(__name__)
+
+LOOP_LAG = REGISTRY.histogram("scraper_loop_lag_seconds", "How late event-loop callbacks fire.",
+                              buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+
+class LoopLagWatchdog:
+    """
+    A heartbeat callback reschedules itself every `interval` on the loop and
+    records how late it fires. A watchdog thread notices when the heartbeat
+    stops for longer than `threshold` and logs the loop thread's current stack,
+    i.e. the code that is blocking it, once per stall.
+    """
+    def __init__(self, interval: float = 0.05, threshold: float = 0.25):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = 0.0
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _beat(self, expected: float):
+        now = time.monotonic()
+        lag = max(0.0, now - expected)
+        self.max_lag = max(self.max_lag, lag)
+        LOOP_LAG.observe(lag)
+        self._last_beat = now
+        self._handle = self._loop.call_later(self.interval, self._beat, now + self.interval)
+
+    def _watch(self):
+        reported = 0.0
+        while not self._stop.wait(self.interval):
+            beat = self._last_beat
+            # the next beat is due `interval` after the last one; only lateness beyond that counts
+            if time.monotonic() - beat - self.interval < self.threshold or beat == reported:
+                continue
+            reported = beat
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "<unavailable>"
+            log.warning("Event loop blocked for more than %.0fms in:\n%s", self.threshold * 1000, stack)
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._handle = self._loop.call_later(self.interval, self._beat, self._last_beat + self.interval)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+_OWN_THREADS = ("loop-watchdog", "profiler")
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """
+    Samples the stacks of every thread in this process `hz` times a second.
+    Parse work running in a process pool is not visible here; profile with
+    --parse-executor thread (or --parse-workers 0) to include it.
+    """
+    def __init__(self, hz: float = 100.0):
+        self.interval = 1.0 / hz
+        self.samples = 0
+        self.stacks: Dict[Tuple[str, ...], int] = collections.Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+        self.elapsed = 0.0
+
+    def _sample(self):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if names.get(ident) in _OWN_THREADS:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident) or f"thread-{ident}")
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+            if self.samples % 100 == 0:
+                names = {t.ident: t.name for t in threading.enumerate()}
+
+    def start(self):
+        self._started = time.monotonic()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.elapsed = time.monotonic() - self._started
+
+    def collapsed(self) -> List[str]:
+        """Brendan Gregg's folded format, one `frame;frame;frame count` line per stack (for flamegraph.pl/speedscope)."""
+        return [f"{';'.join(stack)} {count}" for stack, count in sorted(self.stacks.items(), key=lambda kv: -kv[1])]
+
+    def flat(self, limit: int = 40) -> List[str]:
+        own: Dict[str, int] = collections.Counter()
+        total: Dict[str, int] = collections.Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack[1:]):
+                total[label] += count
+        n = max(1, sum(self.stacks.values()))
+        lines = [f"{self.samples} samples over {self.elapsed:.1f}s ({len(self.stacks)} distinct stacks)", "",
+                 f"{'self%':>7} {'total%':>7}  function"]
+        for label, count in sorted(own.items(), key=lambda kv: -kv[1])[:limit]:
+            lines.append(f"{100 * count / n:7.2f} {100 * total[label] / n:7.2f}  {label}")
+        return lines
+
+    def write(self, base_path: str) -> Tuple[str, str]:
+        flat_path = f"{base_path}.profile.txt"
+        collapsed_path = f"{base_path}.profile.collapsed"
+        with open(flat_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.flat()) + "\n")
+        with open(collapsed_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.collapsed()) + "\n")
+        return flat_path, collapsed_path
@@ -0,0 +1,157 @@
+import hashlib
+import math
+import mmap
+import os
+import sqlite3
+import struct
+import time
+from typing import Optional, Set
+
+from utils.commits import CommitAfter, DeferredCommits
+from utils.logging import get_logger
+
+log = get_logger(__name__)
+
+class BloomFilter:
+    """
+    File-backed Bloom filter (mmap'd bit array). Sized up front for `capacity`
+    keys at `error_rate`; past capacity it keeps working with more false positives.
+    """
+    _HEADER = struct.Struct("<8sQQQ")  # magic, bits, hashes, count
+    _MAGIC = b"BLOOM001"
+
+    def __init__(self, path: str, capacity: int = 10_000_000, error_rate: float = 0.001):
+        self.path = path
+        if os.path.exists(path) and os.path.getsize(path) >= self._HEADER.size:
+            with open(path, "rb") as f:
+                magic, bits, hashes, count = self._HEADER.unpack(f.read(self._HEADER.size))
+            if magic != self._MAGIC:
+                raise ValueError(f"Not a bloom filter file: {path}")
+        else:
+            bits = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+            bits += -bits % 8
+            hashes = max(1, round(bits / capacity * math.log(2)))
+            count = 0
+            with open(path, "wb") as f:
+                f.write(self._HEADER.pack(self._MAGIC, bits, hashes, 0))
+                f.truncate(self._HEADER.size + bits // 8)
+        self.bits = bits
+        self.hashes = hashes
+        self.count = count
+        self._fh = open(path, "r+b")
+        self._map = mmap.mmap(self._fh.fileno(), 0)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        # double hashing: k positions from two 64-bit hashes
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def __contains__(self, key: str) -> bool:
+        offset = self._HEADER.size
+        m = self._map
+        return all(m[offset + (p >> 3)] & (1 << (p & 7)) for p in self._positions(key))
+
+    def add(self, key: str):
+        offset = self._HEADER.size
+        m = self._map
+        for p in self._positions(key):
+            m[offset + (p >> 3)] |= 1 << (p & 7)
+        self.count += 1
+
+    def close(self):
+        if self._map is not None:
+            self._map[:self._HEADER.size] = self._HEADER.pack(self._MAGIC, self.bits, self.hashes, self.count)
+            self._map.flush()
+            self._map.close()
+            self._fh.close()
+            self._map = None
+
+class SeenSet:
+    """
+    Persistent set of company keys for tens of millions of entries across runs.
+    A Bloom filter (`<path>.bloom`) answers most lookups from memory; its
+    "maybe" answers are confirmed against an exact SQLite table (`path`).
+    Writes are batched like CheckpointStore, including its `commit_after`.
+    """
+    def __init__(self, path: str, capacity: int = 10_000_000, error_rate: float = 0.001,
+                 batch_size: int = 1000, flush_interval: float = 2.0,
+                 commit_after: Optional[CommitAfter] = None):
+        self.path = path
+        self._commits = DeferredCommits(commit_after)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._bloom: Optional[BloomFilter] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pending: Set[str] = set()
+        # handed to a commit that has not run yet
+        self._committing: Set[str] = set()
+        self._last_flush = time.monotonic()
+        self.exact_lookups = 0
+
+    def open(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY) WITHOUT ROWID")
+        self._conn.commit()
+        bloom_path = self.path + ".bloom"
+        rebuild = not os.path.exists(bloom_path)
+        self._bloom = BloomFilter(bloom_path, self.capacity, self.error_rate)
+        if rebuild:
+            # the table is the source of truth; a missing filter is rebuilt from it
+            for (key,) in self._conn.execute("SELECT key FROM seen"):
+                self._bloom.add(key)
+        return self
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __contains__(self, key: str) -> bool:
+        if key not in self._bloom:
+            return False
+        if key in self._pending:
+            return True
+        self.exact_lookups += 1
+        with self._commits.lock:
+            if key in self._committing:
+                return True
+            return self._conn.execute("SELECT 1 FROM seen WHERE key = ?", (key,)).fetchone() is not None
+
+    def add(self, key: str):
+        if key in self:
+            return
+        self._bloom.add(key)
+        self._pending.add(key)
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._pending or self._conn is None:
+            return
+        batch, self._pending = self._pending, set()
+        with self._commits.lock:
+            self._committing |= batch
+        self._commits.submit(lambda: self._commit(batch))
+
+    def _commit(self, batch: Set[str]):
+        with self._commits.lock:
+            self._conn.executemany("INSERT OR IGNORE INTO seen (key) VALUES (?)", ((k,) for k in batch))
+            self._conn.commit()
+            self._committing -= batch
+
+    def close(self):
+        if self._conn is not None:
+            self.flush()
+            self._commits.wait()
+            self._conn.close()
+            self._conn = None
+        if self._bloom is not None:
+            self._bloom.close()
+            self._bloom = None
@@ -0,0 +1,56 @@
+import json
+from typing import Any, Callable, List
+
+try:
+    import orjson as _orjson
+except ImportError:  # optional dependency
+    _orjson = None
+
+try:
+    import msgspec as _msgspec
+except ImportError:  # optional dependency
+    _msgspec = None
+
+# fastest first; "auto" picks the first one installed
+ENGINES = ("orjson", "msgspec", "json")
+
+def available_engines() -> List[str]:
+    return [name for name, module in zip(ENGINES, (_orjson, _msgspec, json)) if module is not None]
+
+def _stdlib_dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+def get_dumps(engine: str = "auto") -> Callable[[Any], str]:
+    """
+    A compact JSON encoder returning str. Every engine writes UTF-8 text with
+    no whitespace and keys in insertion order, so records come out in the
+    parser's CompanyRecord field order whichever one is installed. Values the
+    fast engines refuse (e.g. ints beyond 64 bits) go through the stdlib.
+    """
+    if engine == "auto":
+        engine = available_engines()[0]
+    if engine not in ENGINES:
+        raise ValueError(f"Unsupported JSON engine: {engine}")
+    if engine == "json":
+        return _stdlib_dumps
+    if engine == "orjson":
+        if _orjson is None:
+            raise RuntimeError("the orjson JSON engine requires the 'orjson' package")
+        encode = _orjson.dumps
+        errors = (TypeError,)
+    else:
+        if _msgspec is None:
+            raise RuntimeError("the msgspec JSON engine requires the 'msgspec' package")
+        encode = _msgspec.json.Encoder().encode
+        errors = (TypeError, OverflowError, _msgspec.EncodeError)
+
+    def dumps(obj: Any) -> str:
+        try:
+            return encode(obj).decode("utf-8")
+        except errors:
+            return _stdlib_dumps(obj)
+    return dumps
+
+# engine behind the module-level dumps() the exporter and record store use
+ENGINE = available_engines()[0]
+dumps = get_dumps(ENGINE)
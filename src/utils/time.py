@@ -1,4 +1,15 @@
+import re
 from datetime import datetime, timezone
 
+_DURATION_RE = re.compile(r"^\s*(\d+(?:\.\d*)?)\s*([smh]?)\s*$", re.IGNORECASE)
+_DURATION_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600}
+
 def now_iso_utc() -> str:
-    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
\ No newline at end of file
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def parse_duration(text: str) -> float:
+    """Seconds in "90", "90s", "15m" or "2h"."""
+    m = _DURATION_RE.match(text)
+    if not m:
+        raise ValueError(f"Invalid duration: {text!r} (expected e.g. 90s, 15m or 2h)")
+    return float(m.group(1)) * _DURATION_UNITS[m.group(2).lower()]
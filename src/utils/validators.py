@@ -1,16 +1,46 @@
 import re
-from typing import List
+from typing import Optional
+from urllib.parse import quote, unquote, urlsplit, urlunsplit
 
-_LINKEDIN_COMPANY_RE = re.compile(r"^https?://(www\.)?linkedin\.com/company/[A-Za-z0-9\-\._%]+/?$", re.I)
+# linkedin.com, www., mobile and locale subdomains (de., uk., ...)
+_LINKEDIN_HOST_RE = re.compile(r"^(?:(?:www|m|mobile|[a-z]{2})\.)?linkedin\.com$")
+_SLUG_RE = re.compile(r"^[\w\-\.~%&']+$")
+
+def company_key(url: str) -> Optional[str]:
+    """
+    The lower-cased, percent-decoded company slug of any LinkedIn company URL
+    variant, or None when the URL is not a company page. Scheme, locale
+    subdomain, query, fragment and sub-pages (/about/, /people/, ...) are ignored.
+    """
+    url = (url or "").strip()
+    if not url:
+        return None
+    if "://" not in url:
+        url = "https://" + url.lstrip("/")
+    parts = urlsplit(url)
+    if parts.scheme.lower() not in ("http", "https") or not _LINKEDIN_HOST_RE.match((parts.hostname or "").lower()):
+        return None
+    segments = [seg for seg in parts.path.split("/") if seg]
+    if len(segments) < 2 or segments[0].lower() != "company" or not _SLUG_RE.match(segments[1]):
+        return None
+    return unquote(segments[1]).lower()
+
+def canonical_company_url(url: str) -> Optional[str]:
+    """
+    One fetch URL per company: www host, lower-case slug, no suffix, query or
+    trailing slash. The scheme is kept (http stays http, anything else is https).
+    """
+    key = company_key(url)
+    if key is None:
+        return None
+    scheme = "http" if url.strip().lower().startswith("http://") else "https"
+    return f"{scheme}://www.linkedin.com/company/{quote(key, safe='')}"
 
 def is_valid_linkedin_company_url(url: str) -> bool:
-    return bool(_LINKEDIN_COMPANY_RE.match(url or ""))
+    return company_key(url) is not None
 
-def dedupe_urls(urls: List[str]) -> List[str]:
-    seen = set()
-    out = []
-    for u in urls:
-        if u not in seen:
-            out.append(u)
-            seen.add(u)
-    return out
\ No newline at end of file
+def canonical_url(url: str) -> str:
+    """Cache/index key for a URL: lower-cased scheme and host, no query, fragment or trailing slash."""
+    parts = urlsplit((url or "").strip())
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, "", ""))
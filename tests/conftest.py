@@ -0,0 +1,37 @@
+import contextlib
+import socket
+
+import pytest
+from aiohttp import web
+
+@pytest.fixture
+def local_server():
+    """
+    Async context manager serving `handler` for every path on a free
+    127.0.0.1 port; yields the port. Requests in absolute form are answered
+    too, so pointing a client's proxy file at it keeps linkedin.com URLs local.
+    """
+    @contextlib.asynccontextmanager
+    async def serve(handler):
+        app = web.Application()
+        app.router.add_route("GET", "/{tail:.*}", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        try:
+            yield port
+        finally:
+            await runner.cleanup()
+    return serve
+
+@pytest.fixture
+def proxy_file(tmp_path):
+    """Writes a proxies.txt routing every request through the local server on `port`."""
+    def write(port):
+        path = tmp_path / "proxies.txt"
+        path.write_text(f"http://127.0.0.1:{port}\n")
+        return str(path)
+    return write
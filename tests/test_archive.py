@@ -0,0 +1,49 @@
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from pipelines import archive as archive_module  # noqa
+from pipelines.archive import ArchiveWriter, archive_segments, iter_archive_index, read_record, replay  # noqa
+from pipelines.exporter import Exporter  # noqa
+
+PAGE = ('<html><head><script type="application/ld+json">{{"@type": "Organization", "name": "{name}"}}</script>'
+        "</head><body><div>{followers} followers</div></body></html>")
+
+def test_writer_rolls_segments_and_records_read_back(tmp_path):
+    directory = str(tmp_path / "arc")
+    with ArchiveWriter(directory, segment_bytes=200) as archive:
+        headers = {"Content-Type": "text/html", "Content-Encoding": "gzip"}
+        for i in range(5):
+            archive.write(f"https://www.linkedin.com/company/c{i}", 200, headers, PAGE.format(name=f"C{i}", followers=i))
+    assert len(archive_segments(directory)) > 1
+    entries = list(iter_archive_index(directory))
+    assert [e.url for e in entries] == [f"https://www.linkedin.com/company/c{i}" for i in range(5)]
+    last = entries[-1]
+    with open(last.segment, "rb") as f:
+        url, status, headers, body = read_record(f.read(), last.offset, last.length, "gzip")
+    assert (url, status, body) == (last.url, 200, PAGE.format(name="C4", followers=4))
+    assert "Content-Encoding" not in headers and headers["Content-Length"] == str(len(body.encode()))
+
+def test_replay_parses_latest_capture_per_company(tmp_path, monkeypatch):
+    directory = str(tmp_path / "arc")
+    monkeypatch.setattr(archive_module, "now_iso_utc", lambda: "2024-01-02T03:04:05Z")
+    with ArchiveWriter(directory) as archive:
+        archive.write("https://www.linkedin.com/company/contoso", 200, {}, PAGE.format(name="Contoso", followers=1))
+        archive.write("https://www.linkedin.com/company/fabrikam", 404, {}, "Not found")
+        archive.write("https://www.linkedin.com/company/Contoso/", 200, {}, PAGE.format(name="Contoso", followers=2))
+    out = str(tmp_path / "replay.json")
+    exporter = Exporter(out)
+    exporter.open()
+    stats = replay(directory, exporter, workers=1)
+    exporter.close()
+    assert stats == {"archived": 3, "replayed": 1, "failed": 0}
+    with open(out, encoding="utf-8") as f:
+        [record] = json.load(f)["records"]
+    assert record["name"] == "Contoso" and record["followersCount"] == 2
+    # the capture time, not the replay time
+    assert record["scrapedAt"] == "2024-01-02T03:04:05Z"
@@ -0,0 +1,71 @@
+import csv
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from pipelines.backends import create_backend, csv_columns, format_for_path  # noqa
+from pipelines.exporter import Exporter  # noqa
+
+RECORD = {
+    "name": "Contoso",
+    "url": "https://www.linkedin.com/company/contoso",
+    "mainAddress": {"addressLocality": "Redmond", "addressCountry": "US"},
+    "founded": 1975,
+    "followersCount": "791715",
+    "addresses": ["1 Main St", "2 Side St"],
+    "stock": {"symbol": "CTSO"},
+}
+
+def test_csv_backend_flattens_nested_fields(tmp_path):
+    exporter = Exporter(str(tmp_path / "out.json"), backends=[create_backend("csv", str(tmp_path / "out"))])
+    exporter.open()
+    exporter.write(RECORD)
+    exporter.write({"name": "Fabrikam", "unknownField": 1})
+    exporter.close()
+
+    with open(tmp_path / "out.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == csv_columns()
+    assert rows[0]["mainAddress.addressCountry"] == "US"
+    assert rows[0]["stock.symbol"] == "CTSO"
+    assert json.loads(rows[0]["addresses"]) == ["1 Main St", "2 Side St"]
+    assert rows[1]["name"] == "Fabrikam" and rows[1]["founded"] == ""
+
+def test_csv_backend_json_encodes_dicts_in_plain_columns(tmp_path):
+    logo = {"@type": "ImageObject", "url": "https://media.licdn.com/logo.png"}
+    exporter = Exporter(str(tmp_path / "out.json"), backends=[create_backend("csv", str(tmp_path / "out"))])
+    exporter.open()
+    exporter.write(dict(RECORD, logo=logo))
+    exporter.close()
+
+    with open(tmp_path / "out.csv", newline="", encoding="utf-8") as f:
+        row = next(csv.DictReader(f))
+    assert json.loads(row["logo"]) == logo
+    assert row["mainAddress.addressLocality"] == "Redmond"
+
+def test_format_for_path():
+    assert format_for_path("out.csv.gz") == "csv"
+    assert format_for_path("out.feather") == "arrow"
+    assert format_for_path("out.json") is None
+
+def test_parquet_backend_writes_row_groups_with_schema_types(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    backend = create_backend("parquet", str(tmp_path / "out"), row_group_size=2)
+    backend.open()
+    backend.write_batch([RECORD] * 3)
+    backend.write_batch([{"name": "Fabrikam", "founded": "unknown"}])
+    backend.close()
+
+    f = pq.ParquetFile(backend.path)
+    assert f.metadata.num_rows == 4 and f.metadata.num_row_groups == 2
+    rows = f.read().to_pylist()
+    assert rows[0]["mainAddress"]["addressCountry"] == "US"
+    assert rows[0]["followersCount"] == 791715
+    assert rows[3]["founded"] is None
@@ -0,0 +1,30 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from client.cache import ResponseCache  # noqa
+
+def test_cache_roundtrip_keyed_by_canonical_url(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl=3600)
+    cache.put("https://www.linkedin.com/company/acme/", "<html>acme</html>", etag='"v1"')
+    entry = cache.get("HTTPS://WWW.LINKEDIN.COM/company/acme")
+    assert entry is not None and entry.fresh and entry.body == "<html>acme</html>"
+    assert entry.conditional_headers() == {"If-None-Match": '"v1"'}
+    assert cache.get("https://www.linkedin.com/company/other") is None
+    # other pages of the company and the other scheme are different responses
+    assert cache.get("https://www.linkedin.com/company/acme/about/") is None
+    assert cache.get("http://www.linkedin.com/company/acme") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 3
+
+def test_stale_entries_and_lru_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl=0, max_bytes=250)
+    for i in range(5):
+        cache.put(f"https://www.linkedin.com/company/c{i}", f"{i}" * 100)
+    assert not cache.get("https://www.linkedin.com/company/c4").fresh
+    assert cache.get("https://www.linkedin.com/company/c0") is None
+    assert cache.stats()["bytes"] <= 250
+    assert cache.stats()["evictions"] >= 3
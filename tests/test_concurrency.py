@@ -0,0 +1,84 @@
+import asyncio
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from client.concurrency import ConcurrencyLimiter  # noqa
+
+def test_window_limits_holders_and_growing_it_wakes_waiters():
+    async def scenario():
+        limiter = ConcurrencyLimiter(2, adaptive=True, max_limit=4)
+        peak = 0
+        release = asyncio.Event()
+
+        async def worker():
+            nonlocal peak
+            async with limiter:
+                peak = max(peak, limiter.in_use)
+                await release.wait()
+
+        tasks = [asyncio.create_task(worker()) for _ in range(6)]
+        await asyncio.sleep(0.01)
+        held = limiter.in_use
+        limiter.feedback(0.05, congested=False)  # slow start: +1 per response
+        await asyncio.sleep(0.01)
+        grown = limiter.in_use
+        release.set()
+        await asyncio.gather(*tasks)
+        return held, grown, peak, limiter.in_use
+    held, grown, peak, left = asyncio.run(scenario())
+    assert (held, grown, peak, left) == (2, 3, 3, 0)
+
+def test_cancelled_waiter_reraises_after_its_slot_was_passed_over():
+    async def scenario():
+        limiter = ConcurrencyLimiter(1)
+        await limiter.acquire()
+        cancelled, waiting = (asyncio.create_task(limiter.acquire()) for _ in range(2))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        # _wake pops the cancelled future before its task gets to run
+        limiter.release()
+        results = await asyncio.gather(cancelled, waiting, return_exceptions=True)
+        return results, limiter.in_use, len(limiter._waiters)
+    (first, second), in_use, waiters = asyncio.run(scenario())
+    assert isinstance(first, asyncio.CancelledError) and second is None
+    assert (in_use, waiters) == (1, 0)
+
+def test_aimd_bounds_and_one_cut_per_round_trip():
+    limiter = ConcurrencyLimiter(4, adaptive=True, min_limit=2, max_limit=16)
+    for _ in range(50):
+        limiter.feedback(0.05, congested=False)
+    assert limiter.limit == 16
+    limiter.feedback(0.05, congested=True)
+    limiter.feedback(0.05, congested=True)  # same burst: no second cut
+    assert (limiter.limit, limiter.decreases) == (11, 1)
+    # past slow start the window grows by about one per window of responses
+    for _ in range(11):
+        limiter.feedback(0.05, congested=False)
+    assert limiter.limit == 12
+    limiter._last_decrease -= 10
+    for _ in range(5):
+        limiter._last_decrease -= 10
+        limiter.feedback(0.05, congested=True)
+    assert limiter.limit == 2 and limiter.report()["min_seen"] == 2
+
+def test_rising_latency_stops_growth_and_fixed_mode_ignores_feedback():
+    limiter = ConcurrencyLimiter(4, adaptive=True, max_limit=64)
+    for _ in range(32):
+        limiter.feedback(0.05, congested=False)  # first median: the baseline
+    for _ in range(32):
+        limiter.feedback(0.15, congested=False)
+    window = limiter.limit
+    for _ in range(64):
+        limiter.feedback(0.15, congested=False)  # 3x the baseline: hold
+    assert limiter.limit == window and limiter.decreases == 0
+    for _ in range(32):
+        limiter.feedback(0.5, congested=False)  # 10x: cut
+    assert limiter.limit < window and limiter.decreases == 1
+    fixed = ConcurrencyLimiter(8)
+    fixed.feedback(5.0, congested=True)
+    assert fixed.limit == 8 and fixed.max_limit == 8
@@ -0,0 +1,35 @@
+import asyncio
+import os
+import sys
+
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from client.connections import ConnectionSettings, accept_encoding  # noqa
+from client.http import HttpClient  # noqa
+
+def test_pool_stats_count_reused_and_new_connections(local_server):
+    seen_encodings = []
+
+    async def page(request):
+        seen_encodings.append(request.headers.get("Accept-Encoding"))
+        return web.Response(text="<html><body>ok</body></html>", content_type="text/html")
+
+    async def fetch_all(connections):
+        async with local_server(page) as port:
+            async with HttpClient(max_concurrency=2, connections=connections) as client:
+                for i in range(5):
+                    await client.fetch_once(f"http://127.0.0.1:{port}/company/c{i}")
+                return client.pool_report()
+
+    [pooled] = asyncio.run(fetch_all(ConnectionSettings()))
+    assert pooled["pool"] == "direct" and pooled["connections"] == 1 and pooled["reused"] == 4
+    assert seen_encodings[-1] == accept_encoding()
+
+    [closed] = asyncio.run(fetch_all(ConnectionSettings(force_close=True, compression=False)))
+    assert closed["connections"] == 5 and closed["reused"] == 0
+    assert seen_encodings[-1] == "identity"
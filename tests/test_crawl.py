@@ -0,0 +1,84 @@
+import asyncio
+import os
+import sys
+
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from client.http import HttpClient  # noqa
+from pipelines.crawl import Frontier, crawl_stream  # noqa
+from pipelines.stream import StreamStats  # noqa
+
+# company i links to 2i+1 and 2i+2: a binary tree rooted at c0
+PAGE = ('<html><head><script type="application/ld+json">{{"@type": "Organization", "name": "{slug}"}}</script>'
+        '</head><body><section data-test-id="similar-pages"><ul>{cards}</ul></section></body></html>')
+CARD = '<li><a href="http://www.linkedin.com/company/c{n}?trk=similar-pages"><h3>C{n}</h3></a></li>'
+
+def test_frontier_priority_budget_and_restart(tmp_path):
+    path = str(tmp_path / "frontier.db")
+    with Frontier(path, max_depth=2, budget=4) as frontier:
+        assert frontier.add(["linkedin.com/company/a", "https://www.linkedin.com/company/A/about/"], 0) == 1
+        frontier.add(["linkedin.com/company/b", "linkedin.com/company/c", "linkedin.com/company/c"], 1)
+        assert frontier.add(["linkedin.com/company/d", "linkedin.com/company/e"], 1) == 1  # budget of 4
+        assert frontier.add(["linkedin.com/company/f"], 3) == 0  # deeper than max_depth
+        assert frontier.dropped == 1
+        assert frontier.take(2) == ["https://www.linkedin.com/company/a", "https://www.linkedin.com/company/c"]
+        frontier.finish("https://www.linkedin.com/company/a")
+    with Frontier(path, max_depth=2) as frontier:
+        # c was taken but never finished: queued again; a stays done
+        assert frontier.take(10) == ["https://www.linkedin.com/company/c", "https://www.linkedin.com/company/b",
+                                     "https://www.linkedin.com/company/d"]
+        assert frontier.add(["linkedin.com/company/a"], 0) == 0
+    with Frontier(path, reset=True) as frontier:
+        assert frontier.size == 0
+
+def test_frontier_commits_outcomes_only_after_the_hook(tmp_path):
+    calls = []
+
+    def commit_after(commit):
+        calls.append(1)
+        commit()
+
+    with Frontier(str(tmp_path / "frontier.db"), batch_size=2, commit_after=commit_after) as frontier:
+        frontier.add([f"linkedin.com/company/c{i}" for i in range(3)], 0)
+        for url in frontier.take(3):
+            frontier.finish(url)
+        assert len(calls) == 1
+        assert frontier.counts() == {"done": 3}  # flushes the last outcome through the hook too
+    assert len(calls) == 2
+
+def test_crawl_follows_links_to_depth_and_resumes_after_interruption(tmp_path, local_server, proxy_file):
+    async def page(request):
+        slug = request.path.rstrip("/").rsplit("/", 1)[-1]
+        n = int(slug[1:])
+        return web.Response(text=PAGE.format(slug=slug, cards=CARD.format(n=2 * n + 1) + CARD.format(n=2 * n + 2)),
+                            content_type="text/html")
+
+    async def main(reset, stop_after=None):
+        async with local_server(page) as port:
+            with Frontier(str(tmp_path / "frontier.db"), max_depth=2, reset=reset) as frontier:
+                async with HttpClient(max_concurrency=4, proxy_file=proxy_file(port)) as client:
+                    names = []
+                    stream = crawl_stream(["http://www.linkedin.com/company/c0"], frontier, client,
+                                          stats=StreamStats(), take=2)
+                    async for record in stream:
+                        names.append(record["name"])
+                        if len(names) == stop_after:
+                            break
+                    await stream.aclose()
+                counts = frontier.counts()
+        return names, counts
+
+    names, counts = asyncio.run(main(reset=True))
+    assert sorted(names) == [f"c{i}" for i in range(7)]
+    assert counts == {"done": 7}
+    first, _ = asyncio.run(main(reset=True, stop_after=3))
+    second, counts = asyncio.run(main(reset=False))
+    # only the record the consumer stopped on, which it never asked past, is delivered again
+    assert set(first) & set(second) == {first[-1]}
+    assert sorted(set(first + second)) == [f"c{i}" for i in range(7)]
+    assert counts == {"done": 7}
@@ -0,0 +1,81 @@
+import gzip
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from pipelines.exporter import Exporter  # noqa
+
+def _records(n):
+    return [{"name": f"Company {i}", "url": f"https://www.linkedin.com/company/c{i}"} for i in range(n)]
+
+def test_stream_bundle_matches_in_memory_bundle(tmp_path):
+    bundles = []
+    for stream in (False, True):
+        out = str(tmp_path / f"out_{stream}.json")
+        exp = Exporter(out, stream_bundle=stream, batch_size=7)
+        exp.open()
+        for r in _records(25):
+            exp.write(r)
+        exp.write_error("https://www.linkedin.com/company/bad", "boom")
+        exp.close()
+        with open(out, encoding="utf-8") as f:
+            bundles.append(json.load(f))
+        with open(exp.jsonl_path, encoding="utf-8") as f:
+            assert len(f.readlines()) == 25
+    assert bundles[0] == bundles[1]
+    assert bundles[1]["stats"] == {"records": 25, "errors": 1}
+
+def test_default_bundle_is_pretty_printed(tmp_path):
+    out = str(tmp_path / "out.json")
+    exp = Exporter(out, batch_size=2)
+    exp.open()
+    for r in _records(3):
+        exp.write(r)
+    exp.close()
+    with open(out, encoding="utf-8") as f:
+        text = f.read()
+    assert text == json.dumps(json.loads(text), ensure_ascii=False, indent=2)
+
+def test_gzip_rotation_by_record_count(tmp_path):
+    out = str(tmp_path / "out.json")
+    exp = Exporter(out, stream_bundle=True, batch_size=4, compression="gzip", rotate_every=10)
+    exp.open()
+    for r in _records(25):
+        exp.write(r)
+    exp.close()
+    counts = []
+    for part in (1, 2, 3):
+        with gzip.open(str(tmp_path / f"out.{part:05d}.jsonl.gz"), "rt", encoding="utf-8") as f:
+            counts.append(len(f.readlines()))
+    assert counts == [10, 10, 5]
+    with gzip.open(out + ".gz", "rt", encoding="utf-8") as f:
+        assert len(json.load(f)["records"]) == 25
+
+def test_append_mode_rebuilds_bundle_from_jsonl(tmp_path):
+    out = str(tmp_path / "out.json")
+    exp = Exporter(out)
+    exp.open()
+    for r in _records(3):
+        exp.write(r)
+    exp.write_error("https://www.linkedin.com/company/bad", "boom")
+    exp.write_error("https://www.linkedin.com/company/c4", "timeout")
+    exp.close()
+    exp = Exporter(out, append=True)
+    exp.open()
+    for r in _records(5)[2:]:
+        exp.write(dict(r, followersCount=10))
+    exp.write_error("https://www.linkedin.com/company/worse", "403")
+    exp.close()
+    with open(out, encoding="utf-8") as f:
+        bundle = json.load(f)
+    assert [r["name"] for r in bundle["records"]] == [f"Company {i}" for i in range(5)]
+    # a re-fetched URL keeps its latest record
+    assert bundle["records"][2]["followersCount"] == 10
+    # earlier errors carry over, except for the URL that has a record now
+    assert [e["url"].rsplit("/", 1)[-1] for e in bundle["errors"]] == ["bad", "worse"]
+    assert bundle["stats"] == {"records": 5, "errors": 2}
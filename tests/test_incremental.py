@@ -0,0 +1,119 @@
+import asyncio
+import contextlib
+import json
+import os
+import sys
+
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from client.http import HttpClient  # noqa
+from pipelines.incremental import (  # noqa
+    FingerprintStore, IncrementalTracker, diff_records, page_fingerprint,
+)
+from pipelines.stream import scrape_stream  # noqa
+
+PAGE = """<html><head><title>Contoso | LinkedIn</title>
+<meta name="csrf-token" content="{token}"><meta property="og:title" content="Contoso">
+<script type="application/ld+json">{{"@type": "Organization", "name": "Contoso"}}</script></head>
+<body><div>{followers} followers</div><div class="feed">{feed}</div></body></html>"""
+
+def test_page_fingerprint_ignores_volatile_markup():
+    base = page_fingerprint(PAGE.format(token="a1", followers="1,000", feed="post 1"))
+    assert page_fingerprint(PAGE.format(token="b2", followers="1,000", feed="post 2")) == base
+    assert page_fingerprint(PAGE.format(token="a1", followers="1,001", feed="post 1")) != base
+
+def test_page_fingerprint_sees_values_in_sibling_elements():
+    from pipelines.parse_stage import parse_page
+
+    pages = [
+        ("<dl><dt>Founded</dt><dd>{}</dd></dl>", "1999", "2005", "founded"),
+        ("<div><span>{}</span> followers</div>", "1,234", "9999", "followersCount"),
+        ("<dl><dt>Industry</dt><dd>: {}</dd></dl>", "Software", "Banking", "industry"),
+    ]
+    head = '<html><head><meta property="og:title" content="Contoso"></head><body>{}</body></html>'
+    for body, old, new, field in pages:
+        before, after = head.format(body.format(old)), head.format(body.format(new))
+        url = "https://www.linkedin.com/company/contoso"
+        assert parse_page(before, url)[field] != parse_page(after, url)[field]
+        assert page_fingerprint(before) != page_fingerprint(after), field
+
+def test_page_fingerprint_sees_related_pages_but_not_their_tracking_ids():
+    page = ('<html><head><meta property="og:title" content="Contoso"></head><body>'
+            '<section data-test-id="similar-pages"><a href="https://www.linkedin.com/company/{slug}?trk={trk}">'
+            '<h3>{name}</h3><p>Software</p></a></section></body></html>')
+    base = page_fingerprint(page.format(slug="fabrikam", trk="a1", name="Fabrikam"))
+    assert page_fingerprint(page.format(slug="fabrikam", trk="b2", name="Fabrikam")) == base
+    assert page_fingerprint(page.format(slug="northwind", trk="a1", name="Fabrikam")) != base
+    assert page_fingerprint(page.format(slug="fabrikam", trk="a1", name="Fabrikam Inc")) != base
+
+def test_diff_records_compares_nested_fields_and_ignores_scraped_at():
+    old = {"name": "Contoso", "mainAddress": {"addressCountry": "US", "addressLocality": "Redmond"},
+           "scrapedAt": "2024-01-01T00:00:00Z"}
+    new = {"name": "Contoso", "mainAddress": {"addressCountry": "US", "addressLocality": "Seattle"},
+           "followers": 10, "scrapedAt": "2024-02-01T00:00:00Z"}
+    assert diff_records(old, new) == {
+        "followers": {"old": None, "new": 10},
+        "mainAddress.addressLocality": {"old": "Redmond", "new": "Seattle"},
+    }
+
+def test_tracker_reports_new_changed_and_unchanged(tmp_path):
+    url = "https://www.linkedin.com/company/contoso"
+    changes = tmp_path / "out.changes.jsonl"
+
+    def run(record, page_hash):
+        tracker = IncrementalTracker(FingerprintStore(str(tmp_path / "fp.db")), str(changes)).open()
+        previous = tracker.previous(url)
+        if previous is not None and previous.page_hash == page_hash:
+            tracker.unchanged(url)
+            change = None
+        else:
+            change = tracker.compare(url, page_hash, record, previous)
+            if change is not None:
+                tracker.commit(change)
+        tracker.close()
+        return change.entry if change is not None else None
+
+    assert run({"url": url, "name": "Contoso", "scrapedAt": "t1"}, "p1")["change"] == "new"
+    assert run({"url": url, "name": "Contoso"}, "p1") is None
+    # the page changed but the extracted record did not
+    assert run({"url": url, "name": "Contoso", "scrapedAt": "t3"}, "p2") is None
+    change = run({"url": url, "name": "Contoso Ltd", "scrapedAt": "t4"}, "p3")
+    assert change["change"] == "changed"
+    assert change["diff"] == {"name": {"old": "Contoso", "new": "Contoso Ltd"}}
+    with open(changes, encoding="utf-8") as f:
+        assert [json.loads(line)["change"] for line in f] == ["new", "changed"]
+
+def test_stream_stores_fingerprints_only_for_records_the_consumer_took(tmp_path, local_server, proxy_file):
+    urls = [f"http://www.linkedin.com/company/c{i}" for i in range(4)]
+
+    async def page(request):
+        slug = request.path.rstrip("/").rsplit("/", 1)[-1]
+        return web.Response(text=PAGE.format(token=slug, followers=1, feed=slug), content_type="text/html")
+
+    async def main(stop_after=None):
+        tracker = IncrementalTracker(FingerprintStore(str(tmp_path / "fp.db")), str(tmp_path / "changes.jsonl")).open()
+        names = []
+        try:
+            async with local_server(page) as port:
+                async with HttpClient(max_concurrency=1, proxy_file=proxy_file(port)) as client:
+                    stream = scrape_stream(urls, client, tracker=tracker, buffer=1)
+                    async with contextlib.aclosing(stream):
+                        async for record in stream:
+                            names.append(record["url"])
+                            if len(names) == stop_after:
+                                break
+        finally:
+            tracker.close()
+        return names
+
+    first = asyncio.run(main(stop_after=2))
+    # only the record the consumer asked past is committed; the one it stopped on and the queued ones are not
+    with open(tmp_path / "changes.jsonl", encoding="utf-8") as f:
+        assert [json.loads(line)["url"] for line in f] == first[:1]
+    second = asyncio.run(main())
+    assert sorted(second) == sorted(set(urls) - set(first[:1]))
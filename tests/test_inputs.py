@@ -0,0 +1,52 @@
+import asyncio
+import io
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from pipelines.stream import scrape_stream  # noqa
+from utils.inputs import InputError, iter_input_entries, iter_input_urls  # noqa
+
+def test_streams_json_array_and_wrapper_object():
+    urls = [f"https://www.linkedin.com/company/c{i}" for i in range(5000)]
+    assert list(iter_input_entries(io.StringIO(json.dumps(urls)))) == urls
+    wrapped = json.dumps({"urls": urls}, indent=2)
+    assert list(iter_input_entries(io.StringIO(wrapped))) == urls
+
+def test_ndjson_and_plain_text(tmp_path):
+    p = tmp_path / "in.ndjson"
+    p.write_text('"https://www.linkedin.com/company/a"\n{"url": "https://www.linkedin.com/company/b"}\n')
+    assert list(iter_input_urls(str(p))) == [
+        "https://www.linkedin.com/company/a",
+        "https://www.linkedin.com/company/b",
+    ]
+    p = tmp_path / "in.txt"
+    p.write_text("# comment\nhttps://www.linkedin.com/company/a\n\nhttps://www.linkedin.com/company/b")
+    assert list(iter_input_urls(str(p))) == [
+        "https://www.linkedin.com/company/a",
+        "https://www.linkedin.com/company/b",
+    ]
+
+def test_malformed_input_raises_input_error_where_it_is_read(tmp_path):
+    p = tmp_path / "in.ndjson"
+    p.write_text('"https://www.linkedin.com/company/a"\n{"url": "https://www.linkedin.com/company/b"\n')
+    urls = iter_input_urls(str(p))
+    assert next(urls) == "https://www.linkedin.com/company/a"
+    with pytest.raises(InputError):
+        next(urls)
+
+    # and it comes out of the stream as it is, not as some other ValueError
+    p.write_text('{"url": "https://www.linkedin.com/company/a"\n')
+
+    async def main():
+        return [item async for item in scrape_stream(iter_input_urls(str(p)))]
+
+    with pytest.raises(InputError):
+        asyncio.run(main())
@@ -0,0 +1,50 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from utils.metrics import MetricsRegistry, ProgressReporter, RECORDS  # noqa
+
+def test_registry_renders_prometheus_text():
+    reg = MetricsRegistry()
+    requests = reg.counter("t_requests_total", "Requests.")
+    requests.inc(status=200)
+    requests.inc(2, status=429)
+    depth = reg.gauge("t_depth", "Depth.")
+    depth.set_function(lambda: 7, queue="fetch")
+    latency = reg.histogram("t_seconds", "Latency.", buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 0.5, 5.0):
+        latency.observe(v, stage="fetch")
+
+    text = reg.render_prometheus()
+    assert '# TYPE t_requests_total counter' in text
+    assert 't_requests_total{status="429"} 2' in text
+    assert 't_depth{queue="fetch"} 7' in text
+    assert 't_seconds_bucket{stage="fetch",le="0.1"} 1' in text
+    assert 't_seconds_bucket{stage="fetch",le="1"} 3' in text
+    assert 't_seconds_bucket{stage="fetch",le="+Inf"} 4' in text
+    assert 't_seconds_count{stage="fetch"} 4' in text
+
+def test_histogram_quantiles_and_snapshot():
+    reg = MetricsRegistry()
+    latency = reg.histogram("t_seconds", buckets=(0.01, 0.1, 1.0))
+    for _ in range(90):
+        latency.observe(0.005)
+    for _ in range(10):
+        latency.observe(0.5)
+    assert latency.quantile(0.5) == 0.01
+    assert latency.quantile(0.95) == 1.0
+    snap = reg.snapshot()["t_seconds"]["all"]
+    assert snap["count"] == 100 and snap["p99"] == 1.0
+
+def test_progress_line_reports_eta_once_total_is_known():
+    progress = ProgressReporter(interval=0)
+    RECORDS.inc(3, result="done")
+    progress.queued = 5
+    assert "still reading input" in progress.progress_line()
+    progress.input_done = True
+    line = progress.progress_line()
+    assert "3 done, 0 failed of 5" in line and "ETA" in line
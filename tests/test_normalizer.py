@@ -24,6 +24,7 @@ def test_normalize_types_and_urls():
         "stock": {}
     }
     out = normalize_company_record(rec)
+    assert out is rec  # normalized in place
     assert out["name"] == "Foo Inc"
     assert out["website"].startswith("https://")
     assert out["followersCount"] == 1234
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import sys
+
+import pytest
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from client.http import HttpClient  # noqa
+from extractors.linkedin_company_parser import LinkedInCompanyParser  # noqa
+from pipelines import parse_stage  # noqa
+from pipelines.parse_stage import ParseStage, parse_page  # noqa
+from pipelines.stream import ScrapeError, StreamStats, scrape_stream  # noqa
+
+PAGE = ('<html><head><meta property="og:description" content="  We make   {slug}. " />'
+        '<script type="application/ld+json">{{"@type": "Organization", "name": "{slug}", '
+        '"url": "{slug}.example", "address": {{"addressLocality": " Metropolis "}}}}</script></head>'
+        "<body><div>10,001+ employees</div><div>Founded 1999</div><div>1,234 followers</div></body></html>")
+
+def _without_timestamp(record):
+    record = dict(record)
+    record.pop("scrapedAt")
+    return record
+
+@pytest.mark.parametrize("executor,workers", [("process", 1), ("thread", 2), ("process", 0)])
+def test_stage_matches_parse_page_and_survives_a_parser_error(executor, workers):
+    pages = {f"https://www.linkedin.com/company/c{i}": PAGE.format(slug=f"c{i}") for i in range(4)}
+
+    async def main():
+        with ParseStage(workers=workers, executor=executor) as stage:
+            records = await asyncio.gather(*(stage.parse(html, url) for url, html in pages.items()))
+            with pytest.raises(TypeError):
+                await stage.parse(None, "https://www.linkedin.com/company/broken")
+            # the pool is still usable after the failure
+            after = await stage.parse(PAGE.format(slug="after"), "https://www.linkedin.com/company/after")
+        return records, after
+
+    records, after = asyncio.run(main())
+    expected = [parse_page(html, url) for url, html in pages.items()]
+    assert [_without_timestamp(r) for r in records] == [_without_timestamp(r) for r in expected]
+    assert records[0]["website"] == "https://c0.example" and records[0]["followersCount"] == 1234
+    assert after["name"] == "after"
+
+class _FailingParser(LinkedInCompanyParser):
+    def parse(self, html, base_url, include_raw=False, scanned=None):
+        if base_url.rstrip("/").endswith("broken"):
+            raise ValueError("unexpected page layout")
+        return super().parse(html, base_url, include_raw, scanned)
+
+def test_parser_error_in_the_hand_off_becomes_a_scrape_error(monkeypatch, local_server, proxy_file):
+    monkeypatch.setitem(parse_stage._parsers, "auto", _FailingParser())
+    slugs = ["c0", "broken", "c1", "c2"]
+
+    async def page(request):
+        slug = request.path.rstrip("/").rsplit("/", 1)[-1]
+        return web.Response(text=PAGE.format(slug=slug), content_type="text/html")
+
+    async def main():
+        async with local_server(page) as port:
+            stats = StreamStats()
+            async with HttpClient(max_concurrency=2, proxy_file=proxy_file(port)) as client:
+                with ParseStage(workers=1, executor="thread") as stage:
+                    items = [item async for item in scrape_stream(
+                        [f"http://www.linkedin.com/company/{s}" for s in slugs], client, stage, stats=stats)]
+        return items, stats
+
+    items, stats = asyncio.run(main())
+    errors = [item for item in items if isinstance(item, ScrapeError)]
+    records = {item["name"]: item for item in items if not isinstance(item, ScrapeError)}
+    assert len(errors) == 1 and "unexpected page layout" in errors[0].error and not errors[0].permanent
+    assert (stats.done, stats.failed) == (3, 1)
+    # the parse worker kept going after the failure, and parsed exactly what parse_page does
+    for slug in ("c0", "c1", "c2"):
+        record = records[slug]
+        assert _without_timestamp(record) == _without_timestamp(parse_page(PAGE.format(slug=slug), record["url"]))
@@ -10,8 +10,7 @@ if SRC not in sys.path:
 
 from extractors.linkedin_company_parser import LinkedInCompanyParser  # noqa
 
-def test_parse_basic_fields_from_meta():
-    html = """
+CONTOSO_HTML = """
     <html>
       <head>
         <meta property="og:title" content="Contoso | LinkedIn" />
@@ -40,6 +39,9 @@ def test_parse_basic_fields_from_meta():
       </body>
     </html>
     """
+
+def test_parse_basic_fields_from_meta():
+    html = CONTOSO_HTML
     parser = LinkedInCompanyParser()
     data = parser.parse(html, base_url="https://www.linkedin.com/company/contoso", include_raw=False)
     assert data["name"] == "Contoso"
@@ -47,4 +49,46 @@ def test_parse_basic_fields_from_meta():
     assert data["mainAddress"]["addressLocality"] == "Metropolis"
     assert data["companySize"].startswith("10,001")
     assert data["founded"] == 1999
-    assert isinstance(data["followersCount"], int) and data["followersCount"] > 0
\ No newline at end of file
+    assert isinstance(data["followersCount"], int) and data["followersCount"] > 0
+
+def test_fast_engine_matches_soup_engine():
+    url = "https://www.linkedin.com/company/contoso"
+    pages = [
+        CONTOSO_HTML,
+        CONTOSO_HTML.replace("Founded 1999", "Industry: Software &amp; IT <a href='https://contoso.example'>x</a>"),
+        "<html><body><!-- 9 followers --><p>Founded 2001 employees</p><p>42 employees</p></body></html>",
+    ]
+    for html in pages:
+        fast = LinkedInCompanyParser(engine="fast").parse(html, base_url=url)
+        soup = LinkedInCompanyParser(engine="soup").parse(html, base_url=url)
+        fast.pop("scrapedAt")
+        soup.pop("scrapedAt")
+        assert fast == soup
+
+RELATED_HTML = CONTOSO_HTML.replace("</body>", """
+        <section class="aside-section-container" data-test-id="similar-pages">
+          <h2>Similar pages</h2>
+          <ul>
+            <li><a href="https://www.linkedin.com/company/fabrikam?trk=similar-pages" class="base-aside-card">
+              <img alt="" src="x.png"><div><h3>Fabrikam</h3><p>Software Development</p><p>Redmond, WA</p></div></a></li>
+            <li><a href="/company/northwind-traders/?trk=similar-pages"><h3>Northwind &amp; Co</h3></a></li>
+          </ul>
+        </section>
+        <section data-test-id="affiliated-pages"><ul>
+          <li><a href="https://www.linkedin.com/showcase/contoso-cloud/"><h3>Contoso Cloud</h3><p>IT Services</p></a></li>
+        </ul></section>
+      </body>""")
+
+def test_related_pages_are_extracted_by_both_engines():
+    url = "https://www.linkedin.com/company/contoso"
+    fast = LinkedInCompanyParser(engine="fast").parse(RELATED_HTML, base_url=url)
+    soup = LinkedInCompanyParser(engine="soup").parse(RELATED_HTML, base_url=url)
+    assert fast["similarPages"] == soup["similarPages"] == [
+        {"name": "Fabrikam", "industry": "Software Development", "address": "Redmond, WA",
+         "linkedinUrl": "https://www.linkedin.com/company/fabrikam"},
+        {"name": "Northwind & Co", "industry": None, "address": None,
+         "linkedinUrl": "https://www.linkedin.com/company/northwind-traders/"},
+    ]
+    assert fast["affiliatedPages"] == [{"name": "Contoso Cloud", "industry": "IT Services", "address": None,
+                                        "linkedinUrl": "https://www.linkedin.com/showcase/contoso-cloud/"}]
+    assert fast["followersCount"] == 124567
@@ -0,0 +1,37 @@
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from utils.profiling import LoopLagWatchdog, SamplingProfiler  # noqa
+
+def _block_the_loop():
+    time.sleep(0.3)
+
+def test_watchdog_and_profiler_catch_a_blocking_call(tmp_path):
+    async def scenario():
+        watchdog = LoopLagWatchdog(interval=0.02, threshold=0.1)
+        profiler = SamplingProfiler(hz=200)
+        watchdog.start()
+        profiler.start()
+        await asyncio.sleep(0.1)
+        _block_the_loop()
+        await asyncio.sleep(0.1)
+        watchdog.stop()
+        profiler.stop()
+        return watchdog, profiler
+
+    watchdog, profiler = asyncio.run(scenario())
+    assert watchdog.stalls == 1
+    assert watchdog.max_lag >= 0.2
+    flat_path, collapsed_path = profiler.write(str(tmp_path / "out"))
+    with open(flat_path, encoding="utf-8") as f:
+        assert "_block_the_loop" in f.read()
+    with open(collapsed_path, encoding="utf-8") as f:
+        line = next(l for l in f if "_block_the_loop" in l)
+    assert line.startswith("MainThread;") and int(line.rsplit(" ", 1)[1]) > 10
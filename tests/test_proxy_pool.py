@@ -0,0 +1,31 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from client.proxy_pool import ProxyPool, BLOCKED  # noqa
+
+def test_repeated_blocks_quarantine_proxy():
+    pool = ProxyPool(["http://good:1", "http://bad:1", "http://spare:1"], block_threshold=2, cooldown=60)
+    good, bad, spare = pool.states
+    for _ in range(2):
+        pool.record_failure(bad, BLOCKED, 0.1)
+    pool.record_success(good, 0.1)
+    assert all(pool.pick() is not bad for _ in range(50))
+    # a retry fails over to an untried healthy proxy, and never to a quarantined one
+    assert pool.pick(exclude=[good]) is spare
+    assert pool.pick(exclude=[good, spare]) in (good, spare)
+    report = {r["proxy"]: r for r in pool.report()}
+    assert report["http://bad:1"]["blocked"] == 2 and report["http://good:1"]["successRate"] == 1.0
+
+def test_selection_is_weighted_by_health():
+    pool = ProxyPool(["http://a:1", "http://b:1"])
+    a, b = pool.states
+    for _ in range(20):
+        pool.record_success(a, 0.05)
+        pool.record_failure(b, "error", 2.0)
+    picks = [pool.pick() for _ in range(500)]
+    assert picks.count(a) > picks.count(b) * 5
@@ -0,0 +1,43 @@
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from client.retry import (  # noqa
+    PermanentFetchError, RetryPolicy, RetryScheduler, TransientFetchError, classify_status, parse_retry_after,
+)
+
+def test_classification_and_policy():
+    assert classify_status(200) is None
+    assert classify_status(404) is PermanentFetchError
+    assert classify_status(429) is TransientFetchError
+    assert classify_status(503) is TransientFetchError
+    assert parse_retry_after("7") == 7.0
+    policy = RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=10.0)
+    assert not policy.should_retry(PermanentFetchError("u", "HTTP 404", 404), 1)
+    assert policy.should_retry(TransientFetchError("u", "HTTP 429", 429), 2)
+    assert not policy.should_retry(TransientFetchError("u", "HTTP 429", 429), 3)
+    assert 1.0 <= policy.delay(2) <= 2.0
+    assert policy.delay(1, retry_after=5.0) >= 5.0
+
+def test_scheduler_releases_items_in_due_order():
+    async def scenario():
+        queue = asyncio.Queue()
+        sched = RetryScheduler(queue)
+        sched.start()
+        start = time.monotonic()
+        sched.schedule("late", 0.2)
+        sched.schedule("early", 0.05)
+        first = await queue.get()
+        second = await queue.get()
+        elapsed = time.monotonic() - start
+        await sched.stop()
+        return first, second, elapsed
+    first, second, elapsed = asyncio.run(scenario())
+    assert (first, second) == ("early", "late")
+    assert 0.2 <= elapsed < 1.0
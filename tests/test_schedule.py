@@ -0,0 +1,70 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from client.http import HttpClient  # noqa
+from pipelines.schedule import TimeBudget, by_priority, write_continuation  # noqa
+from pipelines.stream import ScrapeError, StreamStats, scrape_stream  # noqa
+from utils.inputs import InputError, iter_input_urls, iter_prioritized_urls  # noqa
+
+PAGE = '<html><head><script type="application/ld+json">{{"@type": "Organization", "name": "{slug}"}}</script></head></html>'
+
+def test_priorities_order_inputs_and_continuation_round_trips(tmp_path):
+    inputs = tmp_path / "in.ndjson"
+    inputs.write_text('"https://www.linkedin.com/company/a"\n'
+                      '{"url": "https://www.linkedin.com/company/b", "priority": 5}\n'
+                      '{"url": "https://www.linkedin.com/company/c", "priority": "10"}\n'
+                      '{"url": "https://www.linkedin.com/company/d", "priority": 5}\n')
+    entries = by_priority(iter_prioritized_urls(str(inputs)))
+    assert [(u.rsplit("/", 1)[-1], p) for u, p in entries] == [("c", 10), ("b", 5), ("d", 5), ("a", 0)]
+
+    out = str(tmp_path / "out.continuation.jsonl")
+    left = ["https://www.linkedin.com/company/a", "https://www.linkedin.com/company/D/"]
+    assert write_continuation(out, left, {"d": 5.0}) == 2
+    assert list(iter_prioritized_urls(out)) == [("https://www.linkedin.com/company/D/", 5.0),
+                                                ("https://www.linkedin.com/company/a", 0.0)]
+
+    # priorities are only read when they are used, and must be finite numbers
+    for bad in ('"high"', '"nan"', '"-inf"', "1e999"):
+        inputs.write_text(f'{{"url": "https://www.linkedin.com/company/a", "priority": {bad}}}\n')
+        assert list(iter_input_urls(str(inputs))) == ["https://www.linkedin.com/company/a"]
+        with pytest.raises(InputError, match="Invalid priority"):
+            list(iter_prioritized_urls(str(inputs)))
+
+def test_time_budget_stops_new_fetches_and_drains_in_flight(local_server, proxy_file):
+    urls = [f"http://www.linkedin.com/company/c{i}" for i in range(60)]
+
+    async def page(request):
+        await asyncio.sleep(0.1)
+        slug = request.path.rstrip("/").rsplit("/", 1)[-1]
+        return web.Response(text=PAGE.format(slug=slug), content_type="text/html")
+
+    async def main():
+        async with local_server(page) as port:
+            pending = iter(urls)
+            budget = TimeBudget(1.0, margin=0.1, initial_estimate=0.5).start()
+            stats = StreamStats()
+            async with HttpClient(max_concurrency=2, proxy_file=proxy_file(port)) as client:
+                items = [item async for item in scrape_stream(pending, client, stats=stats, budget=budget)]
+        return items, budget, stats, list(pending)
+
+    started = time.monotonic()
+    items, budget, stats, unread = asyncio.run(main())
+    elapsed = time.monotonic() - started
+    assert not any(isinstance(item, ScrapeError) for item in items)
+    assert 0 < stats.done < len(urls) and stats.deferred == len(budget.deferred)
+    assert budget.closed and elapsed < 1.5
+    # the first URLs were scraped, and everything else is accounted for exactly once
+    done = [item["name"] for item in items]
+    assert sorted(done) == sorted(u.rsplit("/", 1)[-1] for u in urls[:len(done)])
+    rest = [u.rsplit("/", 1)[-1] for u in budget.deferred + unread]
+    assert sorted(done + rest) == sorted(u.rsplit("/", 1)[-1] for u in urls)
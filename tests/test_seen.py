@@ -0,0 +1,51 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from utils.seen import BloomFilter, SeenSet  # noqa
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives(tmp_path):
+    bloom = BloomFilter(str(tmp_path / "b.bloom"), capacity=5000, error_rate=0.01)
+    for i in range(5000):
+        bloom.add(f"company-{i}")
+    assert all(f"company-{i}" in bloom for i in range(5000))
+    false_positives = sum(f"other-{i}" in bloom for i in range(5000))
+    assert false_positives < 150
+    bloom.close()
+
+def test_seen_set_is_exact_and_persists_across_runs(tmp_path):
+    path = str(tmp_path / "seen.db")
+    # a tiny filter saturates quickly, so the exact table must settle every lookup
+    with SeenSet(path, capacity=10, error_rate=0.1, batch_size=3) as seen:
+        for i in range(100):
+            seen.add(f"company-{i}")
+        assert "company-5" in seen and "company-100" not in seen
+    with SeenSet(path, capacity=10, error_rate=0.1) as seen:
+        assert all(f"company-{i}" in seen for i in range(100))
+        assert not any(f"other-{i}" in seen for i in range(100))
+        assert seen.exact_lookups > 0
+    # a lost filter file is rebuilt from the table
+    os.remove(path + ".bloom")
+    with SeenSet(path) as seen:
+        assert "company-42" in seen and "company-420" not in seen
+
+def test_seen_set_commits_only_after_the_hook(tmp_path):
+    committed_at_hook = []
+    path = str(tmp_path / "seen.db")
+
+    def commit_after(commit):
+        committed_at_hook.append(seen._conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0])
+        commit()
+
+    seen = SeenSet(path, capacity=1000, batch_size=3, commit_after=commit_after)
+    with seen:
+        for i in range(7):
+            seen.add(f"company-{i}")
+    # every batch is handed to the hook (the exporter's after_writes in the runner) instead of being written
+    assert committed_at_hook == [0, 3, 6]
+    with SeenSet(path, capacity=1000) as reopened:
+        assert all(f"company-{i}" in reopened for i in range(7))
@@ -0,0 +1,29 @@
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from utils.serialization import available_engines, get_dumps  # noqa
+
+def test_engines_agree_and_keep_field_order():
+    record = {"name": "Société Générale", "url": "https://www.linkedin.com/company/societe-generale",
+              "mainAddress": {"type": "PostalAddress", "addressLocality": "Paris"}, "founded": 1864,
+              "followersCount": 2**70, "stock": {"symbol": None}, "similarPages": [], "scrapedAt": "2024-01-01"}
+    lines = {engine: get_dumps(engine)(record) for engine in available_engines()}
+    assert "json" in lines
+    # compact and identical whichever engine is installed; ints past 64 bits go through the stdlib
+    assert len(set(lines.values())) == 1
+    line = lines["json"]
+    assert "Société" in line and ": " not in line
+    assert list(json.loads(line)) == list(record)
+    assert json.loads(line) == record
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        get_dumps("yaml")
@@ -0,0 +1,50 @@
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from pipelines.checkpoint import CheckpointStore, default_checkpoint_path  # noqa
+from pipelines.exporter import Exporter  # noqa
+from pipelines.sharding import filter_shard, merge_shards, parse_shard_spec, shard_of, shard_paths  # noqa
+
+def test_shard_assignment_is_stable_and_covers_every_url():
+    urls = [f"https://www.linkedin.com/company/c{i}" for i in range(1000)]
+    shards = [list(filter_shard(urls, i, 4)) for i in range(4)]
+    assert sorted(u for s in shards for u in s) == sorted(urls)
+    assert all(200 < len(s) < 300 for s in shards)
+    # the slug decides the shard, not the URL spelling
+    assert shard_of("http://linkedin.com/company/Contoso/", 7) == shard_of("https://www.linkedin.com/company/contoso", 7)
+    # fixed value: must not change between Python processes or releases
+    assert shard_of("https://www.linkedin.com/company/contoso", 16) == 0
+
+def test_parse_shard_spec():
+    assert parse_shard_spec("2/8") == (2, 8)
+    for bad in ("8/8", "-1/4", "1", "a/b", "0/0"):
+        with pytest.raises(ValueError):
+            parse_shard_spec(bad)
+
+def test_merge_dedupes_records_and_collects_errors(tmp_path):
+    out = str(tmp_path / "out.json")
+    paths = shard_paths(out, 2)
+    for i, path in enumerate(paths):
+        exporter = Exporter(path)
+        exporter.open()
+        exporter.write({"url": f"https://www.linkedin.com/company/only{i}", "name": f"Only {i}"})
+        exporter.write({"url": "https://www.linkedin.com/company/both", "name": "Both"})
+        exporter.close()
+        with CheckpointStore(default_checkpoint_path(path)) as cp:
+            cp.mark_failed(f"https://www.linkedin.com/company/missing{i}", "HTTP 404")
+            cp.mark_failed("https://www.linkedin.com/company/both", "HTTP 429")
+
+    stats = merge_shards(paths, out)
+    with open(out, encoding="utf-8") as f:
+        bundle = json.load(f)
+    assert sorted(r["name"] for r in bundle["records"]) == ["Both", "Only 0", "Only 1"]
+    assert sorted(e["url"].rsplit("/", 1)[1] for e in bundle["errors"]) == ["missing0", "missing1"]
+    assert stats["records"] == 3 and stats["shards"][1]["duplicates"] == 1
@@ -0,0 +1,47 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from pipelines.exporter import Exporter  # noqa
+from pipelines.store import RecordStore  # noqa
+
+def _record(slug, scraped_at, **fields):
+    return {"name": slug.title(), "url": f"https://www.linkedin.com/company/{slug}/", "scrapedAt": scraped_at,
+            **fields}
+
+def test_upserts_keep_newest_record_and_every_scrape_time(tmp_path):
+    path = str(tmp_path / "companies.db")
+    exporter = Exporter(str(tmp_path / "out.json"), backends=[RecordStore(path)])
+    exporter.open()
+    exporter.write(_record("contoso", "2024-01-02T00:00:00Z", followersCount=10))
+    exporter.close()
+    with RecordStore(path) as store:
+        store.write_batch([_record("contoso", "2024-03-01T00:00:00Z", followersCount=30),
+                           _record("contoso", "2024-02-01T00:00:00Z", followersCount=20),  # late shard
+                           {"name": "Not a company", "url": "https://example.com/"}])
+        assert store.get("http://linkedin.com/company/Contoso/about/")["followersCount"] == 30
+        assert store.get("contoso")["scrapedAt"] == "2024-03-01T00:00:00Z"
+        assert store.history("contoso") == ["2024-01-02T00:00:00Z", "2024-02-01T00:00:00Z", "2024-03-01T00:00:00Z"]
+        assert store.count() == 1 and store.get("fabrikam") is None
+
+def test_query_filters_use_the_indexes(tmp_path):
+    with RecordStore(str(tmp_path / "companies.db")) as store:
+        store.write_batch([
+            _record("a", "t", industry="Software Development", founded=1999, companySize="11-50 employees",
+                    mainAddress={"addressCountry": "US"}),
+            _record("b", "t", industry="Software Development", founded=2015, mainAddress={"addressCountry": "DE"}),
+            _record("c", "t", industry="Retail", founded="2001", mainAddress={"addressCountry": "us"}),
+            _record("d", "t", industry="Retail", founded="unknown"),
+        ])
+        assert sorted(r["name"] for r in store.query(industry="software development")) == ["A", "B"]
+        assert sorted(r["name"] for r in store.query(country="US")) == ["A", "C"]
+        assert [r["name"] for r in store.query(founded_from=2000, founded_to=2010)] == ["C"]
+        assert store.count(industry="Retail", country="us") == 1
+        assert len(list(store.query(limit=2))) == 2
+        plan = store._conn.execute("EXPLAIN QUERY PLAN SELECT record FROM companies WHERE industry = ?",
+                                   ("Retail",)).fetchall()
+        assert "companies_industry" in str(plan)
@@ -0,0 +1,93 @@
+import asyncio
+import contextlib
+import os
+import sys
+
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from client.http import HttpClient  # noqa
+from client.retry import RetryPolicy  # noqa
+from pipelines.checkpoint import CheckpointStore  # noqa
+from pipelines.stream import ScrapeError, StreamStats, scrape_stream  # noqa
+
+PAGE = ('<html><head><script type="application/ld+json">{{"@type": "Organization", "name": "{slug}"}}</script>'
+        "</head><body><div>1,234 followers</div></body></html>")
+
+async def _page(request):
+    slug = request.path.rstrip("/").rsplit("/", 1)[-1]
+    if slug.startswith("missing"):
+        return web.Response(status=404, text="Not found")
+    return web.Response(text=PAGE.format(slug=slug), content_type="text/html")
+
+def test_stream_yields_records_and_errors_and_reuses_the_client(local_server, proxy_file):
+    async def urls():
+        for slug in ("contoso", "fabrikam", "missing-co", "Contoso"):
+            yield f"http://www.linkedin.com/company/{slug}/"
+
+    async def main():
+        async with local_server(_page) as port:
+            async with HttpClient(max_concurrency=2, proxy_file=proxy_file(port)) as client:
+                stats = StreamStats()
+                first = [item async for item in scrape_stream(urls(), client, stats=stats)]
+                second = [item async for item in scrape_stream(["http://linkedin.com/company/northwind"], client)]
+        return first, second, stats
+
+    first, second, stats = asyncio.run(main())
+    records = sorted(r["name"] for r in first if not isinstance(r, ScrapeError))
+    errors = [e for e in first if isinstance(e, ScrapeError)]
+    assert records == ["contoso", "fabrikam"]
+    assert len(errors) == 1 and errors[0].permanent and errors[0].status == 404
+    assert (stats.done, stats.failed, stats.duplicates) == (2, 1, 1)
+    assert [r["name"] for r in second] == ["northwind"]
+
+def test_checkpoint_records_the_fetch_attempts_of_each_url(tmp_path, local_server, proxy_file):
+    hits = {}
+
+    async def flaky(request):
+        slug = request.path.rstrip("/").rsplit("/", 1)[-1]
+        hits[slug] = hits.get(slug, 0) + 1
+        if slug.startswith("flaky") and hits[slug] < 3:
+            return web.Response(status=503, text="Busy")
+        return await _page(request)
+
+    async def main(checkpoint):
+        async with local_server(flaky) as port:
+            async with HttpClient(max_concurrency=2, proxy_file=proxy_file(port),
+                                  retry_policy=RetryPolicy(max_attempts=3, base_delay=0.01)) as client:
+                return [item async for item in scrape_stream(
+                    [f"http://www.linkedin.com/company/{s}" for s in ("contoso", "flaky-co", "missing-co")],
+                    client, checkpoint=checkpoint)]
+
+    with CheckpointStore(str(tmp_path / "job.checkpoint.db")) as checkpoint:
+        asyncio.run(main(checkpoint))
+        checkpoint.flush()
+        rows = dict(checkpoint._conn.execute("SELECT url, attempts FROM urls").fetchall())
+    assert {url.rsplit("/", 1)[-1]: n for url, n in rows.items()} == {"contoso": 1, "flaky-co": 3, "missing-co": 1}
+
+def test_slow_consumer_applies_backpressure_and_closing_stops_work(local_server, proxy_file):
+    pulled = 0
+
+    async def urls():
+        nonlocal pulled
+        for i in range(200):
+            pulled += 1
+            yield f"http://www.linkedin.com/company/c{i}"
+
+    async def main():
+        async with local_server(_page) as port:
+            stream = scrape_stream(urls(), max_concurrency=2, proxy_file=proxy_file(port), buffer=1)
+            async with contextlib.aclosing(stream):
+                async for _ in stream:
+                    await asyncio.sleep(0.2)
+                    break
+            leftover = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        return leftover
+
+    leftover = asyncio.run(main())
+    assert pulled < 30
+    assert not leftover
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import sys
+
+import pytest
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from client.http import HttpClient  # noqa
+from client.retry import PermanentFetchError  # noqa
+from extractors.linkedin_company_parser import LinkedInCompanyParser  # noqa
+from extractors.streaming import StreamingExtractor  # noqa
+
+PAGE = ("<html><head><title>Contoso | LinkedIn</title>"
+        '<script type="application/ld+json">{"@type": "Organization", "name": "Contoso", '
+        '"url": "https://contoso.example"}</script></head><body>'
+        "<div>10,001+ employees</div><div>12,345 followers</div><div>Industry: Software Development</div>"
+        + "".join(f'<div class="feed">post {i} &amp; more</div>' for i in range(5000)) + "</body></html>")
+
+def _chunks(text, size=4096):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def test_extractor_stops_once_fields_are_seen_and_parses_the_same():
+    extractor = StreamingExtractor(check_every=8192)
+    fed = 0
+    for chunk in _chunks(PAGE):
+        fed += len(chunk)
+        if extractor.feed(chunk):
+            break
+    assert extractor.done and fed < len(PAGE) / 10
+    parser = LinkedInCompanyParser()
+    full = parser.parse(PAGE, base_url="https://www.linkedin.com/company/contoso")
+    cut = parser.parse(extractor.body(), base_url="https://www.linkedin.com/company/contoso")
+    for key in ("name", "website", "followersCount", "companySize", "industry"):
+        assert cut[key] == full[key]
+
+def test_extractor_reads_everything_when_a_field_is_missing():
+    extractor = StreamingExtractor(fields=("founded",))
+    assert not any(extractor.feed(chunk) for chunk in _chunks(PAGE))
+    assert extractor.body() == PAGE
+    with pytest.raises(ValueError):
+        StreamingExtractor(fields=("nope",))
+
+def test_client_streams_and_enforces_max_body_size(local_server):
+    async def page(request):
+        resp = web.StreamResponse(headers={"Content-Type": "text/html; charset=utf-8"})
+        await resp.prepare(request)
+        for chunk in _chunks(PAGE):
+            await resp.write(chunk.encode("utf-8"))
+        return resp
+
+    async def main():
+        async with local_server(page) as port:
+            url = f"http://127.0.0.1:{port}/company/contoso"
+            async with HttpClient(stream_fields=("name", "followersCount")) as client:
+                streamed = await client.fetch_once(url)
+            async with HttpClient(max_body_bytes=len(PAGE) // 2) as client:
+                with pytest.raises(PermanentFetchError):
+                    await client.fetch_once(url)
+            async with HttpClient() as client:
+                full = await client.fetch_once(url)
+        return streamed, full
+
+    streamed, full = asyncio.run(main())
+    assert full == PAGE
+    assert len(streamed) < len(PAGE) and "12,345 followers" in streamed
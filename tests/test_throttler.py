@@ -0,0 +1,38 @@
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from client.throttler import RateLimiter, TokenBucket  # noqa
+
+def test_bucket_paces_waiters_in_fifo_order():
+    async def scenario():
+        bucket = TokenBucket(rate=50, burst=2)
+        order = []
+
+        async def waiter(i):
+            await bucket.wait()
+            order.append((i, time.monotonic()))
+
+        start = time.monotonic()
+        await asyncio.gather(*(waiter(i) for i in range(12)))
+        return order, start
+    order, start = asyncio.run(scenario())
+    assert [i for i, _ in order] == list(range(12))
+    # 2 burst tokens, then 10 more at 50/s => ~0.2s total
+    assert 0.15 <= order[-1][1] - start < 0.5
+
+def test_adaptive_feedback_and_per_key_buckets():
+    limiter = RateLimiter(rate=10, burst=1, adaptive=True)
+    bucket = limiter.bucket("www.linkedin.com", "http://p1:8080")
+    assert limiter.bucket("www.linkedin.com") is not bucket
+    limiter.feedback("www.linkedin.com", "http://p1:8080", success=False)
+    limiter.feedback("www.linkedin.com", "http://p1:8080", success=False)
+    assert bucket.rate == 7.0  # one decrease per interval
+    limiter.feedback("www.linkedin.com", "http://p1:8080", success=True)
+    assert bucket.rate > 7.0
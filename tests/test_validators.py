@@ -0,0 +1,31 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from utils.validators import canonical_company_url, company_key, is_valid_linkedin_company_url  # noqa
+
+def test_company_url_variants_share_one_key():
+    variants = [
+        "linkedin.com/company/Microsoft",
+        "www.linkedin.com/company/microsoft/",
+        "http://www.linkedin.com/company/microsoft",
+        "https://de.linkedin.com/company/microsoft/about/?trk=public_profile#top",
+        "  https://WWW.LINKEDIN.COM/company/MICROSOFT/people/ ",
+    ]
+    assert {company_key(v) for v in variants} == {"microsoft"}
+    assert canonical_company_url(variants[3]) == "https://www.linkedin.com/company/microsoft"
+    assert canonical_company_url(variants[2]) == "http://www.linkedin.com/company/microsoft"
+
+def test_non_company_urls_are_rejected():
+    for url in ("https://www.linkedin.com/in/someone", "https://example.com/company/acme",
+                "https://www.linkedin.com/company/", "ftp://linkedin.com/company/acme", ""):
+        assert company_key(url) is None
+        assert not is_valid_linkedin_company_url(url)
+
+def test_percent_encoded_slugs_are_decoded_for_the_key():
+    assert company_key("https://www.linkedin.com/company/caf%C3%A9-co/") == "café-co"
+    assert canonical_company_url("https://www.linkedin.com/company/Caf%C3%A9-Co") == "https://www.linkedin.com/company/caf%C3%A9-co"